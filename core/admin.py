@@ -1,8 +1,124 @@
-from django.contrib import admin
-from .models import Perfil, Modulo, Pregunta, Progreso
+import io
+
+from django.contrib import admin, messages
+from django.http import StreamingHttpResponse
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import path
+
+from . import banco, trabajos
+from .forms import ImportarPreguntasForm
+from .models import (
+    Perfil, Modulo, Pregunta, Progreso, EntradaTutor, Intento, EstadisticaPregunta, ResumenCargo, Certificado, Leccion,
+    TrabajoCertificado,
+)
+
+
+def respuesta_exportacion(preguntas, formato):
+    # Se envía a medida que se lee de la base: la memoria no crece con el banco
+    tipo = 'text/csv' if formato == 'csv' else 'application/x-ndjson'
+    response = StreamingHttpResponse(banco.exportar(preguntas, formato), content_type=f'{tipo}; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="preguntas.{formato}"'
+    return response
+
+
+@admin.action(description='Exportar preguntas seleccionadas (CSV)')
+def exportar_csv(modeladmin, request, queryset):
+    return respuesta_exportacion(queryset, 'csv')
+
+
+@admin.action(description='Exportar preguntas seleccionadas (JSON Lines)')
+def exportar_jsonl(modeladmin, request, queryset):
+    return respuesta_exportacion(queryset, 'jsonl')
+
+
+@admin.action(description='Exportar las preguntas de los módulos seleccionados (CSV)')
+def exportar_preguntas_modulos(modeladmin, request, queryset):
+    return respuesta_exportacion(Pregunta.objects.filter(modulo__in=queryset), 'csv')
+
+
+class PreguntaAdmin(admin.ModelAdmin):
+    list_display = ('texto', 'modulo', 'tipo_pregunta', 'respuesta_correcta')
+    list_filter = ('modulo', 'tipo_pregunta')
+    actions = [exportar_csv, exportar_jsonl]
+    change_list_template = 'admin/core/pregunta/change_list.html'
+
+    def get_urls(self):
+        return [
+            path('importar/', self.admin_site.admin_view(self.importar), name='core_pregunta_importar'),
+        ] + super().get_urls()
+
+    def importar(self, request):
+        if not self.has_add_permission(request) or not self.has_change_permission(request):
+            return redirect('admin:core_pregunta_changelist')
+        form = ImportarPreguntasForm(request.POST or None, request.FILES or None)
+        if request.method == 'POST' and form.is_valid():
+            archivo = io.TextIOWrapper(form.cleaned_data['archivo'].file, encoding='utf-8-sig', newline='')
+            resultado = banco.importar(
+                banco.leer(archivo, form.cleaned_data['formato']),
+                tam_lote=form.cleaned_data['lote'],
+                usar_ids=not form.cleaned_data['sin_ids'],
+            )
+            nivel = messages.SUCCESS if not resultado.con_error else messages.WARNING
+            self.message_user(request, f'Importación: {resultado}.', nivel)
+            for numero, mensaje in resultado.errores[:20]:
+                self.message_user(request, f'Línea {numero}: {mensaje}', messages.ERROR)
+            return redirect('admin:core_pregunta_changelist')
+        return TemplateResponse(request, 'admin/core/pregunta/importar.html', {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'form': form,
+            'title': 'Importar preguntas',
+        })
+
+
+class LeccionInline(admin.StackedInline):
+    model = Leccion
+    fields = ('orden', 'titulo', 'contenido')
+    extra = 0
+
+
+class ModuloAdmin(admin.ModelAdmin):
+    actions = [exportar_preguntas_modulos]
+    inlines = [LeccionInline]
+
+
+class LeccionAdmin(admin.ModelAdmin):
+    list_display = ('titulo', 'modulo', 'orden', 'version', 'actualizado')
+    list_filter = ('modulo',)
+    list_select_related = ('modulo',)
+
+
+class CertificadoAdmin(admin.ModelAdmin):
+    list_display = ('codigo', 'user', 'modulo', 'emitido')
+    search_fields = ('codigo', 'user__username')
+    list_select_related = ('user', 'modulo')
+    readonly_fields = ('codigo', 'emitido')
+
+
+@admin.action(description='Volver a encolar')
+def reencolar(modeladmin, request, queryset):
+    for user_id, modulo_id in queryset.values_list('user_id', 'modulo_id'):
+        trabajos.encolar(user_id, modulo_id)
+
+
+class TrabajoCertificadoAdmin(admin.ModelAdmin):
+    list_display = ('user', 'modulo', 'estado', 'intentos', 'creado', 'terminado')
+    list_filter = ('estado',)
+    list_select_related = ('user', 'modulo')
+    readonly_fields = ('creado', 'iniciado', 'terminado', 'error')
+    actions = [reencolar]
+
 
 # Register your models here.
 admin.site.register(Perfil)
-admin.site.register(Modulo)
-admin.site.register(Pregunta)
-admin.site.register(Progreso)
\ No newline at end of file
+admin.site.register(Modulo, ModuloAdmin)
+admin.site.register(Pregunta, PreguntaAdmin)
+admin.site.register(Progreso)
+admin.site.register(EntradaTutor)
+admin.site.register(Intento)
+admin.site.register(EstadisticaPregunta)
+admin.site.register(ResumenCargo)
+admin.site.register(Certificado, CertificadoAdmin)
+admin.site.register(Leccion, LeccionAdmin)
+admin.site.register(TrabajoCertificado, TrabajoCertificadoAdmin)
@@ -0,0 +1,218 @@
+"""Alta masiva de usuarios (User + Perfil) desde un CSV.
+
+Pensada para incorporar una dependencia entera de una vez en lugar de pasar
+cada cuenta por `register`. El archivo se lee fila por fila y se guarda en
+bloques de `tam_lote`, cada uno en su transacción: bulk_create de User y un
+upsert de Perfil (ON CONFLICT (user) DO UPDATE), así la memoria no depende
+del tamaño del archivo.
+
+Columnas: nombre, apellido, cargo, correo y, opcionales, username (por
+defecto el correo) y contrasena. Las filas sin contraseña reciben una al
+azar, que se entrega a `credenciales` (una función que recibe la lista de
+(username, contraseña)) apenas se confirma su bloque: no se acumulan en
+memoria y, si falla un bloque posterior, las de los ya guardados no se
+pierden. Sin `credenciales`, una fila sin contraseña es un error. El hash
+PBKDF2 de cada contraseña es lo que domina el tiempo, así que se reparte
+entre `workers` procesos: el alta escala con los núcleos.
+
+Un username que ya existe se salta o, con `existentes='actualizar'`, se le
+actualizan el correo y el Perfil (y la contraseña si la fila trae una).
+
+bulk_create no envía señales: al confirmar cada bloque se renuevan a mano los
+sellos de los usuarios actualizados, su caché de certificados y de
+verificación, y al final se reconstruye el resumen por cargo (y se descartan
+las clasificaciones) si alguno cambió de cargo.
+"""
+import csv
+import multiprocessing
+import secrets
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.contrib.auth.password_validation import validate_password
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+
+from . import certificados, clasificacion, reportes, sellos, verificacion
+from .errores import ErrorFila
+from .models import CARGO_CHOICES, Certificado, Perfil
+
+COLUMNAS = ('username', 'nombre', 'apellido', 'cargo', 'correo', 'contrasena')
+EXISTENTES = ('saltar', 'actualizar')
+TAM_LOTE = 500
+MAX_ERRORES = 100
+# Nombre mostrado o clave, sin distinguir mayúsculas -> clave
+CARGOS = {texto.upper(): clave for clave, nombre in CARGO_CHOICES for texto in (clave, nombre)}
+CAMPOS_PERFIL = ['nombre', 'apellido', 'cargo', 'correo']
+
+
+@dataclass
+class Resultado:
+    creados: int = 0
+    actualizados: int = 0
+    saltados: int = 0
+    con_error: int = 0
+    errores: list = field(default_factory=list)  # [(número de línea, mensaje)]
+    generadas: int = 0  # contraseñas generadas y entregadas a `credenciales`
+    duracion: float = 0.0
+    workers: int = 1
+
+    def error(self, numero, mensaje):
+        self.con_error += 1
+        if len(self.errores) < MAX_ERRORES:
+            self.errores.append((numero, mensaje))
+
+    @property
+    def usuarios_por_segundo(self):
+        return (self.creados + self.actualizados) / self.duracion if self.duracion > 0 else 0
+
+    def __str__(self):
+        return (f'{self.creados} creados, {self.actualizados} actualizados, {self.saltados} saltados, '
+                f'{self.con_error} con error en {self.duracion:.2f} s '
+                f'({self.usuarios_por_segundo:.0f} usuarios/s con {self.workers} procesos)')
+
+
+def leer(archivo):
+    """Genera (número de línea, dict) de un CSV abierto, sin leerlo entero."""
+    lector = csv.DictReader(archivo)
+    for fila in lector:
+        yield lector.line_num, fila
+
+
+def validar(fila):
+    """(User, Perfil, contraseña o None) de una fila, sin guardar; lanza ErrorFila si no es válida."""
+    def texto(campo, maximo, obligatorio=True):
+        valor = str(fila.get(campo) or '').strip()
+        if obligatorio and not valor:
+            raise ErrorFila(f'falta {campo}')
+        if len(valor) > maximo:
+            raise ErrorFila(f'{campo} supera {maximo} caracteres')
+        return valor
+
+    correo = texto('correo', 254, obligatorio=False).lower()
+    if correo:
+        try:
+            validate_email(correo)
+        except ValidationError:
+            raise ErrorFila(f'correo inválido: {correo!r}')
+    username = texto('username', 150, obligatorio=False) or correo
+    if not username:
+        raise ErrorFila('falta username o correo')
+    try:
+        User.username_validator(username)
+    except ValidationError:
+        raise ErrorFila(f'username inválido: {username!r}')
+    cargo = CARGOS.get(texto('cargo', 100, obligatorio=False).upper() or 'SELECCIONE')
+    if cargo is None:
+        raise ErrorFila(f"cargo desconocido: {fila.get('cargo')!r}")
+
+    user = User(username=username, email=correo)
+    perfil = Perfil(nombre=texto('nombre', 100), apellido=texto('apellido', 100), cargo=cargo, correo=correo or None)
+    contrasena = str(fila.get('contrasena') or '') or None
+    if contrasena is not None:
+        try:
+            validate_password(contrasena, user)
+        except ValidationError as e:
+            raise ErrorFila(f"contraseña rechazada: {' '.join(e.messages)}")
+    return user, perfil, contrasena
+
+
+def _hashear(contrasenas, pool, workers):
+    if pool is None:
+        return [make_password(c) for c in contrasenas]
+    return list(pool.map(make_password, contrasenas, chunksize=max(1, len(contrasenas) // (workers * 4))))
+
+
+def _guardar_lote(lote, resultado, existentes, pool, workers, credenciales):
+    """Crea o actualiza un bloque de (número, User, Perfil, contraseña). Devuelve si cambió algún cargo."""
+    ya_creados = dict(User.objects.filter(username__in=[u.username for _, u, _, _ in lote]).values_list('username', 'id'))
+    nuevos, cambiados, generadas = [], [], []
+    for numero, user, perfil, contrasena in lote:
+        if user.username not in ya_creados:
+            if contrasena is None:
+                if credenciales is None:
+                    resultado.error(numero, 'falta contrasena')
+                    continue
+                contrasena = secrets.token_urlsafe(12)
+                generadas.append((user.username, contrasena))
+            nuevos.append((user, perfil, contrasena))
+        elif existentes == 'actualizar':
+            user.id = ya_creados[user.username]
+            cambiados.append((user, perfil, contrasena))
+        else:
+            resultado.saltados += 1
+
+    # Solo se hashean las contraseñas que se van a guardar, todas juntas en el pool
+    por_hashear = [(user, c) for user, _, c in nuevos + cambiados if c is not None]
+    for (user, _), hash_ in zip(por_hashear, _hashear([c for _, c in por_hashear], pool, workers)):
+        user.password = hash_
+
+    ids = [user.id for user, _, _ in cambiados]
+    cargos_anteriores = dict(Perfil.objects.filter(user_id__in=ids).values_list('user_id', 'cargo')) if ids else {}
+    with transaction.atomic():
+        User.objects.bulk_create([user for user, _, _ in nuevos])
+        creados = dict(User.objects.filter(username__in=[u.username for u, _, _ in nuevos]).values_list('username', 'id'))
+        User.objects.bulk_update([u for u, _, c in cambiados if c is None], ['email'])
+        User.objects.bulk_update([u for u, _, c in cambiados if c is not None], ['email', 'password'])
+        for user, perfil, _ in nuevos + cambiados:
+            perfil.user_id = user.id or creados[user.username]
+        Perfil.objects.bulk_create(
+            [perfil for _, perfil, _ in nuevos + cambiados],
+            update_conflicts=True, unique_fields=['user'], update_fields=CAMPOS_PERFIL,
+        )
+        if ids:
+            codigos = list(Certificado.objects.filter(user_id__in=ids).values_list('codigo', flat=True))
+            transaction.on_commit(lambda: _renovar(ids, codigos))
+    if generadas:
+        credenciales(generadas)
+        resultado.generadas += len(generadas)
+    resultado.creados += len(nuevos)
+    resultado.actualizados += len(cambiados)
+    return any(cargos_anteriores.get(user.id) != perfil.cargo for user, perfil, _ in cambiados)
+
+
+def _renovar(ids, codigos):
+    # Lo que harían las señales de Perfil: nombre impreso, verificación y 304
+    for user_id in ids:
+        certificados.invalidar_usuario(user_id)
+        sellos.tocar(user_id)
+    for codigo in codigos:
+        verificacion.invalidar(codigo)
+
+
+def importar(filas, tam_lote=TAM_LOTE, existentes='saltar', workers=1, credenciales=None):
+    """Valida y guarda las filas de `leer` por bloques; las filas con error se saltan y se reportan."""
+    resultado = Resultado(workers=workers)
+    vistos = set()
+    lote = []
+    cambio_de_cargo = False
+    inicio = time.perf_counter()
+    # 'spawn' como en certificados: cada proceso configura Django y no hereda la conexión
+    contexto = multiprocessing.get_context('spawn')
+    with (ProcessPoolExecutor(max_workers=workers, mp_context=contexto, initializer=django.setup)
+          if workers > 1 else nullcontext()) as pool:
+        for numero, fila in filas:
+            try:
+                user, perfil, contrasena = validar(fila)
+                if user.username in vistos:
+                    raise ErrorFila(f'{user.username!r} está repetido en el archivo')
+                vistos.add(user.username)
+                lote.append((numero, user, perfil, contrasena))
+            except ErrorFila as e:
+                resultado.error(numero, str(e))
+            if len(lote) >= tam_lote:
+                cambio_de_cargo |= _guardar_lote(lote, resultado, existentes, pool, workers, credenciales)
+                lote = []
+        if lote:
+            cambio_de_cargo |= _guardar_lote(lote, resultado, existentes, pool, workers, credenciales)
+    if cambio_de_cargo:
+        reportes.reconstruir()
+        clasificacion.invalidar_todas()
+    resultado.duracion = time.perf_counter() - inicio
+    return resultado
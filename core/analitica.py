@@ -0,0 +1,155 @@
+"""Historial de intentos y análisis de preguntas (dificultad y discriminación).
+
+Cada diagnóstico o examen enviado deja un Intento por módulo con las
+respuestas empaquetadas (una letra por pregunta) y, en la misma transacción,
+suma sus resultados a los contadores de EstadisticaPregunta con expresiones
+F(): el conteo lo hace la base de datos y dos envíos simultáneos no se pisan.
+
+Todos los contadores del envío se suman con un solo UPDATE: cada columna es
+un CASE que da a cada pregunta su incremento, así un envío cuesta las mismas
+sentencias sin importar cuántos módulos y preguntas tenga.
+
+Los reportes leen solo los contadores, nunca el historial:
+
+- dificultad: proporción de aciertos (p);
+- discriminación: correlación punto-biserial entre acertar la pregunta y el
+  puntaje total del intento, con las sumas de puntaje y de su cuadrado.
+"""
+import math
+from collections import Counter, defaultdict
+from types import SimpleNamespace
+
+from django.db import transaction
+from django.db.models import BigIntegerField, Case, F, Value, When
+
+from .models import EstadisticaPregunta, Intento
+
+OPCIONES = ('A', 'B', 'C', 'D')
+EN_BLANCO = '-'
+# Con menos intentos los índices no son confiables
+MIN_INTENTOS = 20
+CONTADORES = (
+    'mostrada', 'correctas', 'opcion_a', 'opcion_b', 'opcion_c', 'opcion_d', 'en_blanco',
+    'suma_puntaje', 'suma_puntaje_cuadrado', 'suma_puntaje_correctas',
+)
+
+
+def empaquetar(preguntas, respuestas):
+    """('12,13,14', 'AC-') a partir de las preguntas mostradas y el POST."""
+    letras = []
+    for pregunta in preguntas:
+        letra = (respuestas.get(f'pregunta_{pregunta.id}') or '').upper()
+        letras.append(letra if letra in OPCIONES else EN_BLANCO)
+    return ','.join(str(pregunta.id) for pregunta in preguntas), ''.join(letras)
+
+
+def desempaquetar(intento):
+    """[(pregunta_id, letra)] de un Intento guardado."""
+    if not intento.preguntas:
+        return []
+    return list(zip(map(int, intento.preguntas.split(',')), intento.respuestas))
+
+
+def registrar_intentos(user, tipo, intentos):
+    """Guarda los intentos y actualiza los contadores en la misma transacción.
+
+    `intentos` es una lista de (modulo_id, preguntas, respuestas, puntaje),
+    con las preguntas que se mostraron (PreguntaClave) y el POST recibido.
+    """
+    filas = []
+    incrementos = defaultdict(Counter)  # pregunta_id -> {contador: incremento}
+    for modulo_id, preguntas, respuestas, puntaje in intentos:
+        if not preguntas:
+            continue
+        ids, letras = empaquetar(preguntas, respuestas)
+        filas.append(Intento(user=user, modulo_id=modulo_id, tipo=tipo, puntaje=puntaje,
+                             preguntas=ids, respuestas=letras))
+        for pregunta, letra in zip(preguntas, letras):
+            incremento = incrementos[pregunta.id]
+            incremento['mostrada'] += 1
+            incremento[f'opcion_{letra.lower()}' if letra != EN_BLANCO else 'en_blanco'] += 1
+            incremento['suma_puntaje'] += puntaje
+            incremento['suma_puntaje_cuadrado'] += puntaje * puntaje
+            if letra == pregunta.respuesta_correcta.upper():
+                incremento['correctas'] += 1
+                incremento['suma_puntaje_correctas'] += puntaje
+    if not filas:
+        return
+
+    with transaction.atomic():
+        Intento.objects.bulk_create(filas)
+        EstadisticaPregunta.objects.bulk_create(
+            [EstadisticaPregunta(pregunta_id=pregunta_id) for pregunta_id in incrementos],
+            ignore_conflicts=True,
+        )
+        EstadisticaPregunta.objects.filter(pregunta_id__in=list(incrementos)).update(**_sumas(incrementos))
+
+
+def _sumas(incrementos):
+    """{contador: F(contador) + CASE ...} para un único UPDATE de todas las preguntas."""
+    cambios = {}
+    for contador in CONTADORES:
+        # Un WHEN por valor distinto, con todas las preguntas que suman ese valor
+        por_valor = defaultdict(list)
+        for pregunta_id, incremento in incrementos.items():
+            if incremento[contador]:
+                por_valor[incremento[contador]].append(pregunta_id)
+        if por_valor:
+            cambios[contador] = F(contador) + Case(
+                *[When(pregunta_id__in=ids, then=Value(valor)) for valor, ids in por_valor.items()],
+                default=Value(0), output_field=BigIntegerField(),
+            )
+    return cambios
+
+
+def dificultad(estadistica):
+    """Proporción de aciertos: 1 es muy fácil, 0 nadie la acierta."""
+    return estadistica.correctas / estadistica.mostrada if estadistica.mostrada else None
+
+
+def discriminacion(estadistica):
+    """Correlación punto-biserial entre acertar y el puntaje total (-1 a 1)."""
+    n, n1 = estadistica.mostrada, estadistica.correctas
+    if n == 0 or n1 in (0, n):
+        return None
+    media = estadistica.suma_puntaje / n
+    varianza = estadistica.suma_puntaje_cuadrado / n - media * media
+    if varianza <= 0:
+        return None
+    media_correctas = estadistica.suma_puntaje_correctas / n1
+    media_incorrectas = (estadistica.suma_puntaje - estadistica.suma_puntaje_correctas) / (n - n1)
+    p = n1 / n
+    return (media_correctas - media_incorrectas) / math.sqrt(varianza) * math.sqrt(p * (1 - p))
+
+
+def reporte(modulo_id=None, tipo=None):
+    """Filas del reporte de preguntas, de la más problemática a la menos.
+
+    Se marca para revisión la pregunta con suficientes intentos que casi nadie
+    acierta, que acierta casi todo el mundo o que discrimina al revés (la
+    aciertan más quienes peor puntaje sacaron).
+    """
+    estadisticas = EstadisticaPregunta.objects.select_related('pregunta__modulo').order_by('pregunta_id')
+    if modulo_id:
+        estadisticas = estadisticas.filter(pregunta__modulo_id=modulo_id)
+    if tipo:
+        estadisticas = estadisticas.filter(pregunta__tipo_pregunta=tipo)
+
+    filas = []
+    for estadistica in estadisticas:
+        p = dificultad(estadistica)
+        d = discriminacion(estadistica)
+        revisar = estadistica.mostrada >= MIN_INTENTOS and (
+            p is not None and (p < 0.2 or p > 0.95) or d is not None and d < 0.1
+        )
+        filas.append(SimpleNamespace(
+            pregunta=estadistica.pregunta,
+            mostrada=estadistica.mostrada,
+            dificultad=p,
+            discriminacion=d,
+            distribucion={letra: getattr(estadistica, f'opcion_{letra.lower()}') for letra in OPCIONES},
+            en_blanco=estadistica.en_blanco,
+            revisar=revisar,
+        ))
+    filas.sort(key=lambda fila: (not fila.revisar, fila.discriminacion if fila.discriminacion is not None else 1))
+    return filas
@@ -0,0 +1,233 @@
+"""Importación y exportación del banco de preguntas en CSV o JSON Lines.
+
+Las dos direcciones trabajan por flujo: la exportación recorre las preguntas
+con iterator(chunk_size=...) y produce una línea a la vez, y la importación lee
+fila por fila, valida cada una y escribe en bloques de `tam_lote` filas, cada
+bloque en su propia transacción (bulk_create para las nuevas y bulk_update
+para las que traen un id existente). Así la memoria no depende del tamaño del
+banco.
+
+El JSON es JSON Lines (un objeto por línea) para poder leerlo sin cargar el
+archivo entero. Las columnas son las de COLUMNAS; `modulo` se busca por id
+(`modulo_id`) o por nombre (`modulo`).
+
+bulk_create y bulk_update no envían señales: al confirmar cada bloque se
+invalida a mano la caché de claves (y con ella las hojas pre-renderizadas).
+"""
+import csv
+import io
+import json
+import time
+from dataclasses import dataclass, field
+
+from django.db import transaction
+
+from . import claves
+from .errores import ErrorFila
+from .models import Modulo, Pregunta
+
+COLUMNAS = ('id', 'modulo_id', 'modulo', 'tipo_pregunta', 'texto',
+            'opcion_a', 'opcion_b', 'opcion_c', 'opcion_d', 'respuesta_correcta')
+CAMPOS_EDITABLES = ('modulo_id', 'tipo_pregunta', 'texto', 'opcion_a', 'opcion_b', 'opcion_c', 'opcion_d',
+                    'respuesta_correcta')
+FORMATOS = ('csv', 'jsonl')
+TAM_LOTE = 1000
+# Errores que se guardan para mostrar; el resto solo se cuenta
+MAX_ERRORES = 100
+
+
+@dataclass
+class Resultado:
+    creadas: int = 0
+    actualizadas: int = 0
+    con_error: int = 0
+    errores: list = field(default_factory=list)  # [(número de línea, mensaje)]
+    duracion: float = 0.0
+
+    def error(self, numero, mensaje):
+        self.con_error += 1
+        if len(self.errores) < MAX_ERRORES:
+            self.errores.append((numero, mensaje))
+
+    @property
+    def procesadas(self):
+        return self.creadas + self.actualizadas + self.con_error
+
+    @property
+    def filas_por_segundo(self):
+        return self.procesadas / self.duracion if self.duracion > 0 else 0
+
+    def __str__(self):
+        return (f'{self.creadas} creadas, {self.actualizadas} actualizadas, {self.con_error} con error '
+                f'en {self.duracion:.2f} s ({self.filas_por_segundo:.0f} filas/s)')
+
+
+# --- EXPORTACIÓN ---
+
+def _fila(pregunta):
+    return {
+        'id': pregunta.id,
+        'modulo_id': pregunta.modulo_id,
+        'modulo': pregunta.modulo.nombre,
+        'tipo_pregunta': pregunta.tipo_pregunta,
+        'texto': pregunta.texto,
+        'opcion_a': pregunta.opcion_a,
+        'opcion_b': pregunta.opcion_b,
+        'opcion_c': pregunta.opcion_c,
+        'opcion_d': pregunta.opcion_d,
+        'respuesta_correcta': pregunta.respuesta_correcta,
+    }
+
+
+def exportar(preguntas, formato='csv', tam_lote=TAM_LOTE):
+    """Genera el archivo línea por línea (str) a partir de un queryset de Pregunta."""
+    filas = preguntas.select_related('modulo').order_by('id').iterator(chunk_size=tam_lote)
+    if formato == 'jsonl':
+        for pregunta in filas:
+            yield json.dumps(_fila(pregunta), ensure_ascii=False) + '\n'
+        return
+
+    buffer = io.StringIO()
+    escritor = csv.DictWriter(buffer, fieldnames=COLUMNAS)
+    escritor.writeheader()
+    for pregunta in filas:
+        escritor.writerow(_fila(pregunta))
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.getvalue():
+        yield buffer.getvalue()
+
+
+# --- IMPORTACIÓN ---
+
+def leer(archivo, formato='csv'):
+    """Genera (número de línea, dict) a partir de un archivo de texto abierto, sin leerlo entero.
+
+    Una línea JSON mal formada se entrega como None para que importar la cuente como error.
+    """
+    if formato == 'jsonl':
+        for numero, linea in enumerate(archivo, start=1):
+            if not linea.strip():
+                continue
+            try:
+                yield numero, json.loads(linea)
+            except ValueError:
+                yield numero, None
+    else:
+        lector = csv.DictReader(archivo)
+        for fila in lector:
+            yield lector.line_num, fila
+
+
+class _Modulos:
+    """Resuelve módulos por id o nombre, con una consulta por valor nuevo."""
+
+    def __init__(self):
+        self.por_id = {}
+        self.por_nombre = {}
+
+    def resolver(self, fila):
+        modulo_id = str(fila.get('modulo_id') or '').strip()
+        if modulo_id:
+            if not modulo_id.isdigit():
+                raise ErrorFila(f'modulo_id inválido: {modulo_id!r}')
+            if modulo_id not in self.por_id:
+                self.por_id[modulo_id] = Modulo.objects.filter(id=modulo_id).values_list('id', flat=True).first()
+            resultado = self.por_id[modulo_id]
+        else:
+            nombre = str(fila.get('modulo') or '').strip()
+            if not nombre:
+                raise ErrorFila('falta modulo_id o modulo')
+            if nombre not in self.por_nombre:
+                self.por_nombre[nombre] = Modulo.objects.filter(nombre=nombre).values_list('id', flat=True).first()
+            resultado = self.por_nombre[nombre]
+        if resultado is None:
+            raise ErrorFila(f"el módulo {modulo_id or fila.get('modulo')!r} no existe")
+        return resultado
+
+
+def validar(fila, modulos, usar_ids=True):
+    """Convierte una fila en Pregunta sin guardarla; lanza ErrorFila si no es válida."""
+    def texto(campo, maximo=None, obligatorio=True):
+        valor = str(fila.get(campo) or '').strip()
+        if obligatorio and not valor:
+            raise ErrorFila(f'falta {campo}')
+        if maximo and len(valor) > maximo:
+            raise ErrorFila(f'{campo} supera {maximo} caracteres')
+        return valor
+
+    respuesta = texto('respuesta_correcta').upper()
+    if respuesta not in ('A', 'B', 'C', 'D'):
+        raise ErrorFila(f'respuesta_correcta debe ser A, B, C o D (no {respuesta!r})')
+    tipo = texto('tipo_pregunta', obligatorio=False).upper() or 'D'
+    if tipo not in dict(Pregunta.TIPO_CHOICES):
+        raise ErrorFila(f'tipo_pregunta debe ser D o E (no {tipo!r})')
+
+    pregunta_id = None
+    if usar_ids:
+        valor = str(fila.get('id') or '').strip()
+        if valor:
+            if not valor.isdigit():
+                raise ErrorFila(f'id inválido: {valor!r}')
+            pregunta_id = int(valor)
+
+    return Pregunta(
+        id=pregunta_id,
+        modulo_id=modulos.resolver(fila),
+        tipo_pregunta=tipo,
+        texto=texto('texto'),
+        opcion_a=texto('opcion_a', 200),
+        opcion_b=texto('opcion_b', 200),
+        opcion_c=texto('opcion_c', 200),
+        opcion_d=texto('opcion_d', 200),
+        respuesta_correcta=respuesta,
+    )
+
+
+def _guardar_lote(lote, resultado):
+    """Crea o actualiza un bloque de (número, Pregunta) en una transacción."""
+    ids = [pregunta.id for _, pregunta in lote if pregunta.id is not None]
+    existentes = set(Pregunta.objects.filter(id__in=ids).values_list('id', flat=True)) if ids else set()
+    nuevas, cambiadas = [], []
+    for numero, pregunta in lote:
+        if pregunta.id is None:
+            nuevas.append(pregunta)
+        elif pregunta.id in existentes:
+            cambiadas.append(pregunta)
+        else:
+            resultado.error(numero, f'la pregunta {pregunta.id} no existe (deja el id vacío para crearla)')
+
+    with transaction.atomic():
+        Pregunta.objects.bulk_create(nuevas)
+        Pregunta.objects.bulk_update(cambiadas, CAMPOS_EDITABLES)
+        transaction.on_commit(claves.invalidar)
+    resultado.creadas += len(nuevas)
+    resultado.actualizadas += len(cambiadas)
+
+
+def importar(filas, tam_lote=TAM_LOTE, usar_ids=True):
+    """Valida y guarda las filas de `leer` por bloques. Las filas con error se saltan y se reportan.
+
+    Con `usar_ids=False` se ignora la columna id y todo se crea como nuevo
+    (útil para copiar un banco exportado de otra base).
+    """
+    resultado = Resultado()
+    modulos = _Modulos()
+    lote = []
+    inicio = time.perf_counter()
+    for numero, fila in filas:
+        try:
+            lote.append((numero, validar(fila, modulos, usar_ids)))
+        except ErrorFila as e:
+            resultado.error(numero, str(e))
+        except AttributeError:
+            # No es un objeto (p. ej. una línea JSON inválida o una lista)
+            resultado.error(numero, 'fila mal formada')
+        if len(lote) >= tam_lote:
+            _guardar_lote(lote, resultado)
+            lote = []
+    if lote:
+        _guardar_lote(lote, resultado)
+    resultado.duracion = time.perf_counter() - inicio
+    return resultado
@@ -0,0 +1,175 @@
+import random
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.db import transaction
+from .models import Modulo, Progreso
+from . import clasificacion, reportes, resumen, sellos, trabajos, verificacion
+from .analitica import registrar_intentos
+from .claves import claves
+
+# Umbral del 50% para detectar brechas en el diagnóstico
+UMBRAL_BRECHA = 50
+# Preguntas sorteadas para cada intento de examen
+PREGUNTAS_EXAMEN = 10
+
+
+def preguntas_diagnostico():
+    """Devuelve {modulo: [preguntas]} con todas las preguntas de diagnóstico.
+
+    Las preguntas salen de la caché de claves; con la caché fría se cargan
+    todas en una sola consulta. Los módulos sin preguntas aparecen vacíos.
+    """
+    modulos = list(Modulo.objects.all())
+    por_modulo = claves.obtener_varios('D', [modulo.id for modulo in modulos])
+    return {modulo: por_modulo[modulo.id] for modulo in modulos}
+
+
+async def apreguntas_diagnostico():
+    modulos = [modulo async for modulo in Modulo.objects.all()]
+    por_modulo = await claves.aobtener_varios('D', [modulo.id for modulo in modulos])
+    return {modulo: por_modulo[modulo.id] for modulo in modulos}
+
+
+# Avisos del examen: el POST llegó sin sorteo en la sesión, o el banco está vacío
+EXAMEN_EXPIRADO = ("Tu examen expiró antes de enviarse y no se calificó; se sorteó uno nuevo. "
+                   "Vuelve a responderlo.")
+EXAMEN_SIN_PREGUNTAS = "Este módulo todavía no tiene preguntas de examen."
+
+
+def clave_examen(modulo_id):
+    """Clave de sesión con los ids sorteados para el intento en curso del módulo."""
+    return f'examen_{modulo_id}'
+
+
+def sortear(ids, k=PREGUNTAS_EXAMEN):
+    # random.sample sobre la tupla ya en memoria cuesta O(k), no O(tamaño del banco)
+    return random.sample(ids, min(k, len(ids)))
+
+
+def sortear_examen(modulo_id):
+    return sortear(claves.ids(modulo_id, 'E'))
+
+
+async def asortear_examen(modulo_id):
+    return sortear(await claves.aids(modulo_id, 'E'))
+
+
+def es_correcta(respuesta, correcta):
+    return bool(respuesta) and respuesta.upper() == correcta.upper()
+
+
+def contar_aciertos(preguntas, respuestas):
+    return sum(
+        1 for pregunta in preguntas
+        if es_correcta(respuestas.get(f'pregunta_{pregunta.id}'), pregunta.respuesta_correcta)
+    )
+
+
+def calificar(preguntas_por_modulo, respuestas):
+    """Califica en memoria. Devuelve ({modulo_id: puntaje}, [modulos con brecha])."""
+    puntajes = {}
+    brechas = []
+    for modulo, preguntas in preguntas_por_modulo.items():
+        puntaje = contar_aciertos(preguntas, respuestas)
+        total_preguntas = len(preguntas)
+        porcentaje = (puntaje / total_preguntas) * 100 if total_preguntas > 0 else 0
+        if porcentaje < UMBRAL_BRECHA:
+            brechas.append(modulo)
+        puntajes[modulo.id] = puntaje
+    return puntajes, brechas
+
+
+def obtener_progreso(user, modulo):
+    """Progreso del usuario en el módulo, creándolo si no existe.
+
+    Gracias a la restricción única (user, modulo), si dos peticiones lo crean a
+    la vez la segunda recibe IntegrityError y get_or_create relee la fila.
+    """
+    progreso, _ = Progreso.objects.get_or_create(user=user, modulo=modulo)
+    return progreso
+
+
+async def aobtener_progreso(user, modulo):
+    progreso, _ = await Progreso.objects.aget_or_create(user=user, modulo=modulo)
+    return progreso
+
+
+def guardar_progresos(user, valores, campos=('puntaje',)):
+    """Inserta o actualiza varios Progreso del usuario en una sola sentencia.
+
+    `valores` es {modulo_id: {campo: valor}}. Se traduce a un
+    INSERT ... ON CONFLICT (user, modulo) DO UPDATE, atómico en la base de
+    datos: no hay ventana entre leer y escribir en la que aparezcan duplicados.
+    """
+    if not valores:
+        return
+    with transaction.atomic():
+        # Se bloquea la fila del usuario: dos envíos simultáneos del mismo
+        # usuario se serializan y el segundo ve las filas que insertó el primero
+        # (sin el bloqueo los dos leerían "sin fila" y contarían dos veces al
+        # usuario en ResumenCargo). De paso se lee su cargo.
+        cargo = (
+            User.objects.select_for_update(of=('self',)).filter(pk=user.pk)
+            .values_list('perfil__cargo', flat=True).first()
+        ) or reportes.SIN_PERFIL
+        # Valores previos de las filas (bloqueadas), para llevar los totales por cargo
+        anteriores = {
+            modulo_id: (completado, puntaje)
+            for modulo_id, completado, puntaje in Progreso.objects.select_for_update()
+            .filter(user=user, modulo_id__in=list(valores)).values_list('modulo_id', 'completado', 'puntaje')
+        }
+        Progreso.objects.bulk_create(
+            [Progreso(user=user, modulo_id=modulo_id, **datos) for modulo_id, datos in valores.items()],
+            update_conflicts=True,
+            unique_fields=['user', 'modulo'],
+            update_fields=list(campos),
+        )
+        # bulk_create no envía señales: reportes, clasificaciones, resumen y sello del usuario se actualizan a mano
+        reportes.registrar_upsert(user.id, anteriores, valores, cargo)
+        transaction.on_commit(lambda: clasificacion.registrar_upsert(user.id, anteriores, valores))
+        transaction.on_commit(lambda: resumen.invalidar(user.id))
+        transaction.on_commit(lambda: sellos.tocar(user.id))
+
+
+def guardar_puntajes(user, puntajes):
+    """Escribe el puntaje de cada módulo en Progreso con un único upsert."""
+    guardar_progresos(user, {modulo_id: {'puntaje': puntaje} for modulo_id, puntaje in puntajes.items()})
+
+
+def guardar_diagnostico(user, preguntas_por_modulo, respuestas, puntajes):
+    """Puntajes en Progreso e intentos con sus estadísticas, en una transacción."""
+    with transaction.atomic():
+        guardar_puntajes(user, puntajes)
+        registrar_intentos(user, 'D', [
+            (modulo.id, preguntas, respuestas, puntajes[modulo.id])
+            for modulo, preguntas in preguntas_por_modulo.items()
+        ])
+
+
+def guardar_examen(user, modulo_id, preguntas, respuestas, puntaje, completado):
+    with transaction.atomic():
+        guardar_progresos(user, {modulo_id: {'puntaje': puntaje, 'completado': completado}},
+                          campos=('puntaje', 'completado'))
+        registrar_intentos(user, 'E', [(modulo_id, preguntas, respuestas, puntaje)])
+        if completado:
+            verificacion.emitir(user, modulo_id)
+            # El worker lo dibuja antes de que lo pidan (ver core/trabajos.py)
+            trabajos.encolar(user.id, modulo_id)
+
+
+def procesar_diagnostico(user, respuestas, preguntas_por_modulo=None):
+    """Califica el diagnóstico enviado y guarda los puntajes. Devuelve las brechas."""
+    if preguntas_por_modulo is None:
+        preguntas_por_modulo = preguntas_diagnostico()
+    puntajes, brechas = calificar(preguntas_por_modulo, respuestas)
+    guardar_diagnostico(user, preguntas_por_modulo, respuestas, puntajes)
+    return brechas
+
+
+async def aprocesar_diagnostico(user, respuestas):
+    # La lectura es async; la escritura va en una transacción, que solo existe en síncrono
+    preguntas_por_modulo = await apreguntas_diagnostico()
+    puntajes, brechas = calificar(preguntas_por_modulo, respuestas)
+    await sync_to_async(guardar_diagnostico)(user, preguntas_por_modulo, respuestas, puntajes)
+    return brechas
@@ -0,0 +1,267 @@
+"""Datos, caché en disco y generación en lote de los certificados PDF.
+
+El diseño y el dibujo con ReportLab están en plantilla_certificado, que se
+importa recién al dibujar el primer PDF (ver renderizar_pdf): las vistas,
+los comandos y los workers que no dibujan certificados no cargan ReportLab.
+
+Los PDF terminados se guardan en CERTIFICADOS_CACHE_DIR con un nombre que es
+el hash de su contenido variable, así las descargas repetidas se sirven
+directamente desde disco.
+
+Para lotes grandes (todos los certificados de un cargo o de un módulo) los PDF
+se renderizan en un pool de procesos y se escriben en un ZIP a medida que
+salen, sin acumularlos en memoria.
+
+Las vistas ASGI usan `aobtener_pdf`: si el PDF no está en disco se dibuja en un
+pool de CERTIFICADOS_ASYNC_WORKERS procesos, así una ráfaga de descargas no
+bloquea el event loop; las peticiones que exceden el pool esperan en su cola.
+"""
+import asyncio
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+import threading
+import zipfile
+from pathlib import Path
+
+import django
+from django.conf import settings
+
+from .models import Progreso
+from .metricas import medir
+from . import verificacion
+
+# Cambiar este número cuando se modifique el diseño: invalida todo el caché
+VERSION_PLANTILLA = 1
+
+MESES_ES = {
+    'January': 'enero', 'February': 'febrero', 'March': 'marzo',
+    'April': 'abril', 'May': 'mayo', 'June': 'junio',
+    'July': 'julio', 'August': 'agosto', 'September': 'septiembre',
+    'October': 'octubre', 'November': 'noviembre', 'December': 'diciembre'
+}
+
+
+def datos_certificado(user, modulo):
+    """Textos variables del certificado de `user` para `modulo`."""
+    try:
+        perfil = user.perfil
+        nombre_completo = f"{perfil.nombre.upper()} {perfil.apellido.upper()}"
+    except Exception:
+        nombre_completo = user.get_full_name().upper() or user.username.upper()
+
+    fecha_emision = user.date_joined
+    mes_es = MESES_ES.get(fecha_emision.strftime('%B'), fecha_emision.strftime('%B'))
+    fecha_formateada = f"{fecha_emision.strftime('%d')} de {mes_es} de {fecha_emision.strftime('%Y')}"
+
+    return {
+        'user_id': user.id,
+        'modulo_id': modulo.id,
+        'nombre_completo': nombre_completo,
+        'modulo': modulo.nombre.upper(),
+        'fecha': fecha_formateada,
+        'codigo': verificacion.codigo(user.id, modulo.id, fecha_emision),
+    }
+
+
+def renderizar_pdf(datos):
+    """Devuelve los bytes del PDF; ReportLab se importa con el primer certificado."""
+    from . import plantilla_certificado
+    with medir('pdf'):
+        return plantilla_certificado.renderizar(datos)
+
+
+# --- CACHÉ EN DISCO ---
+
+def directorio_cache():
+    base = getattr(settings, 'CERTIFICADOS_CACHE_DIR', Path(settings.BASE_DIR) / 'cache' / 'certificados')
+    return Path(base) / f'v{VERSION_PLANTILLA}'
+
+
+def clave_cache(datos):
+    contenido = '\x1f'.join(str(datos[c]) for c in ('user_id', 'modulo_id', 'nombre_completo', 'modulo', 'fecha', 'codigo'))
+    return hashlib.sha256(f'{VERSION_PLANTILLA}\x1f{contenido}'.encode()).hexdigest()
+
+
+def ruta_cache(datos):
+    return directorio_cache() / str(datos['user_id']) / f'{clave_cache(datos)}.pdf'
+
+
+def obtener_pdf(user, modulo):
+    """Ruta del PDF en caché, renderizándolo solo si todavía no existe."""
+    datos = datos_certificado(user, modulo)
+    ruta = ruta_cache(datos)
+    if not ruta.exists():
+        guardar_atomico(ruta, renderizar_pdf(datos))
+    return ruta
+
+
+def guardar_atomico(ruta, contenido):
+    # Se escribe en un temporal del mismo directorio y se renombra, así una
+    # descarga concurrente nunca ve un PDF a medio escribir.
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    fd, temporal = tempfile.mkstemp(dir=ruta.parent, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(contenido)
+        os.replace(temporal, ruta)
+    except BaseException:
+        os.unlink(temporal)
+        raise
+
+
+def invalidar_usuario(user_id):
+    """Borra los certificados en caché de un usuario (p. ej. al cambiar su Perfil)."""
+    shutil.rmtree(directorio_cache() / str(user_id), ignore_errors=True)
+
+
+# --- RENDER FUERA DEL EVENT LOOP (vistas ASGI) ---
+
+def _nuevo_pool(workers):
+    # 'spawn' evita heredar conexiones a la base y locks del proceso padre;
+    # cada proceso nuevo configura Django antes de recibir trabajo. Se importa
+    # aquí: multiprocessing y el executor solo hacen falta al crear un pool.
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+    contexto = multiprocessing.get_context('spawn')
+    return ProcessPoolExecutor(max_workers=workers, mp_context=contexto, initializer=django.setup)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _pool_pdf():
+    """Pool de procesos compartido por las descargas async; se crea al primer uso."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = _nuevo_pool(getattr(settings, 'CERTIFICADOS_ASYNC_WORKERS', 2))
+        return _pool
+
+
+def _renderizar_y_guardar(datos, ruta):
+    # Se ejecuta en el pool: dibuja, deja el PDF en la caché y devuelve los bytes
+    contenido = renderizar_pdf(datos)
+    guardar_atomico(Path(ruta), contenido)
+    return contenido
+
+
+async def aobtener_pdf(datos):
+    """Bytes del PDF de `datos` (ver datos_certificado) sin bloquear el event loop."""
+    ruta = ruta_cache(datos)
+    try:
+        return await asyncio.to_thread(ruta.read_bytes)
+    except FileNotFoundError:
+        pass
+    with medir('pdf'):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_pool_pdf(), _renderizar_y_guardar, datos, str(ruta))
+
+
+# --- GENERACIÓN EN LOTE ---
+
+def progresos_completados(cargo=None, modulo_id=None):
+    """Progresos aprobados con todo lo necesario para el certificado en una consulta."""
+    progresos = (
+        Progreso.objects.filter(completado=True)
+        .select_related('user__perfil', 'modulo')
+        .order_by('id')
+    )
+    if cargo:
+        progresos = progresos.filter(user__perfil__cargo=cargo)
+    if modulo_id:
+        progresos = progresos.filter(modulo_id=modulo_id)
+    return progresos
+
+
+def nombre_archivo(progreso):
+    try:
+        carpeta = progreso.user.perfil.cargo
+    except Exception:
+        carpeta = 'SIN CARGO'
+    return f"{carpeta}/certificado_{progreso.modulo.nombre}_{progreso.user.username}.pdf"
+
+
+def _pdf_para(tarea):
+    # Se ejecuta en los procesos del pool: no toca la base de datos ni settings
+    datos, ruta = tarea
+    try:
+        with open(ruta, 'rb') as f:
+            return f.read()
+    except FileNotFoundError:
+        return renderizar_pdf(datos)
+
+
+def pdfs_en_lotes(progresos, workers=1, tam_lote=100):
+    """Genera (nombre_archivo, bytes_pdf) en el orden de `progresos`.
+
+    Los progresos se leen de la base en bloques de `tam_lote` y cada bloque se
+    reparte entre `workers` procesos; nunca hay más de un bloque en memoria.
+    Si el PDF ya está en la caché en disco se reutiliza.
+    """
+    def bloques():
+        bloque = []
+        for progreso in progresos.iterator(chunk_size=tam_lote):
+            datos = datos_certificado(progreso.user, progreso.modulo)
+            bloque.append((nombre_archivo(progreso), (datos, str(ruta_cache(datos)))))
+            if len(bloque) >= tam_lote:
+                yield bloque
+                bloque = []
+        if bloque:
+            yield bloque
+
+    if workers <= 1:
+        for bloque in bloques():
+            for nombre, tarea in bloque:
+                yield nombre, _pdf_para(tarea)
+        return
+
+    with _nuevo_pool(workers) as pool:
+        for bloque in bloques():
+            nombres = [nombre for nombre, _ in bloque]
+            tareas = [tarea for _, tarea in bloque]
+            chunksize = max(1, len(tareas) // (workers * 4))
+            yield from zip(nombres, pool.map(_pdf_para, tareas, chunksize=chunksize))
+
+
+class _SalidaStreaming(io.RawIOBase):
+    """Archivo de solo escritura y sin seek: zipfile escribe y nosotros vaciamos."""
+
+    def __init__(self):
+        self._partes = []
+
+    def writable(self):
+        return True
+
+    def write(self, datos):
+        self._partes.append(bytes(datos))
+        return len(datos)
+
+    def vaciar(self):
+        datos = b''.join(self._partes)
+        self._partes.clear()
+        return datos
+
+
+def escribir_zip(archivos, salida):
+    """Escribe los (nombre, bytes) en el ZIP `salida` y devuelve cuántos fueron."""
+    total = 0
+    # Los PDF ya vienen comprimidos: se guardan sin volver a comprimir
+    with zipfile.ZipFile(salida, 'w', zipfile.ZIP_STORED) as zf:
+        for nombre, contenido in archivos:
+            zf.writestr(nombre, contenido)
+            total += 1
+    return total
+
+
+def zip_en_streaming(archivos):
+    """Igual que escribir_zip pero va entregando los bytes del ZIP por partes."""
+    salida = _SalidaStreaming()
+    with zipfile.ZipFile(salida, 'w', zipfile.ZIP_STORED) as zf:
+        for nombre, contenido in archivos:
+            zf.writestr(nombre, contenido)
+            yield salida.vaciar()
+    yield salida.vaciar()
@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.checks import Warning, register
+
+CACHES_LOCALES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register(deploy=True)
+def cache_compartida(app_configs, **kwargs):
+    # Las invalidaciones de resumen, sellos, claves y clasificaciones viajan por
+    # la caché: con una caché por proceso los demás workers no se enteran
+    if settings.CACHES['default']['BACKEND'] in CACHES_LOCALES:
+        return [Warning(
+            'La caché por defecto es local al proceso: con varios workers se sirven '
+            'resúmenes, ETag y clasificaciones desactualizados.',
+            hint='Configura ANSSD_REDIS_URL o ANSSD_MEMCACHED.',
+            id='core.W001',
+        )]
+    return []
@@ -0,0 +1,339 @@
+"""Clasificaciones (tablas de posiciones) por módulo y por cargo.
+
+Por módulo se ordena Progreso.puntaje; por cargo, la suma de los puntajes de
+cada usuario. Cada clasificación es un dict user_id -> puntaje más una
+SortedList (sortedcontainers) de (-puntaje, user_id): la posición de un
+usuario sale de una bisección, O(log n), y una página del top de un corte.
+
+En la caché de Django hay, por clasificación, una foto completa y un registro
+corto de los cambios posteriores, ambos marcados con el sello de la foto. La
+foto va compacta (dos arrays de enteros comprimidos con zlib) y partida en
+trozos de TAM_TROZO bytes, por debajo del límite de 1 MB por valor de
+memcached; si aun así la caché rechaza alguno, se cuenta en
+clasificacion_foto_fallida. Cada
+proceso guarda su copia en memoria y en cada lectura trae solo el registro y
+aplica las entradas que le faltan; la foto entera viaja solo cuando cambia el
+sello. Ordenar todo Progreso ocurre una vez por foto, no en cada visita.
+
+Al confirmarse un cambio de Progreso.puntaje (señales y guardar_progresos) se
+agrega una entrada al registro, con un candado en la caché; cada COMPACTAR
+entradas se escribe una foto nueva. Si la clasificación no está en la caché no
+se hace nada: la próxima lectura la arma desde la base. Los cambios se
+aplican en la misma petición que los confirma, así que la espera es corta:
+quien escribe reintenta el candado hasta ESPERA_REGISTRO segundos (agregar
+una entrada lo retiene apenas dos viajes a la caché) y solo si no lo consigue
+descarta el registro; quien lee no espera y, si otro está armando la
+clasificación, la arma sin guardarla.
+
+En las claves el cargo va como hash: trae espacios y tildes, que memcached no
+acepta.
+
+Un cambio de cargo descarta las dos clasificaciones de cargo afectadas, y las
+cargas masivas (sembrar_datos, importar_usuarios) todas. Como en claves.py,
+entre varios workers la caché de Django debe ser compartida.
+"""
+import hashlib
+import math
+import threading
+import time
+import uuid
+import zlib
+from array import array
+from collections import namedtuple
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Sum
+from sortedcontainers import SortedList
+
+from . import reportes
+from .metricas import contar
+from .models import CARGO_CHOICES, Modulo, Progreso
+
+MODULO = 'modulo'
+CARGO = 'cargo'
+DURACION = getattr(settings, 'CLASIFICACION_CACHE_SEGUNDOS', 60 * 60 * 24)
+POR_PAGINA = getattr(settings, 'CLASIFICACION_POR_PAGINA', 25)
+# Entradas del registro antes de escribir una foto nueva
+COMPACTAR = 200
+# Bytes por trozo de la foto: memcached no guarda valores de más de 1 MB
+TAM_TROZO = 512 * 1024
+VIDA_CANDADO = 30
+# Segundos que quien escribe reintenta el candado antes de descartar el registro
+ESPERA_REGISTRO = 0.25
+PAUSA_CANDADO = 0.005
+
+Tabla = namedtuple('Tabla', 'filas participantes paginas pagina puesto puntaje')
+
+
+class Clasificacion:
+    """Puntajes de una clasificación, ordenados de mayor a menor."""
+
+    def __init__(self, puntajes=()):
+        self.puntajes = dict(puntajes)
+        self.orden = SortedList((-puntaje, user_id) for user_id, puntaje in self.puntajes.items())
+
+    def __len__(self):
+        return len(self.puntajes)
+
+    # En la caché viaja solo la lista ya ordenada, como dos arrays de enteros
+    # comprimidos: rearmar la SortedList es lineal
+    def a_bytes(self):
+        negativos = array('q', (negativo for negativo, _ in self.orden))
+        user_ids = array('q', (user_id for _, user_id in self.orden))
+        return zlib.compress(negativos.tobytes() + user_ids.tobytes())
+
+    @classmethod
+    def de_bytes(cls, datos):
+        clasificacion = cls.__new__(cls)
+        clasificacion.__setstate__(datos)
+        return clasificacion
+
+    def __getstate__(self):
+        return self.a_bytes()
+
+    def __setstate__(self, datos):
+        valores = array('q')
+        valores.frombytes(zlib.decompress(datos))
+        mitad = len(valores) // 2
+        orden = list(zip(valores[:mitad], valores[mitad:]))
+        self.orden = SortedList(orden)
+        self.puntajes = {user_id: -negativo for negativo, user_id in orden}
+
+    def poner(self, user_id, puntaje):
+        """Cambia el puntaje del usuario; None lo saca de la clasificación."""
+        anterior = self.puntajes.pop(user_id, None)
+        if anterior is not None:
+            self.orden.remove((-anterior, user_id))
+        if puntaje is not None:
+            self.puntajes[user_id] = puntaje
+            self.orden.add((-puntaje, user_id))
+
+    def aplicar(self, entrada):
+        user_id, valor, es_suma = entrada
+        if es_suma:
+            valor += self.puntajes.get(user_id, 0)
+        self.poner(user_id, valor)
+
+    def _puesto(self, puntaje):
+        # Los empatados comparten puesto: 1 + cuántos tienen más puntaje
+        return self.orden.bisect_left((-puntaje, -math.inf)) + 1
+
+    def posicion(self, user_id):
+        """(puesto, puntaje) del usuario, o (None, None) si no participa."""
+        puntaje = self.puntajes.get(user_id)
+        if puntaje is None:
+            return None, None
+        return self._puesto(puntaje), puntaje
+
+    def pagina(self, numero, por_pagina=POR_PAGINA):
+        """[(puesto, user_id, puntaje)] de la página `numero` (desde 1)."""
+        inicio = (numero - 1) * por_pagina
+        return [
+            (self._puesto(-negativo), user_id, -negativo)
+            for negativo, user_id in self.orden[inicio:inicio + por_pagina]
+        ]
+
+
+# --- CACHÉ ---
+
+# Copia de cada proceso: clave -> [sello, entradas aplicadas, Clasificacion].
+# _lock protege _locales y las copias; nunca se retiene durante E/S
+_locales = {}
+_lock = threading.Lock()
+
+
+def _clave(tipo, valor):
+    return f"core:clasificacion:{tipo}:{hashlib.md5(str(valor).encode()).hexdigest()}"
+
+
+def _clave_registro(clave):
+    return f'{clave}:registro'
+
+
+def _clave_trozo(clave, numero):
+    return f'{clave}:trozo:{numero}'
+
+
+@contextmanager
+def _candado(clave, espera=0):
+    """Candado entre procesos con cache.add; da False si otro lo tiene después de `espera` segundos."""
+    nombre = f'{clave}:candado'
+    limite = time.monotonic() + espera
+    while not cache.add(nombre, 1, VIDA_CANDADO):
+        if time.monotonic() >= limite:
+            yield False
+            return
+        time.sleep(PAUSA_CANDADO)
+    try:
+        yield True
+    finally:
+        cache.delete(nombre)
+
+
+@contextmanager
+def _sin_candado():
+    yield True
+
+
+def construir(tipo, valor):
+    """Clasificación armada desde la base, con una consulta."""
+    if tipo == MODULO:
+        filas = Progreso.objects.filter(modulo_id=valor).values_list('user_id', 'puntaje')
+    else:
+        filas = (
+            Progreso.objects.filter(user__perfil__cargo=valor)
+            .values('user_id').annotate(total=Sum('puntaje')).values_list('user_id', 'total').order_by()
+        )
+    return Clasificacion(filas)
+
+
+def _guardar(clave, clasificacion, nuevas=()):
+    """Escribe una foto nueva de `clasificacion`, con `nuevas` aplicadas, y la deja como copia local."""
+    sello = uuid.uuid4().hex
+    with _lock:
+        for entrada in nuevas:
+            clasificacion.aplicar(entrada)
+        datos = clasificacion.a_bytes()
+    trozos = [datos[inicio:inicio + TAM_TROZO] for inicio in range(0, len(datos), TAM_TROZO)]
+    valores = {_clave_trozo(clave, numero): (sello, trozo) for numero, trozo in enumerate(trozos)}
+    valores[clave] = (sello, len(trozos))
+    valores[_clave_registro(clave)] = (sello, [])
+    if cache.set_many(valores, DURACION):
+        # Sin la foto completa el registro no sirve: la próxima lectura la vuelve a armar
+        contar('clasificacion_foto_fallida')
+        cache.delete(_clave_registro(clave))
+    with _lock:
+        _locales[clave] = [sello, 0, clasificacion]
+
+
+def _leer_foto(clave, sello):
+    """La Clasificacion de la foto con ese sello, o None si falta algún trozo."""
+    cabecera = cache.get(clave)
+    if cabecera is None or cabecera[0] != sello:
+        return None
+    claves = [_clave_trozo(clave, numero) for numero in range(cabecera[1])]
+    trozos = cache.get_many(claves)
+    if any(trozos.get(clave_trozo, (None,))[0] != sello for clave_trozo in claves):
+        return None
+    return Clasificacion.de_bytes(b''.join(trozos[clave_trozo][1] for clave_trozo in claves))
+
+
+def _al_dia(tipo, valor, con_candado=True):
+    """La copia local puesta al día con la caché, o armada desde la base.
+
+    Devuelve (Clasificacion, si se armó desde la base). La caché y la base se
+    consultan sin _lock, que solo se toma para cambiar _locales y aplicar el
+    registro: armar una clasificación no frena las consultas de las demás.
+    """
+    clave = _clave(tipo, valor)
+    registro = cache.get(_clave_registro(clave))
+    if registro is not None:
+        sello, entradas = registro
+        local = _locales.get(clave)
+        if local is None or local[0] != sello:
+            foto = _leer_foto(clave, sello)
+            with _lock:
+                local = _locales.get(clave)
+                # Otro hilo pudo haberla traído mientras tanto
+                if (local is None or local[0] != sello) and foto is not None:
+                    local = _locales[clave] = [sello, 0, foto]
+        if local is not None and local[0] == sello:
+            with _lock:
+                for entrada in entradas[local[1]:]:
+                    local[2].aplicar(entrada)
+                local[1] = max(local[1], len(entradas))
+            contar('clasificacion_cache_hit')
+            return local[2], False
+
+    contar('clasificacion_cache_miss')
+    with (_candado(clave) if con_candado else _sin_candado()) as propio:
+        clasificacion = construir(tipo, valor)
+        if propio:
+            _guardar(clave, clasificacion)
+        else:
+            # Sin sello en la caché: la próxima lectura la vuelve a armar
+            with _lock:
+                _locales.pop(clave, None)
+    return clasificacion, True
+
+
+def _registrar(tipo, valor, nuevas):
+    """Agrega entradas (user_id, valor, es_suma) al registro de la clasificación, si está en la caché."""
+    clave = _clave(tipo, valor)
+    with _candado(clave, ESPERA_REGISTRO) as propio:
+        if not propio:
+            cache.delete(_clave_registro(clave))
+            return
+        registro = cache.get(_clave_registro(clave))
+        if registro is None:
+            return
+        sello, entradas = registro
+        if len(entradas) + len(nuevas) < COMPACTAR:
+            cache.set(_clave_registro(clave), (sello, entradas + nuevas), DURACION)
+            return
+        clasificacion, desde_base = _al_dia(tipo, valor, con_candado=False)
+        if not desde_base:  # armada desde la base ya trae los cambios confirmados
+            _guardar(clave, clasificacion, nuevas)
+
+
+def consultar(tipo, valor, user_id, pagina=1, por_pagina=POR_PAGINA):
+    """Tabla con la página pedida del top y el puesto del usuario."""
+    clasificacion, _ = _al_dia(tipo, valor)
+    with _lock:
+        participantes = len(clasificacion)
+        paginas = max(1, math.ceil(participantes / por_pagina))
+        pagina = min(max(1, pagina), paginas)
+        puesto, puntaje = clasificacion.posicion(user_id)
+        return Tabla(clasificacion.pagina(pagina, por_pagina), participantes, paginas, pagina, puesto, puntaje)
+
+
+# --- CAMBIOS (al confirmar la transacción) ---
+
+def _aplicar_cambios(user_id, cambios):
+    """`cambios` es [(modulo_id, puntaje anterior o None, puntaje actual o None)]."""
+    suma = 0
+    for modulo_id, antes, ahora in cambios:
+        if antes != ahora:
+            _registrar(MODULO, modulo_id, [(user_id, ahora, False)])
+        suma += (ahora or 0) - (antes or 0)
+    if suma or any(antes is None for _, antes, _ in cambios):
+        _registrar(CARGO, reportes.cargo_de(user_id), [(user_id, suma, True)])
+
+
+def progreso_cambiado(user_id, modulo_id, anterior, actual):
+    """Como reportes.progreso_cambiado: estados (completado, puntaje), None si la fila no existe."""
+    _aplicar_cambios(user_id, [(modulo_id, anterior and anterior[1], actual and actual[1])])
+
+
+def registrar_upsert(user_id, anteriores, valores):
+    """Como reportes.registrar_upsert, para lo que escribe guardar_progresos."""
+    cambios = []
+    for modulo_id, datos in valores.items():
+        anterior = anteriores.get(modulo_id)
+        antes = anterior[1] if anterior else None
+        cambios.append((modulo_id, antes, datos.get('puntaje', antes or 0)))
+    _aplicar_cambios(user_id, cambios)
+
+
+def invalidar(tipo, valor):
+    cache.delete(_clave_registro(_clave(tipo, valor)))
+
+
+def mover_usuario(user_id, cargo_anterior, cargo_nuevo):
+    if cargo_anterior != cargo_nuevo:
+        invalidar(CARGO, cargo_anterior)
+        invalidar(CARGO, cargo_nuevo)
+
+
+def invalidar_todas():
+    claves = [_clave(MODULO, modulo_id) for modulo_id in Modulo.objects.values_list('id', flat=True)]
+    claves += [_clave(CARGO, cargo) for cargo in [c for c, _ in CARGO_CHOICES] + [reportes.SIN_PERFIL]]
+    cache.delete_many([_clave_registro(clave) for clave in claves])
+
+
+def cargos():
+    """[(clave, nombre)] de los cargos con clasificación (sin 'Seleccione')."""
+    return [(clave, nombre) for clave, nombre in CARGO_CHOICES if clave != 'SELECCIONE']
+
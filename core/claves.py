@@ -0,0 +1,184 @@
+"""Caché en memoria de las claves de respuesta del banco de preguntas.
+
+Cada entrada se identifica por (modulo_id, tipo_pregunta) y guarda solo lo
+necesario para mostrar y calificar: id, texto, opciones y letra correcta. Los
+exámenes sorteados (ids y por_ids) salen de la misma entrada, con un índice
+por id que se descarta junto con ella: todo cuenta contra MAX_PREGUNTAS.
+
+La coherencia entre procesos (varios workers de gunicorn) se logra con un
+número de versión guardado en la caché de Django: las señales de Pregunta lo
+cambian y cada proceso descarta su copia local cuando ve una versión distinta.
+Para que esto funcione entre workers la caché de Django debe ser compartida:
+settings la configura con ANSSD_REDIS_URL o ANSSD_MEMCACHED; sin ellas usa
+LocMemCache, que solo sirve con un proceso (`check --deploy` lo advierte).
+"""
+import threading
+import uuid
+from collections import OrderedDict, namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Pregunta
+
+CLAVE_VERSION = 'core:banco_preguntas:version'
+
+# Límite de memoria: cantidad total de preguntas guardadas en el proceso
+MAX_PREGUNTAS = getattr(settings, 'ANSSD_CLAVES_MAX_PREGUNTAS', 20000)
+
+CAMPOS = ('id', 'texto', 'opcion_a', 'opcion_b', 'opcion_c', 'opcion_d', 'respuesta_correcta')
+
+PreguntaClave = namedtuple('PreguntaClave', CAMPOS)
+
+
+def version_actual():
+    version = cache.get(CLAVE_VERSION)
+    if version is None:
+        # Si la versión se perdió (reinicio o expulsión de la caché) se crea una
+        # nueva; como es aleatoria, ningún proceso puede confundirla con la vieja.
+        cache.add(CLAVE_VERSION, uuid.uuid4().hex, None)
+        version = cache.get(CLAVE_VERSION)
+    return version
+
+
+async def aversion_actual():
+    version = await cache.aget(CLAVE_VERSION)
+    if version is None:
+        await cache.aadd(CLAVE_VERSION, uuid.uuid4().hex, None)
+        version = await cache.aget(CLAVE_VERSION)
+    return version
+
+
+def invalidar():
+    """Cambia la versión del banco; todas las copias locales quedan obsoletas."""
+    cache.set(CLAVE_VERSION, uuid.uuid4().hex, None)
+
+
+class CacheClaves:
+    """LRU de (modulo_id, tipo) -> tupla de PreguntaClave, acotado por preguntas."""
+
+    def __init__(self, max_preguntas=MAX_PREGUNTAS):
+        self.max_preguntas = max_preguntas
+        self._entradas = OrderedDict()
+        self._tamano = 0
+        # (modulo_id, tipo) -> (preguntas, ids, {id: PreguntaClave}) de las entradas en _entradas
+        self._indices = {}
+        self._version = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entradas)
+
+    def limpiar(self):
+        with self._lock:
+            self._entradas.clear()
+            self._tamano = 0
+            self._indices.clear()
+
+    def _sincronizar(self, version):
+        if version != self._version:
+            self._entradas.clear()
+            self._tamano = 0
+            self._indices.clear()
+            self._version = version
+
+    def _guardar(self, clave, preguntas):
+        self._entradas[clave] = preguntas
+        self._tamano += len(preguntas)
+        while self._tamano > self.max_preguntas and len(self._entradas) > 1:
+            expulsada, preguntas = self._entradas.popitem(last=False)
+            self._tamano -= len(preguntas)
+            self._indices.pop(expulsada, None)
+
+    def _buscar(self, tipo, modulo_ids, version):
+        """Devuelve (resultado, faltantes) con lo que ya está en memoria."""
+        with self._lock:
+            self._sincronizar(version)
+            resultado = {}
+            faltantes = []
+            for modulo_id in modulo_ids:
+                preguntas = self._entradas.get((modulo_id, tipo))
+                if preguntas is None:
+                    faltantes.append(modulo_id)
+                else:
+                    self._entradas.move_to_end((modulo_id, tipo))
+                    resultado[modulo_id] = preguntas
+        return resultado, faltantes
+
+    def _consulta(self, tipo, faltantes):
+        return (
+            Pregunta.objects.filter(tipo_pregunta=tipo, modulo_id__in=faltantes)
+            .order_by('modulo_id', 'id')
+            .values_list('modulo_id', *CAMPOS)
+        )
+
+    def _completar(self, tipo, version, cargadas, resultado):
+        with self._lock:
+            # Si el banco cambió mientras se consultaba, no se guarda lo leído
+            guardar = self._version == version
+            for modulo_id, preguntas in cargadas.items():
+                preguntas = tuple(preguntas)
+                if guardar:
+                    self._guardar((modulo_id, tipo), preguntas)
+                resultado[modulo_id] = preguntas
+        return resultado
+
+    def obtener_varios(self, tipo, modulo_ids):
+        """Devuelve {modulo_id: (PreguntaClave, ...)}; lo que falta se carga en una consulta."""
+        version = version_actual()
+        resultado, faltantes = self._buscar(tipo, list(modulo_ids), version)
+        if not faltantes:
+            return resultado
+        cargadas = {modulo_id: [] for modulo_id in faltantes}
+        for modulo_id, *datos in self._consulta(tipo, faltantes):
+            cargadas[modulo_id].append(PreguntaClave(*datos))
+        return self._completar(tipo, version, cargadas, resultado)
+
+    async def aobtener_varios(self, tipo, modulo_ids):
+        """Igual que obtener_varios, con la caché y el ORM async."""
+        version = await aversion_actual()
+        resultado, faltantes = self._buscar(tipo, list(modulo_ids), version)
+        if not faltantes:
+            return resultado
+        cargadas = {modulo_id: [] for modulo_id in faltantes}
+        async for modulo_id, *datos in self._consulta(tipo, faltantes):
+            cargadas[modulo_id].append(PreguntaClave(*datos))
+        return self._completar(tipo, version, cargadas, resultado)
+
+    def obtener(self, modulo_id, tipo):
+        return self.obtener_varios(tipo, [modulo_id])[modulo_id]
+
+    async def aobtener(self, modulo_id, tipo):
+        return (await self.aobtener_varios(tipo, [modulo_id]))[modulo_id]
+
+    # --- Por id: exámenes sorteados ---
+
+    def _indice(self, clave, preguntas):
+        """(ids, {id: PreguntaClave}) de la entrada; se arma una vez mientras siga en el LRU."""
+        with self._lock:
+            indice = self._indices.get(clave)
+            if indice is not None and indice[0] is preguntas:
+                return indice[1:]
+            indice = (preguntas, tuple(p.id for p in preguntas), {p.id: p for p in preguntas})
+            if self._entradas.get(clave) is preguntas:
+                self._indices[clave] = indice
+            return indice[1:]
+
+    def ids(self, modulo_id, tipo):
+        """Ids de las preguntas del módulo y tipo, desde la entrada en memoria."""
+        return self._indice((modulo_id, tipo), self.obtener(modulo_id, tipo))[0]
+
+    async def aids(self, modulo_id, tipo):
+        return self._indice((modulo_id, tipo), await self.aobtener(modulo_id, tipo))[0]
+
+    def por_ids(self, modulo_id, tipo, ids):
+        """(PreguntaClave, ...) de esos ids y en ese orden, desde la memoria; los borrados se omiten."""
+        _, por_id = self._indice((modulo_id, tipo), self.obtener(modulo_id, tipo))
+        return tuple(por_id[pregunta_id] for pregunta_id in ids if pregunta_id in por_id)
+
+    async def apor_ids(self, modulo_id, tipo, ids):
+        _, por_id = self._indice((modulo_id, tipo), await self.aobtener(modulo_id, tipo))
+        return tuple(por_id[pregunta_id] for pregunta_id in ids if pregunta_id in por_id)
+
+
+claves = CacheClaves()
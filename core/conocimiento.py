@@ -0,0 +1,134 @@
+"""Búsqueda de respuestas del Tutor IA.
+
+Las entradas de EntradaTutor se indexan una vez por versión de contenido en un
+índice invertido (término -> [(entrada, peso)]). Los términos se normalizan a
+minúsculas sin tildes y sin palabras vacías, y el peso de cada término en cada
+entrada se precalcula con BM25, así una consulta solo suma pesos de las listas
+de los términos que contiene.
+
+Cada lista está ordenada por peso descendente; para términos muy comunes solo
+se recorren las MAX_POSTINGS entradas donde más pesan (índice por impacto), lo
+que acota el costo de una consulta sin importar el tamaño del corpus.
+
+Igual que la caché de claves, la versión vive en la caché de Django y la
+cambian las señales de EntradaTutor.
+"""
+import heapq
+import math
+import re
+import threading
+import unicodedata
+import uuid
+from collections import Counter, defaultdict
+
+from django.core.cache import cache
+
+from .models import EntradaTutor
+
+CLAVE_VERSION = 'core:tutor:version'
+
+# Parámetros de BM25
+K1 = 1.2
+B = 0.75
+# Las palabras de la pregunta pesan más que las de la respuesta
+PESO_PREGUNTA = 3
+# Máximo de entradas recorridas por término en cada consulta
+MAX_POSTINGS = 200
+
+PALABRAS_VACIAS = frozenset('''
+    a al como con cual cuales de del e el ella en es esta este hacer la las lo los mi mis me para
+    por que quien se ser sin sobre su sus tu tus un una uno unos unas usar y o
+'''.split())
+
+_TOKEN = re.compile(r'[a-z0-9]+')
+
+
+def normalizar(texto):
+    """Minúsculas, sin tildes y sin palabras vacías: '¿Qué es una VPN?' -> ['vpn']."""
+    sin_tildes = unicodedata.normalize('NFKD', texto.lower())
+    sin_tildes = ''.join(c for c in sin_tildes if not unicodedata.combining(c))
+    return [t for t in _TOKEN.findall(sin_tildes) if t not in PALABRAS_VACIAS]
+
+
+class IndiceTutor:
+    """Índice invertido con pesos BM25 precalculados."""
+
+    def __init__(self, entradas):
+        # entradas: iterable de (id, pregunta, respuesta)
+        self.entradas = []
+        self.exactas = {}
+        frecuencias = []
+        for id_, pregunta, respuesta in entradas:
+            tokens_pregunta = normalizar(pregunta)
+            tf = Counter(normalizar(respuesta))
+            for token in tokens_pregunta:
+                tf[token] += PESO_PREGUNTA
+            self.exactas.setdefault(' '.join(tokens_pregunta), len(self.entradas))
+            self.entradas.append((id_, pregunta, respuesta))
+            frecuencias.append(tf)
+
+        n = len(frecuencias)
+        longitudes = [sum(tf.values()) for tf in frecuencias]
+        promedio = (sum(longitudes) / n) if n else 1
+        documentos_por_termino = Counter(t for tf in frecuencias for t in tf)
+
+        self.postings = defaultdict(list)
+        for doc, (tf, longitud) in enumerate(zip(frecuencias, longitudes)):
+            norma = K1 * (1 - B + B * longitud / promedio)
+            for termino, f in tf.items():
+                df = documentos_por_termino[termino]
+                idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+                self.postings[termino].append((doc, idf * f * (K1 + 1) / (f + norma)))
+        self.postings = {
+            termino: sorted(lista, key=lambda posting: posting[1], reverse=True)
+            for termino, lista in self.postings.items()
+        }
+
+    def __len__(self):
+        return len(self.entradas)
+
+    def buscar(self, consulta, k=5):
+        """Devuelve hasta k (puntaje, id, pregunta, respuesta), de mejor a peor."""
+        tokens = normalizar(consulta)
+        if not tokens:
+            return []
+        exacta = self.exactas.get(' '.join(tokens))
+        puntajes = defaultdict(float)
+        for token in set(tokens):
+            for doc, peso in self.postings.get(token, ())[:MAX_POSTINGS]:
+                puntajes[doc] += peso
+        if exacta is not None:
+            # La pregunta idéntica (salvo tildes y signos) siempre va primero
+            puntajes[exacta] += math.inf
+        mejores = heapq.nlargest(k, puntajes.items(), key=lambda item: item[1])
+        return [(puntaje, *self.entradas[doc]) for doc, puntaje in mejores]
+
+
+def version_actual():
+    version = cache.get(CLAVE_VERSION)
+    if version is None:
+        cache.add(CLAVE_VERSION, uuid.uuid4().hex, None)
+        version = cache.get(CLAVE_VERSION)
+    return version
+
+
+def invalidar():
+    cache.set(CLAVE_VERSION, uuid.uuid4().hex, None)
+
+
+_indice = None
+_version = None
+_lock = threading.Lock()
+
+
+def indice():
+    """Índice de la versión actual; se reconstruye solo si el contenido cambió."""
+    global _indice, _version
+    version = version_actual()
+    if _indice is None or version != _version:
+        with _lock:
+            if _indice is None or version != _version:
+                entradas = EntradaTutor.objects.filter(activa=True).values_list('id', 'pregunta', 'respuesta')
+                _indice = IndiceTutor(entradas)
+                _version = version
+    return _indice
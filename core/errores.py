@@ -0,0 +1,5 @@
+"""Errores compartidos por las importaciones desde CSV (banco de preguntas y altas de usuarios)."""
+
+
+class ErrorFila(ValueError):
+    """Una fila del archivo no es válida; el mensaje se muestra junto a su número de línea."""
@@ -0,0 +1,274 @@
+"""Archivos estáticos minificados, con hash en el nombre y precomprimidos.
+
+`construir_estaticos` ejecuta collectstatic con AlmacenEstaticos, que:
+
+1. minifica el CSS y el JS propios (los que están bajo ESTATICOS_MINIFICAR)
+   antes de calcular el hash, así el nombre cambia solo si cambia el contenido
+   servido;
+2. deja la copia con hash y el manifiesto, como ManifestStaticFilesStorage,
+   para que {% static %} resuelva a `styles.<hash>.css`;
+3. escribe al lado una variante .gz y, si está instalado el paquete brotli,
+   una .br de cada archivo comprimible, solo cuando ocupan menos.
+
+EstaticosMiddleware sirve STATIC_ROOT sin pasar por las vistas: elige la
+variante según Accept-Encoding (br, luego gzip) y marca los nombres con hash
+como inmutables por un año; los nombres sin hash se revalidan con ETag. El
+índice de archivos se arma al arrancar: tras construir hay que reiniciar.
+
+Sin construir (desarrollo, pruebas) {% static %} devuelve el nombre original.
+"""
+import gzip
+import mimetypes
+import os
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from urllib.parse import unquote, urlsplit
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage, staticfiles_storage
+from django.core.files.base import ContentFile
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils.http import http_date, parse_http_date_safe
+
+try:
+    import brotli
+except ImportError:  # opcional: sin él solo se genera gzip
+    brotli = None
+
+COMPRIMIBLES = ('.css', '.js', '.svg', '.json', '.map', '.txt', '.html', '.xml')
+# Por debajo de este tamaño la cabecera de compresión no compensa
+MIN_COMPRIMIR = 256
+UN_ANO = 365 * 24 * 60 * 60
+CACHE_INMUTABLE = f'public, max-age={UN_ANO}, immutable'
+CACHE_SIN_HASH = 'public, max-age=0, must-revalidate'
+VARIANTES = (('br', '.br'), ('gzip', '.gz'))
+
+
+# --- MINIFICACIÓN ---
+# Conservadora: quita comentarios y espacios sin tocar cadenas, y en JS
+# mantiene los saltos de línea para no cambiar la inserción automática de ';'.
+
+_CSS_CADENAS = re.compile(r'''("(?:\\.|[^"\\\n])*"|'(?:\\.|[^'\\\n])*')''')
+_CSS_COMENTARIOS = re.compile(r'''("(?:\\.|[^"\\\n])*"|'(?:\\.|[^'\\\n])*')|/\*.*?\*/''', re.S)
+
+
+def minificar_css(css):
+    sin_comentarios = _CSS_COMENTARIOS.sub(lambda m: m[1] or '', css)
+    partes = _CSS_CADENAS.split(sin_comentarios)
+    for i in range(0, len(partes), 2):  # las impares son cadenas y quedan igual
+        codigo = re.sub(r'\s+', ' ', partes[i])
+        codigo = re.sub(r'\s*([{};,>])\s*', r'\1', codigo)
+        partes[i] = re.sub(r':\s+', ':', codigo)
+    return ''.join(partes).replace(';}', '}').strip()
+
+
+# Tras estos caracteres o palabras una '/' abre una expresión regular y no es una división
+_ANTES_DE_REGEX = set('(,=:[!&|?{};+-*%<>~^')
+_PALABRAS_ANTES_DE_REGEX = ('return', 'typeof', 'case', 'do', 'else', 'in', 'of', 'void', 'yield')
+
+
+def _abre_regex(anterior):
+    anterior = anterior.rstrip()
+    if not anterior or anterior[-1] in _ANTES_DE_REGEX:
+        return True
+    palabra = re.search(r'[A-Za-z_$]+$', anterior)
+    return bool(palabra) and palabra[0] in _PALABRAS_ANTES_DE_REGEX
+
+
+def minificar_js(js):
+    salida, i, n = [], 0, len(js)
+    while i < n:
+        c = js[i]
+        if c in '\'"`':
+            fin = i + 1
+            while fin < n and js[fin] != c:
+                fin += 2 if js[fin] == '\\' else 1
+            salida.append(js[i:fin + 1])
+            i = fin + 1
+        elif js.startswith('//', i):
+            fin = js.find('\n', i)
+            i = n if fin == -1 else fin
+        elif js.startswith('/*', i):
+            fin = js.find('*/', i + 2)
+            i = n if fin == -1 else fin + 2
+        elif c == '/' and _abre_regex(next((parte for parte in reversed(salida) if parte.strip()), '')):
+            fin, en_clase = i + 1, False
+            while fin < n and (js[fin] != '/' or en_clase) and js[fin] != '\n':
+                if js[fin] == '\\':
+                    fin += 1
+                elif js[fin] in '[]':
+                    en_clase = js[fin] == '['
+                fin += 1
+            salida.append(js[i:fin + 1])
+            i = fin + 1
+        else:
+            fin = i + 1
+            while fin < n and js[fin] not in '\'"`/':
+                fin += 1
+            salida.append(re.sub(r'[ \t]+', ' ', js[i:fin]))
+            i = fin
+    lineas = (linea.strip() for linea in ''.join(salida).splitlines())
+    return '\n'.join(linea for linea in lineas if linea)
+
+
+def minificador_para(ruta):
+    prefijos = getattr(settings, 'ESTATICOS_MINIFICAR', ('core/',))
+    if '.min.' in ruta or not ruta.startswith(tuple(prefijos)):
+        return None
+    return {'.css': minificar_css, '.js': minificar_js}.get(os.path.splitext(ruta)[1])
+
+
+def comprimir(contenido):
+    """[(sufijo, bytes)] de las variantes que ocupan menos que el original."""
+    if len(contenido) < MIN_COMPRIMIR:
+        return []
+    variantes = [('.gz', gzip.compress(contenido, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variantes.append(('.br', brotli.compress(contenido, quality=11)))
+    return [(sufijo, datos) for sufijo, datos in variantes if len(datos) < len(contenido)]
+
+
+class AlmacenEstaticos(ManifestStaticFilesStorage):
+    manifest_strict = False
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            # Todavía no se ejecutó construir_estaticos
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        if dry_run:
+            yield from super().post_process(paths, dry_run, **options)
+            return
+
+        # Se minifica la copia ya recolectada y el hash se calcula sobre ella
+        for ruta, (origen, ruta_origen) in list(paths.items()):
+            minificador = minificador_para(ruta)
+            if minificador is None:
+                continue
+            with origen.open(ruta_origen) as archivo:
+                contenido = minificador(archivo.read().decode('utf-8'))
+            self.delete(ruta)
+            self._save(ruta, ContentFile(contenido.encode('utf-8')))
+            paths[ruta] = (self, ruta)
+
+        yield from super().post_process(paths, dry_run, **options)
+
+        for ruta in paths:
+            con_hash = self.hashed_files.get(self.hash_key(self.clean_name(ruta)))
+            for nombre in {ruta, con_hash} - {None}:
+                if nombre.endswith(COMPRIMIBLES):
+                    self.comprimir(nombre)
+
+    def comprimir(self, nombre):
+        with self.open(nombre) as archivo:
+            contenido = archivo.read()
+        for sufijo, datos in comprimir(contenido):
+            if self.exists(nombre + sufijo):
+                self.delete(nombre + sufijo)
+            self._save(nombre + sufijo, ContentFile(datos))
+
+
+# --- SERVIDOR ---
+
+@dataclass
+class Archivo:
+    ruta: Path
+    tipo: str
+    inmutable: bool
+    variantes: dict = field(default_factory=dict)  # {'br': Path, 'gzip': Path}
+
+
+def indexar(raiz, hashed):
+    """{ruta relativa: Archivo} de todo lo que hay en STATIC_ROOT."""
+    archivos = {}
+    raiz = Path(raiz)
+    if not raiz.is_dir():
+        return archivos
+    sufijos = tuple(sufijo for _, sufijo in VARIANTES)
+    for ruta in raiz.rglob('*'):
+        if not ruta.is_file() or ruta.name.endswith(sufijos):
+            continue
+        nombre = ruta.relative_to(raiz).as_posix()
+        tipo = mimetypes.guess_type(ruta.name)[0] or 'application/octet-stream'
+        if tipo.startswith('text/') or tipo in ('application/javascript', 'text/javascript'):
+            tipo += '; charset=utf-8'
+        variantes = {
+            codificacion: ruta.with_name(ruta.name + sufijo)
+            for codificacion, sufijo in VARIANTES if ruta.with_name(ruta.name + sufijo).is_file()
+        }
+        archivos[nombre] = Archivo(ruta, tipo, nombre in hashed, variantes)
+    return archivos
+
+
+def codificaciones_aceptadas(cabecera):
+    aceptadas = set()
+    for parte in cabecera.split(','):
+        nombre, _, parametros = parte.partition(';')
+        calidad = parametros.replace(' ', '').removeprefix('q=')
+        try:
+            if parametros and float(calidad) == 0:
+                continue
+        except ValueError:
+            pass
+        aceptadas.add(nombre.strip().lower())
+    return aceptadas
+
+
+class EstaticosMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        self.prefijo = urlsplit(settings.STATIC_URL or '').path
+        if not self.prefijo.startswith('/'):
+            self.prefijo = '/' + self.prefijo
+        hashed = set(getattr(staticfiles_storage, 'hashed_files', {}).values())
+        self.archivos = indexar(settings.STATIC_ROOT, hashed) if settings.STATIC_ROOT else {}
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.servir(request) or self.get_response(request)
+
+    async def __acall__(self, request):
+        return self.servir(request) or await self.get_response(request)
+
+    def servir(self, request):
+        if request.method not in ('GET', 'HEAD') or not request.path.startswith(self.prefijo):
+            return None
+        archivo = self.archivos.get(unquote(request.path[len(self.prefijo):]))
+        if archivo is None:
+            return None
+
+        codificacion, ruta = None, archivo.ruta
+        aceptadas = codificaciones_aceptadas(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        for nombre, _ in VARIANTES:
+            if nombre in aceptadas and nombre in archivo.variantes:
+                codificacion, ruta = nombre, archivo.variantes[nombre]
+                break
+
+        estado = ruta.stat()
+        etag = f'"{int(estado.st_mtime):x}-{estado.st_size:x}"'
+        if request.META.get('HTTP_IF_NONE_MATCH') == etag:
+            respuesta = HttpResponseNotModified()
+        elif (desde := parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE', ''))) and \
+                'HTTP_IF_NONE_MATCH' not in request.META and int(estado.st_mtime) <= desde:
+            respuesta = HttpResponseNotModified()
+        else:
+            respuesta = FileResponse(open(ruta, 'rb'), content_type=archivo.tipo)
+            if codificacion:
+                respuesta['Content-Encoding'] = codificacion
+        respuesta['ETag'] = etag
+        respuesta['Last-Modified'] = http_date(estado.st_mtime)
+        respuesta['Cache-Control'] = CACHE_INMUTABLE if archivo.inmutable else CACHE_SIN_HASH
+        if archivo.variantes:
+            respuesta['Vary'] = 'Accept-Encoding'
+        return respuesta
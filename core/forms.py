@@ -13,4 +13,12 @@ class PerfilForm(forms.ModelForm):
             'apellido': forms.TextInput(attrs={'class': 'form-control'}),
             'cargo': forms.Select(attrs={'class': 'form-control'}), 
             'correo': forms.EmailInput(attrs={'class': 'form-control'}),
-        }
\ No newline at end of file
+        }
+
+
+class ImportarPreguntasForm(forms.Form):
+
+    archivo = forms.FileField(help_text='CSV o JSON Lines con las columnas de la exportación.')
+    formato = forms.ChoiceField(choices=[('csv', 'CSV'), ('jsonl', 'JSON Lines')])
+    lote = forms.IntegerField(min_value=1, initial=1000, help_text='Filas por transacción.')
+    sin_ids = forms.BooleanField(required=False, label='Crear todas como nuevas (ignorar la columna id)')
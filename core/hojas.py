@@ -0,0 +1,60 @@
+"""Hojas de preguntas pre-renderizadas.
+
+El bloque de preguntas del diagnóstico es igual para todos los usuarios, así
+que se renderiza una vez por versión del banco de preguntas y se guarda en la
+caché de Django. (Los exámenes se sortean por intento y se renderizan aparte.)
+En cada petición solo se renderiza la página que lo envuelve (token CSRF, menú
+del usuario) y se inserta el HTML ya hecho.
+
+La versión es la misma de la caché de claves, que cambian las señales de
+Pregunta y de Modulo.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from . import claves as claves_banco
+from .calificacion import apreguntas_diagnostico, preguntas_diagnostico
+from .metricas import contar
+
+DURACION = getattr(settings, 'HOJAS_CACHE_SEGUNDOS', 60 * 60 * 24)
+
+
+def _obtener(clave, renderizar):
+    html = cache.get(clave)
+    if html is None:
+        contar('hoja_cache_miss')
+        html = renderizar()
+        cache.set(clave, html, DURACION)
+    else:
+        contar('hoja_cache_hit')
+    return mark_safe(html)
+
+
+async def _aobtener(clave, renderizar):
+    html = await cache.aget(clave)
+    if html is None:
+        contar('hoja_cache_miss')
+        html = await renderizar()
+        await cache.aset(clave, html, DURACION)
+    else:
+        contar('hoja_cache_hit')
+    return mark_safe(html)
+
+
+def hoja_diagnostico(preguntas_por_modulo=None):
+    """HTML de todas las preguntas de diagnóstico; `preguntas_por_modulo` se pide solo si falta."""
+    def renderizar():
+        datos = preguntas_por_modulo if preguntas_por_modulo is not None else preguntas_diagnostico()
+        return render_to_string('core/_hoja_diagnostico.html', {'preguntas_por_modulo': datos})
+
+    return _obtener(f'core:hoja:diagnostico:{claves_banco.version_actual()}', renderizar)
+
+
+async def ahoja_diagnostico():
+    async def renderizar():
+        datos = await apreguntas_diagnostico()
+        return render_to_string('core/_hoja_diagnostico.html', {'preguntas_por_modulo': datos})
+
+    return await _aobtener(f'core:hoja:diagnostico:{await claves_banco.aversion_actual()}', renderizar)
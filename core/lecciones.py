@@ -0,0 +1,159 @@
+"""Contenido de los módulos: lecciones en Markdown con el HTML ya renderizado.
+
+Cada Leccion guarda su texto en Markdown y, al guardarse (señal pre_save),
+el HTML resultante y un número de versión que sube cuando cambia el texto:
+el Markdown se convierte una vez por versión, no en cada visita.
+
+La página del módulo muestra LECCIONES_POR_PAGINA lecciones (?pagina=N). Lo
+que necesita para dibujarlas —nombre y descripción del módulo, título y HTML
+de cada lección— se guarda junto en la caché de Django, así con la caché
+caliente no se consulta la base por el contenido. Las señales de Leccion y
+de Modulo lo descartan al confirmar la transacción.
+
+El Markdown admitido es un subconjunto: títulos (#), párrafos, listas con
+- o * y numeradas, **negrita**, *cursiva*, `código` y [enlaces](https://...).
+Todo el texto se escapa: no se acepta HTML crudo.
+"""
+import html
+import re
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .metricas import contar
+from .models import Leccion, Modulo
+
+DURACION = getattr(settings, 'LECCIONES_CACHE_SEGUNDOS', 60 * 60 * 24)
+POR_PAGINA = getattr(settings, 'LECCIONES_POR_PAGINA', 1)
+# '#' se dibuja como <h5>: la página ya usa <h2> y <h4>
+NIVEL_BASE = 4
+
+Contenido = namedtuple('Contenido', 'id nombre descripcion paginas')
+Pagina = namedtuple('Pagina', 'titulo html')
+
+
+# --- MARKDOWN ---
+
+_TITULO = re.compile(r'^(#{1,6})\s+(.*?)\s*#*$')
+_VINETA = re.compile(r'^[-*]\s+(.*)$')
+_NUMERADA = re.compile(r'^\d+[.)]\s+(.*)$')
+# Sobre el texto ya escapado: `código` o [texto](url)
+_CODIGO_O_ENLACE = re.compile(r'`([^`]+)`|\[([^\]]+)\]\(([^)\s]+)\)')
+_NEGRITA = re.compile(r'\*\*(?=\S)(.+?)(?<=\S)\*\*')
+_CURSIVA = re.compile(r'\*(?=\S)(.+?)(?<=\S)\*')
+_ESQUEMAS = ('http://', 'https://', 'mailto:')
+
+
+def _enfasis(texto):
+    return _CURSIVA.sub(r'<em>\1</em>', _NEGRITA.sub(r'<strong>\1</strong>', texto))
+
+
+def _enlace(texto, url):
+    destino = html.unescape(url)
+    if destino.lower().startswith(_ESQUEMAS):
+        return f'<a href="{url}" target="_blank" rel="noopener" class="enlace-tema">{texto}</a>'
+    if destino.startswith('/') and not destino.startswith('//'):
+        return f'<a href="{url}">{texto}</a>'
+    # javascript:, data:, etc. quedan como texto
+    return texto
+
+
+def _en_linea(texto):
+    texto = html.escape(texto)
+    partes, inicio = [], 0
+    for coincidencia in _CODIGO_O_ENLACE.finditer(texto):
+        partes.append(_enfasis(texto[inicio:coincidencia.start()]))
+        codigo, etiqueta, url = coincidencia.groups()
+        partes.append(f'<code>{codigo}</code>' if codigo is not None else _enlace(_enfasis(etiqueta), url))
+        inicio = coincidencia.end()
+    partes.append(_enfasis(texto[inicio:]))
+    return ''.join(partes)
+
+
+def markdown_a_html(texto):
+    """HTML del subconjunto de Markdown descrito arriba."""
+    bloques, parrafo, lista = [], [], None  # lista: (etiqueta, [elementos])
+
+    def cerrar():
+        nonlocal lista
+        if parrafo:
+            bloques.append(f"<p>{_en_linea(' '.join(parrafo))}</p>")
+            parrafo.clear()
+        if lista:
+            etiqueta, elementos = lista
+            items = ''.join(f"<li>{_en_linea(' '.join(e))}</li>" for e in elementos)
+            bloques.append(f'<{etiqueta}>{items}</{etiqueta}>')
+            lista = None
+
+    for linea in texto.replace('\r\n', '\n').split('\n'):
+        limpia = linea.strip()
+        if not limpia:
+            cerrar()
+            continue
+        titulo = _TITULO.match(limpia)
+        elemento = _VINETA.match(limpia) or _NUMERADA.match(limpia)
+        if titulo:
+            cerrar()
+            nivel = min(len(titulo[1]) + NIVEL_BASE, 6)
+            bloques.append(f'<h{nivel}>{_en_linea(titulo[2])}</h{nivel}>')
+        elif elemento:
+            etiqueta = 'ul' if _VINETA.match(limpia) else 'ol'
+            if parrafo or (lista and lista[0] != etiqueta):
+                cerrar()
+            if lista is None:
+                lista = (etiqueta, [])
+            lista[1].append([elemento[1]])
+        elif lista and linea[:1].isspace():
+            lista[1][-1].append(limpia)  # continuación del elemento anterior
+        else:
+            if lista:
+                cerrar()
+            parrafo.append(limpia)
+    cerrar()
+    return '\n'.join(bloques)
+
+
+def preparar(leccion):
+    """Renderiza el HTML de la lección y sube su versión si cambió el texto (pre_save)."""
+    if leccion.pk is not None:
+        anterior = Leccion.objects.filter(pk=leccion.pk).values_list('contenido', flat=True).first()
+        if anterior is not None and anterior != leccion.contenido:
+            leccion.version += 1
+            leccion.html = ''
+    if not leccion.html:
+        leccion.html = markdown_a_html(leccion.contenido)
+
+
+# --- CACHÉ ---
+
+def _clave(modulo_id):
+    return f'core:lecciones:{modulo_id}'
+
+
+def cargar(modulo_id):
+    datos = Modulo.objects.filter(pk=modulo_id).values_list('nombre', 'descripcion').first()
+    if datos is None:
+        return None
+    paginas = [
+        Pagina(*fila) for fila in
+        Leccion.objects.filter(modulo_id=modulo_id).order_by('orden', 'id').values_list('titulo', 'html')
+    ]
+    return Contenido(modulo_id, *datos, paginas)
+
+
+def obtener(modulo_id):
+    """Contenido del módulo desde la caché, o None si el módulo no existe."""
+    contenido = cache.get(_clave(modulo_id))
+    if contenido is not None:
+        contar('lecciones_cache_hit')
+        return contenido
+    contar('lecciones_cache_miss')
+    contenido = cargar(modulo_id)
+    if contenido is not None:
+        cache.set(_clave(modulo_id), contenido, DURACION)
+    return contenido
+
+
+def invalidar(modulo_id):
+    cache.delete(_clave(modulo_id))
@@ -0,0 +1,23 @@
+import os
+
+from django.core.management.base import CommandError
+from django.db import connections
+
+
+def exigir_base_local(opciones):
+    """Detiene un comando de carga que escribiría en una base que no es la local.
+
+    sembrar_datos y bench_progreso crean y borran filas: sin preguntar solo
+    corren contra la SQLite de ANSSD_SQLITE; en cualquier otra base hay que
+    confirmarlo con --yes.
+    """
+    if opciones['yes']:
+        return
+    base = connections['default']
+    local = os.environ.get('ANSSD_SQLITE')
+    if local and base.vendor == 'sqlite' and str(base.settings_dict['NAME']) == local:
+        return
+    raise CommandError(
+        f"Este comando escribe en la base '{base.settings_dict['NAME']}' ({base.vendor}). "
+        'Úsalo con ANSSD_SQLITE=<ruta> o confirma con --yes.'
+    )
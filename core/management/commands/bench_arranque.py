@@ -0,0 +1,109 @@
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from .bench_vistas import UMBRAL_RUIDO_MS, percentil
+
+# Se ejecuta en un intérprete nuevo, como un worker de gunicorn recién creado
+SCRIPT = '''
+import json, os, sys, time
+inicio = time.perf_counter()
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'plataforma_ANSSD.settings')
+from plataforma_ANSSD.wsgi import application
+importado = time.perf_counter()
+from wsgiref.util import setup_testing_defaults
+environ = {'PATH_INFO': sys.argv[1], 'HTTP_HOST': 'localhost', 'SERVER_NAME': 'localhost'}
+setup_testing_defaults(environ)
+estados = []
+cuerpo = b''.join(application(environ, lambda estado, cabeceras, exc_info=None: estados.append(estado)))
+fin = time.perf_counter()
+print(json.dumps({
+    'importar_ms': (importado - inicio) * 1000,
+    'primera_respuesta_ms': (fin - importado) * 1000,
+    'estado': estados[0],
+    'reportlab': 'reportlab' in sys.modules,
+    'modulos': len(sys.modules),
+}))
+'''
+
+
+class Command(BaseCommand):
+    help = ('Mide el arranque en frío de un worker: importar plataforma_ANSSD.wsgi y atender la primera '
+            'petición, cada vez en un intérprete nuevo. Guarda el resultado en JSON para comparar corridas, '
+            'como bench_vistas.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeticiones', type=int, default=10)
+        parser.add_argument('--ruta', default='/login/', help='URL de la primera petición.')
+        parser.add_argument('--salida', help='Archivo JSON donde guardar los resultados.')
+        parser.add_argument('--comparar', help='JSON de una corrida anterior contra la cual buscar regresiones.')
+        parser.add_argument('--tolerancia', type=float, default=0.2,
+                            help='Aumento relativo de p50 tolerado antes de marcar regresión (0.2 = 20%%).')
+
+    def handle(self, *args, **options):
+        ruta_python = [str(settings.BASE_DIR), os.environ.get('PYTHONPATH')]
+        entorno = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, ruta_python)))
+        corridas = []
+        for _ in range(options['repeticiones']):
+            inicio = time.perf_counter()
+            proceso = subprocess.run([sys.executable, '-c', SCRIPT, options['ruta']], env=entorno,
+                                     capture_output=True, text=True)
+            total = (time.perf_counter() - inicio) * 1000
+            if proceso.returncode != 0:
+                raise CommandError(f'El arranque falló:\n{proceso.stderr}')
+            corrida = json.loads(proceso.stdout.strip().splitlines()[-1])
+            corrida['proceso_ms'] = total
+            corridas.append(corrida)
+
+        resultados = {}
+        for medida in ('importar_ms', 'primera_respuesta_ms', 'proceso_ms'):
+            valores = [c[medida] for c in corridas]
+            resultados[medida] = {'p50': round(statistics.median(valores), 3), 'p95': round(percentil(valores, 95), 3)}
+            self.stdout.write(f"{medida:<22} p50 {resultados[medida]['p50']:>8.1f} ms  "
+                              f"p95 {resultados[medida]['p95']:>8.1f} ms")
+        resultados['estado'] = corridas[0]['estado']
+        resultados['reportlab_importado'] = any(c['reportlab'] for c in corridas)
+        resultados['modulos'] = corridas[0]['modulos']
+        self.stdout.write(f"{resultados['estado']}, {resultados['modulos']} módulos cargados, "
+                          f"ReportLab {'importado' if resultados['reportlab_importado'] else 'sin importar'}")
+
+        informe = {
+            'fecha': datetime.now(timezone.utc).isoformat(),
+            'entorno': {
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'ruta': options['ruta'],
+                'repeticiones': options['repeticiones'],
+            },
+            'arranque': resultados,
+        }
+        if options['salida']:
+            with open(options['salida'], 'w', encoding='utf-8') as f:
+                json.dump(informe, f, indent=2, ensure_ascii=False)
+            self.stdout.write(f"Resultados guardados en {options['salida']}")
+
+        if options['comparar']:
+            self.comparar(informe, options['comparar'], options['tolerancia'])
+
+    def comparar(self, informe, ruta, tolerancia):
+        with open(ruta, encoding='utf-8') as f:
+            anterior = json.load(f)['arranque']
+        regresiones = []
+        for medida in ('importar_ms', 'primera_respuesta_ms'):
+            previo, actual = anterior[medida]['p50'], informe['arranque'][medida]['p50']
+            if actual > previo * (1 + tolerancia) and actual - previo > UMBRAL_RUIDO_MS:
+                regresiones.append(f'{medida}: p50 {previo} -> {actual} ms')
+        if informe['arranque']['reportlab_importado'] and not anterior.get('reportlab_importado'):
+            regresiones.append('ReportLab se importa al arrancar')
+        if regresiones:
+            raise CommandError('Regresiones detectadas:\n  ' + '\n  '.join(regresiones))
+        self.stdout.write(self.style.SUCCESS(f'Sin regresiones respecto a {ruta}.'))
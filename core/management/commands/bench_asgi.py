@@ -0,0 +1,127 @@
+import http.client
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from .bench_vistas import Command as BenchVistas, percentil
+
+HOST = '127.0.0.1'
+
+
+def puerto_libre():
+    with socket.socket() as s:
+        s.bind((HOST, 0))
+        return s.getsockname()[1]
+
+
+class Command(BaseCommand):
+    help = ('Levanta la aplicación con uvicorn como ASGI (vistas async) y como WSGI (vistas '
+            'síncronas) y compara peticiones por segundo y p50/p95 bajo carga concurrente. '
+            'Usa los datos de sembrar_datos; con SQLite conviene ANSSD_SQLITE=<ruta>.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrencia', type=int, default=32, help='Clientes simultáneos.')
+        parser.add_argument('--peticiones', type=int, default=2000, help='Peticiones por servidor y ruta.')
+        parser.add_argument('--workers', type=int, default=1, help='Procesos de uvicorn por servidor.')
+        parser.add_argument('--modos', default='wsgi,asgi')
+
+    def handle(self, *args, **options):
+        ctx = BenchVistas().contexto()
+        with override_settings(ALLOWED_HOSTS=['testserver']):
+            client = Client()
+            client.force_login(ctx['user'])
+        cookie = f"{settings.SESSION_COOKIE_NAME}={client.cookies[settings.SESSION_COOKIE_NAME].value}"
+        rutas = {
+            'home': reverse('home'),
+            'diagnostico': reverse('diagnostico'),
+            'examen_modulo': reverse('examen_modulo', args=[ctx['pendiente'].id]),
+            'progreso': reverse('progreso'),
+            'certificado': reverse('certificado', args=[ctx['completado'].id]),
+        }
+
+        for modo in options['modos'].split(','):
+            puerto = puerto_libre()
+            servidor = self.levantar(modo, puerto, options['workers'])
+            try:
+                self.esperar(puerto, servidor)
+                self.stdout.write(self.style.MIGRATE_HEADING(
+                    f"\n{modo.upper()} ({options['workers']} worker/s, {options['concurrencia']} clientes)"))
+                for nombre, url in rutas.items():
+                    r = self.carga(puerto, url, cookie, options['concurrencia'], options['peticiones'])
+                    self.stdout.write(f"{nombre:<16} {r['rps']:>8.0f} req/s  p50 {r['p50']:>7.1f} ms  "
+                                      f"p95 {r['p95']:>7.1f} ms  errores {r['errores']}")
+            finally:
+                servidor.terminate()
+                servidor.wait(timeout=10)
+
+    def levantar(self, modo, puerto, workers):
+        if modo not in ('wsgi', 'asgi'):
+            raise CommandError(f'Modo desconocido: {modo}')
+        aplicacion = f'plataforma_ANSSD.{modo}:application'
+        entorno = dict(os.environ, ANSSD_ASGI='1' if modo == 'asgi' else '0')
+        comando = [sys.executable, '-m', 'uvicorn', aplicacion, '--host', HOST, '--port', str(puerto),
+                   '--workers', str(workers), '--log-level', 'warning', '--no-access-log',
+                   '--interface', 'asgi3' if modo == 'asgi' else 'wsgi']
+        return subprocess.Popen(comando, env=entorno, cwd=settings.BASE_DIR)
+
+    def esperar(self, puerto, servidor, limite=30):
+        fin = time.monotonic() + limite
+        while time.monotonic() < fin:
+            if servidor.poll() is not None:
+                raise CommandError('uvicorn terminó al arrancar; ¿está instalado?')
+            try:
+                socket.create_connection((HOST, puerto), timeout=0.5).close()
+                return
+            except OSError:
+                time.sleep(0.2)
+        raise CommandError(f'uvicorn no respondió en {limite} s')
+
+    def carga(self, puerto, url, cookie, concurrencia, peticiones):
+        tiempos, errores = [], []
+        pendientes = iter(range(peticiones))
+        lock = threading.Lock()
+
+        def cliente():
+            conexion = http.client.HTTPConnection(HOST, puerto, timeout=60)
+            cabeceras = {'Cookie': cookie, 'Host': HOST}
+            while True:
+                with lock:
+                    if next(pendientes, None) is None:
+                        break
+                inicio = time.perf_counter()
+                try:
+                    conexion.request('GET', url, headers=cabeceras)
+                    respuesta = conexion.getresponse()
+                    respuesta.read()
+                    ok = respuesta.status == 200
+                except (OSError, http.client.HTTPException):
+                    conexion.close()
+                    conexion = http.client.HTTPConnection(HOST, puerto, timeout=60)
+                    ok = False
+                duracion = (time.perf_counter() - inicio) * 1000
+                with lock:
+                    (tiempos if ok else errores).append(duracion)
+            conexion.close()
+
+        inicio = time.perf_counter()
+        hilos = [threading.Thread(target=cliente) for _ in range(concurrencia)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        total = time.perf_counter() - inicio
+        return {
+            'rps': len(tiempos) / total,
+            'p50': statistics.median(tiempos) if tiempos else 0,
+            'p95': percentil(tiempos, 95) if tiempos else 0,
+            'errores': len(errores),
+        }
@@ -0,0 +1,108 @@
+import pickle
+import random
+import statistics
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from core import clasificacion
+from core.models import Modulo, Perfil, Progreso
+from .bench_vistas import percentil
+
+
+def medir(funcion, argumentos):
+    """(p50, p95) en microsegundos de llamar a `funcion` con cada elemento de `argumentos`."""
+    tiempos = []
+    for argumento in argumentos:
+        inicio = time.perf_counter()
+        funcion(argumento)
+        tiempos.append((time.perf_counter() - inicio) * 1e6)
+    return statistics.median(tiempos), percentil(tiempos, 95)
+
+
+class Command(BaseCommand):
+    help = ('Compara la clasificación calculada en cada consulta (ordenar todos los puntajes) con la '
+            'estructura ordenada de core.clasificacion: armado, puesto de un usuario, página del top, '
+            'cambio de puntaje y foto en la caché. Con datos sintéticos en memoria (--usuarios) y, si hay '
+            'datos de sembrar_datos, también contra la base.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--usuarios', type=int, default=100_000)
+        parser.add_argument('--consultas', type=int, default=200)
+        parser.add_argument('--semilla', type=int, default=7)
+
+    def handle(self, *args, **options):
+        azar = random.Random(options['semilla'])
+        n = options['usuarios']
+        puntajes = {user_id: azar.randint(0, 100) for user_id in range(1, n + 1)}
+        muestra = [azar.randint(1, n) for _ in range(options['consultas'])]
+        paginas = [azar.randint(1, max(1, n // clasificacion.POR_PAGINA)) for _ in muestra]
+        self.stdout.write(f'{n} usuarios en memoria, {len(muestra)} consultas por escenario')
+
+        def al_vuelo_puesto(user_id):
+            orden = sorted(puntajes.items(), key=lambda par: (-par[1], par[0]))
+            return 1 + sum(1 for _, p in orden if p > puntajes[user_id])
+
+        def al_vuelo_pagina(numero):
+            orden = sorted(puntajes.items(), key=lambda par: (-par[1], par[0]))
+            inicio = (numero - 1) * clasificacion.POR_PAGINA
+            return orden[inicio:inicio + clasificacion.POR_PAGINA]
+
+        inicio = time.perf_counter()
+        tabla = clasificacion.Clasificacion(puntajes)
+        armado = (time.perf_counter() - inicio) * 1000
+        foto = pickle.dumps(tabla)
+        inicio = time.perf_counter()
+        pickle.loads(foto)
+        carga = (time.perf_counter() - inicio) * 1000
+
+        # Ordenar en cada consulta es lento: se mide con pocas consultas
+        pocas = muestra[:10]
+        self.imprimir('al vuelo: puesto', medir(al_vuelo_puesto, pocas))
+        self.imprimir('al vuelo: página', medir(al_vuelo_pagina, paginas[:10]))
+        self.stdout.write(f"{'armar SortedList':<28} {armado:>10.1f} ms")
+        self.stdout.write(f"{'foto: cargar de la caché':<28} {carga:>10.1f} ms  {len(foto) / 1024:.0f} KiB")
+        self.imprimir('ordenada: puesto', medir(tabla.posicion, muestra))
+        self.imprimir('ordenada: página', medir(tabla.pagina, paginas))
+        self.imprimir('ordenada: cambio de puntaje',
+                      medir(tabla.aplicar, [(u, azar.randint(0, 100), False) for u in muestra]))
+
+        self.base(options['consultas'])
+
+    def base(self, consultas):
+        modulo = Modulo.objects.order_by('id').first()
+        filas = Progreso.objects.filter(modulo=modulo).count() if modulo else 0
+        if not filas:
+            self.stdout.write('Sin datos sembrados: se omite la comparación contra la base.')
+            return
+        user_id = Progreso.objects.filter(modulo=modulo).values_list('user_id', flat=True).first()
+        self.stdout.write(f'\nBase ({connection.vendor}): módulo {modulo.id} con {filas} participantes')
+
+        def sql(_):
+            # Lo que haría la vista sin la clasificación: contar los de más puntaje y ordenar para el top
+            mio = Progreso.objects.get(modulo=modulo, user_id=user_id).puntaje
+            Progreso.objects.filter(modulo=modulo, puntaje__gt=mio).count()
+            list(Progreso.objects.filter(modulo=modulo).order_by('-puntaje', 'user_id')
+                 .values_list('user_id', 'puntaje', 'user__perfil__nombre')[:clasificacion.POR_PAGINA])
+
+        def cacheada(_):
+            # Más los nombres de la página, como la vista
+            tabla = clasificacion.consultar(clasificacion.MODULO, modulo.id, user_id)
+            list(Perfil.objects.filter(user_id__in=[u for _, u, _ in tabla.filas]).values_list('user_id', 'nombre'))
+
+        cache.clear()
+        inicio = time.perf_counter()
+        cacheada(None)
+        self.stdout.write(f"{'primera consulta (armado)':<28} {(time.perf_counter() - inicio) * 1000:>10.1f} ms")
+        for nombre, funcion in (('SQL en cada consulta', sql), ('clasificación en caché', cacheada)):
+            with CaptureQueriesContext(connection) as capturadas:
+                resultado = medir(funcion, range(consultas))
+            self.imprimir(nombre, resultado, len(capturadas.captured_queries) / consultas)
+
+    def imprimir(self, nombre, tiempos, consultas=None):
+        p50, p95 = tiempos
+        extra = f'  {consultas:.1f} consultas' if consultas is not None else ''
+        self.stdout.write(f'{nombre:<28} p50 {p50:>10.1f} µs  p95 {p95:>10.1f} µs{extra}')
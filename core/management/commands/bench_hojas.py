@@ -0,0 +1,67 @@
+import statistics
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.shortcuts import render
+from django.template.loader import render_to_string
+from django.test import RequestFactory
+from django.utils.safestring import mark_safe
+
+from core.claves import PreguntaClave
+from core.models import Modulo
+
+
+def banco(total, modulos=5):
+    """{modulo: [PreguntaClave]} en memoria, sin tocar la base de datos."""
+    por_modulo = {Modulo(id=m + 1, nombre=f'Módulo {m + 1}'): [] for m in range(modulos)}
+    lista = list(por_modulo)
+    for i in range(total):
+        por_modulo[lista[i % modulos]].append(PreguntaClave(
+            i + 1, f'Pregunta {i + 1}: ¿cuál de estas prácticas es la más segura?',
+            'Usar la misma contraseña', 'Activar la verificación en dos pasos',
+            'Compartir la clave por correo', 'Desactivar el antivirus', 'B',
+        ))
+    return por_modulo
+
+
+class Command(BaseCommand):
+    help = 'Compara el render de la hoja de diagnóstico completa contra la hoja pre-renderizada en caché.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tamanos', default='10,500', help='Cantidades de preguntas separadas por comas.')
+        parser.add_argument('--repeticiones', type=int, default=50)
+
+    def handle(self, *args, **options):
+        peticion = RequestFactory().get('/diagnostico/')
+        peticion.user = AnonymousUser()
+        repeticiones = options['repeticiones']
+
+        for total in (int(t) for t in options['tamanos'].split(',')):
+            preguntas_por_modulo = banco(total)
+            clave = f'bench_hojas:{total}'
+
+            def sin_cache():
+                hoja = render_to_string('core/_hoja_diagnostico.html', {'preguntas_por_modulo': preguntas_por_modulo})
+                return render(peticion, 'core/diagnostico.html', {'hoja': mark_safe(hoja)})
+
+            def con_cache():
+                return render(peticion, 'core/diagnostico.html', {'hoja': mark_safe(cache.get(clave))})
+
+            cache.set(clave, render_to_string('core/_hoja_diagnostico.html', {'preguntas_por_modulo': preguntas_por_modulo}))
+            resultados = {}
+            for nombre, funcion in (('sin caché', sin_cache), ('con caché', con_cache)):
+                funcion()
+                tiempos = []
+                for _ in range(repeticiones):
+                    inicio = time.perf_counter()
+                    respuesta = funcion()
+                    tiempos.append((time.perf_counter() - inicio) * 1000)
+                resultados[nombre] = statistics.median(tiempos)
+                self.stdout.write(f'{total:>5} preguntas  {nombre:<10} p50 {resultados[nombre]:>8.3f} ms  '
+                                  f'{len(respuesta.content):>8} bytes')
+            cache.delete(clave)
+            self.stdout.write(self.style.SUCCESS(
+                f'{total:>5} preguntas  {resultados["sin caché"] / resultados["con caché"]:.1f}x más rápido con caché'
+            ))
@@ -0,0 +1,91 @@
+import threading
+import time
+import uuid
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.db.models import Count
+
+from core.management import exigir_base_local
+from core.calificacion import obtener_progreso, guardar_progresos
+from core.models import Modulo, Pregunta, Progreso
+
+# Palabras con las que cada motor indica que el plan usa un índice
+MARCAS_INDICE = ('Index Scan', 'Index Only Scan', 'Bitmap Index Scan', 'USING INDEX', 'USING COVERING INDEX')
+
+
+class Command(BaseCommand):
+    help = ('Lanza hilos concurrentes contra el upsert de Progreso, verifica que no '
+            'queden duplicados y muestra los planes de las consultas de calificación.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hilos', type=int, default=16)
+        parser.add_argument('--repeticiones', type=int, default=50)
+        parser.add_argument('--modulos', type=int, default=5)
+        parser.add_argument('--yes', action='store_true', help='Corre aunque la base no sea la de ANSSD_SQLITE.')
+
+    def handle(self, *args, **options):
+        exigir_base_local(options)
+        # Usuario nuevo con nombre único: al terminar solo se borra lo que creó el comando
+        user = User.objects.create_user(f'bench_progreso_{uuid.uuid4().hex[:12]}')
+        modulos = [
+            Modulo.objects.create(nombre=f'bench_progreso {i}', descripcion='benchmark')
+            for i in range(options['modulos'])
+        ]
+        try:
+            self.concurrencia(user, modulos, options['hilos'], options['repeticiones'])
+            self.planes(user, modulos[0])
+        finally:
+            Modulo.objects.filter(id__in=[m.id for m in modulos]).delete()
+            user.delete()
+
+    def concurrencia(self, user, modulos, hilos, repeticiones):
+        errores = []
+        barrera = threading.Barrier(hilos)
+
+        def trabajar(n):
+            try:
+                barrera.wait()
+                for i in range(repeticiones):
+                    modulo = modulos[(n + i) % len(modulos)]
+                    obtener_progreso(user, modulo)
+                    guardar_progresos(user, {m.id: {'puntaje': i % 11} for m in modulos})
+            except Exception as e:  # se reporta al final, no se detiene el resto
+                errores.append(repr(e))
+            finally:
+                connections.close_all()
+
+        inicio = time.perf_counter()
+        threads = [threading.Thread(target=trabajar, args=(n,)) for n in range(hilos)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        duracion = time.perf_counter() - inicio
+
+        operaciones = hilos * repeticiones * 2
+        duplicados = (
+            Progreso.objects.filter(user=user).values('modulo').annotate(n=Count('id')).filter(n__gt=1).count()
+        )
+        self.stdout.write(f'{hilos} hilos x {repeticiones} repeticiones: {operaciones} operaciones en '
+                          f'{duracion:.2f} s ({operaciones / duracion:.0f} op/s)')
+        self.stdout.write(f'Errores: {len(errores)}' + (f' (p. ej. {errores[0]})' if errores else ''))
+        estilo = self.style.SUCCESS if duplicados == 0 else self.style.ERROR
+        self.stdout.write(estilo(f'Pares (user, modulo) duplicados: {duplicados}'))
+
+    def planes(self, user, modulo):
+        consultas = {
+            'preguntas de examen por módulo': Pregunta.objects.filter(modulo=modulo, tipo_pregunta='E').order_by('id'),
+            'preguntas de diagnóstico': Pregunta.objects.filter(tipo_pregunta='D', modulo_id__in=[modulo.id]).order_by('modulo_id', 'id'),
+            'progreso de usuario y módulo': Progreso.objects.filter(user=user, modulo=modulo),
+            'progresos del usuario': Progreso.objects.filter(user=user).order_by('modulo__id'),
+        }
+        self.stdout.write(f'\nPlanes de consulta ({connection.vendor}):')
+        for nombre, queryset in consultas.items():
+            plan = queryset.explain()
+            usa_indice = any(marca in plan for marca in MARCAS_INDICE)
+            estilo = self.style.SUCCESS if usa_indice else self.style.WARNING
+            self.stdout.write(estilo(f"- {nombre}: {'índice' if usa_indice else 'SIN índice'}"))
+            for linea in plan.splitlines():
+                self.stdout.write(f'    {linea}')
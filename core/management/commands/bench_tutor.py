@@ -0,0 +1,72 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.conocimiento import IndiceTutor
+from core.models import EntradaTutor
+
+TEMAS = ('seguridad contraseña phishing correo excel word powerpoint nube red wifi vpn firewall '
+         'antivirus copia respaldo datos privacidad redes sociales videollamada equipo proyecto '
+         'documento hoja cálculo fórmula tabla gráfico presentación archivo carpeta navegador '
+         'búsqueda internet dispositivo móvil actualización software licencia servidor usuario').split()
+
+
+def vocabulario(tamano, azar):
+    """Temas reales más palabras inventadas, con frecuencias tipo Zipf como en texto real."""
+    silabas = ['ba', 'ce', 'di', 'fo', 'gu', 'la', 'me', 'ni', 'po', 'ra', 'se', 'ti', 'vo', 'za', 'qui', 'tra']
+    inventadas = {''.join(azar.choices(silabas, k=3)) for _ in range(tamano * 2)}
+    palabras = TEMAS + sorted(inventadas)[:tamano]
+    pesos = [1 / (rango + 1) for rango in range(len(palabras))]
+    return palabras, pesos
+
+
+def corpus_sintetico(n, semilla=7):
+    """n entradas (id, pregunta, respuesta) generadas de forma determinista."""
+    azar = random.Random(semilla)
+    palabras, pesos = vocabulario(max(500, n), azar)
+    entradas = []
+    for i in range(n):
+        pregunta = '¿Cómo ' + ' '.join(azar.choices(palabras, pesos, k=4)) + f' {i}?'
+        respuesta = ' '.join(azar.choices(palabras, pesos, k=25))
+        entradas.append((i, pregunta, respuesta))
+    return entradas
+
+
+class Command(BaseCommand):
+    help = 'Mide el tiempo de construcción del índice del tutor y la latencia de búsqueda según el tamaño.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tamanos', default='36,500,2000,5000,10000',
+                            help='Tamaños de corpus separados por comas.')
+        parser.add_argument('--consultas', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        azar = random.Random(11)
+        palabras, pesos = vocabulario(500, random.Random(7))
+        consultas = [' '.join(azar.choices(palabras, pesos, k=azar.randint(2, 5))) for _ in range(options['consultas'])]
+
+        self.stdout.write(f"{'entradas':>9} {'construcción':>13} {'p50':>9} {'p95':>9} {'máx':>9}")
+        for n in (int(t) for t in options['tamanos'].split(',')):
+            if n == 36:
+                entradas = list(EntradaTutor.objects.values_list('id', 'pregunta', 'respuesta'))
+            else:
+                entradas = corpus_sintetico(n)
+
+            inicio = time.perf_counter()
+            indice = IndiceTutor(entradas)
+            construccion = time.perf_counter() - inicio
+
+            tiempos = []
+            for consulta in consultas:
+                inicio = time.perf_counter()
+                indice.buscar(consulta, k=5)
+                tiempos.append((time.perf_counter() - inicio) * 1000)
+            tiempos.sort()
+            p95 = tiempos[int(len(tiempos) * 0.95) - 1]
+            estilo = self.style.SUCCESS if p95 < 1 else self.style.WARNING
+            self.stdout.write(estilo(
+                f'{len(indice):>9} {construccion * 1000:>10.1f} ms {statistics.median(tiempos):>6.3f} ms '
+                f'{p95:>6.3f} ms {tiempos[-1]:>6.3f} ms'
+            ))
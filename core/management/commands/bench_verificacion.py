@@ -0,0 +1,76 @@
+import logging
+import random
+import statistics
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core import verificacion
+from core.models import Certificado
+from .bench_vistas import percentil
+
+
+class Command(BaseCommand):
+    help = ('Mide el rendimiento de /verificar/<código>/ (peticiones por segundo, p50/p95 y consultas) '
+            'con códigos válidos sin caché y con caché, con firma falsa y firmados pero no emitidos. '
+            'Usa los certificados de sembrar_datos. Con la caché local de desarrollo (10000 entradas) '
+            'conviene no pasar de --codigos 10000 o configurar ANSSD_REDIS_URL.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--codigos', type=int, default=250, help='Códigos distintos por escenario.')
+        parser.add_argument('--semilla', type=int, default=7)
+
+    def handle(self, *args, **options):
+        creados = verificacion.emitir_completados()
+        if creados:
+            self.stdout.write(f'{creados} certificados registrados antes de medir')
+        validos = list(Certificado.objects.order_by('?').values_list('codigo', flat=True)[:options['codigos']])
+        if not validos:
+            raise CommandError('No hay certificados; ejecuta antes sembrar_datos.')
+
+        azar = random.Random(options['semilla'])
+        # Misma forma que un código real pero con la firma alterada, y códigos bien
+        # firmados de usuarios que no existen (p. ej. un certificado revocado)
+        falsos = [c[:-4] + ''.join(azar.choices('0123456789ABCDEF', k=4)) for c in validos]
+        falsos = [c for c in falsos if not verificacion.firma_valida(c)]
+        fecha = Certificado.objects.values_list('emitido', flat=True).first()
+        no_emitidos = [verificacion.codigo(10 ** 8 + i, 1, fecha) for i in range(len(validos))]
+
+        # Los 404 esperados de los códigos falsos no van al log
+        logging.getLogger('django.request').setLevel(logging.ERROR)
+        client = Client()
+        cache.clear()
+        escenarios = [
+            ('valido_sin_cache', validos),
+            ('valido_con_cache', validos),
+            ('firma_invalida', falsos),
+            ('no_emitido', no_emitidos),
+        ]
+        with override_settings(ALLOWED_HOSTS=['testserver']):
+            for nombre, codigos in escenarios:
+                r = self.medir(client, codigos)
+                self.stdout.write(f"{nombre:<18} {r['rps']:>8.0f} req/s  p50 {r['p50']:>6.3f} ms  "
+                                  f"p95 {r['p95']:>6.3f} ms  {r['consultas']:.2f} consultas/pet.  {r['codigos']}")
+
+    def medir(self, client, codigos):
+        tiempos, estados = [], set()
+        with CaptureQueriesContext(connection) as capturadas:
+            inicio_total = time.perf_counter()
+            for codigo in codigos:
+                inicio = time.perf_counter()
+                respuesta = client.get(reverse('verificar_certificado', args=[codigo]), {'formato': 'json'})
+                tiempos.append((time.perf_counter() - inicio) * 1000)
+                estados.add(respuesta.status_code)
+            total = time.perf_counter() - inicio_total
+        return {
+            'rps': len(codigos) / total,
+            'p50': statistics.median(tiempos),
+            'p95': percentil(tiempos, 95),
+            'consultas': len(capturadas.captured_queries) / len(codigos),
+            'codigos': sorted(estados),
+        }
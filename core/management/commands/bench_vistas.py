@@ -0,0 +1,154 @@
+import json
+import platform
+import statistics
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import django
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core import certificados
+from core.claves import claves
+from core.models import Modulo, Pregunta, Progreso
+from .sembrar_datos import PREFIJO
+
+# Diferencia mínima en ms para considerar una regresión de latencia (ruido de medición)
+UMBRAL_RUIDO_MS = 1.0
+
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    indice = max(0, min(len(ordenados) - 1, round(p / 100 * len(ordenados)) - 1))
+    return ordenados[indice]
+
+
+def escenarios(ctx):
+    """(nombre, método, url, datos, antes) de cada vista medida."""
+    respuestas_diagnostico = {f'pregunta_{p.id}': 'A' for m in ctx['modulos'] for p in claves.obtener(m.id, 'D')}
+    examen = reverse('examen_modulo', args=[ctx['pendiente'].id])
+    # Respuestas vacías: el examen se reprueba y el progreso no cambia entre repeticiones.
+    # Antes de cada envío se abre el examen, que sortea y congela sus preguntas en la sesión.
+    return [
+        ('home', 'get', reverse('home'), None, None),
+        ('diagnostico', 'get', reverse('diagnostico'), None, None),
+        ('diagnostico_post', 'post', reverse('diagnostico'), respuestas_diagnostico, None),
+        ('examen_modulo', 'get', examen, None, None),
+        ('examen_modulo_post', 'post', examen, {}, lambda: ctx['client'].get(examen)),
+        ('progreso', 'get', reverse('progreso'), None, None),
+        ('certificado', 'get', reverse('certificado', args=[ctx['completado'].id]), None, None),
+        ('certificado_sin_cache', 'get', reverse('certificado', args=[ctx['completado'].id]), None,
+         lambda: certificados.invalidar_usuario(ctx['user'].id)),
+    ]
+
+
+class Command(BaseCommand):
+    help = ('Mide p50/p95, consultas SQL y bytes de cada vista principal con el cliente de pruebas '
+            'sobre los datos de sembrar_datos, y guarda el resultado en JSON para comparar corridas.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeticiones', type=int, default=30)
+        parser.add_argument('--salida', help='Archivo JSON donde guardar los resultados.')
+        parser.add_argument('--comparar', help='JSON de una corrida anterior contra la cual buscar regresiones.')
+        parser.add_argument('--tolerancia', type=float, default=0.2,
+                            help='Aumento relativo de p95 tolerado antes de marcar regresión (0.2 = 20%%).')
+        parser.add_argument('--solo', help='Nombres de escenarios separados por comas.')
+
+    def handle(self, *args, **options):
+        ctx = self.contexto()
+        client = ctx['client'] = Client()
+        client.force_login(ctx['user'])
+        solo = set(options['solo'].split(',')) if options['solo'] else None
+
+        resultados = {}
+        with tempfile.TemporaryDirectory() as cache_pdf, \
+                override_settings(ALLOWED_HOSTS=['testserver'], CERTIFICADOS_CACHE_DIR=cache_pdf):
+            for nombre, metodo, url, datos, antes in escenarios(ctx):
+                if solo and nombre not in solo:
+                    continue
+                resultados[nombre] = self.medir(client, metodo, url, datos, antes, options['repeticiones'])
+                self.imprimir(nombre, resultados[nombre])
+
+        informe = {
+            'fecha': datetime.now(timezone.utc).isoformat(),
+            'entorno': {
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'base_de_datos': connection.vendor,
+                'usuarios': User.objects.filter(username__startswith=PREFIJO).count(),
+                'modulos': len(ctx['modulos']),
+                'preguntas': Pregunta.objects.count(),
+                'repeticiones': options['repeticiones'],
+            },
+            'vistas': resultados,
+        }
+        if options['salida']:
+            with open(options['salida'], 'w', encoding='utf-8') as f:
+                json.dump(informe, f, indent=2, ensure_ascii=False)
+            self.stdout.write(f"Resultados guardados en {options['salida']}")
+
+        if options['comparar']:
+            self.comparar(informe, options['comparar'], options['tolerancia'])
+
+    def contexto(self):
+        modulos = list(Modulo.objects.order_by('id'))
+        # Un usuario sembrado con al menos un módulo aprobado y uno pendiente
+        for user in User.objects.filter(username__startswith=PREFIJO).order_by('id').iterator():
+            progresos = list(Progreso.objects.filter(user=user).select_related('modulo'))
+            completado = next((p.modulo for p in progresos if p.completado), None)
+            pendiente = next((p.modulo for p in progresos if not p.completado), None)
+            if completado and pendiente:
+                return {'user': user, 'modulos': modulos, 'completado': completado, 'pendiente': pendiente}
+        raise CommandError('No hay datos sembrados adecuados; ejecuta antes sembrar_datos.')
+
+    def medir(self, client, metodo, url, datos, antes, repeticiones):
+        tiempos, consultas, tamanos, codigos = [], [], [], set()
+        # La primera petición calienta cachés y no se cuenta
+        for i in range(repeticiones + 1):
+            if antes:
+                antes()
+            with CaptureQueriesContext(connection) as capturadas:
+                inicio = time.perf_counter()
+                respuesta = getattr(client, metodo)(url, datos or {})
+                cuerpo = b''.join(respuesta.streaming_content) if respuesta.streaming else respuesta.content
+                duracion = (time.perf_counter() - inicio) * 1000
+            if i == 0:
+                continue
+            tiempos.append(duracion)
+            consultas.append(len(capturadas.captured_queries))
+            tamanos.append(len(cuerpo))
+            codigos.add(respuesta.status_code)
+        return {
+            'p50_ms': round(statistics.median(tiempos), 3),
+            'p95_ms': round(percentil(tiempos, 95), 3),
+            'media_ms': round(statistics.fmean(tiempos), 3),
+            'consultas': max(consultas),
+            'bytes': max(tamanos),
+            'codigos': sorted(codigos),
+        }
+
+    def imprimir(self, nombre, r):
+        self.stdout.write(f"{nombre:<24} p50 {r['p50_ms']:>8.2f} ms  p95 {r['p95_ms']:>8.2f} ms  "
+                          f"{r['consultas']:>3} consultas  {r['bytes']:>8} bytes  {r['codigos']}")
+
+    def comparar(self, informe, ruta, tolerancia):
+        with open(ruta, encoding='utf-8') as f:
+            anterior = json.load(f)['vistas']
+        regresiones = []
+        for nombre, actual in informe['vistas'].items():
+            previo = anterior.get(nombre)
+            if previo is None:
+                continue
+            limite = previo['p95_ms'] * (1 + tolerancia)
+            if actual['p95_ms'] > limite and actual['p95_ms'] - previo['p95_ms'] > UMBRAL_RUIDO_MS:
+                regresiones.append(f"{nombre}: p95 {previo['p95_ms']} -> {actual['p95_ms']} ms")
+            if actual['consultas'] > previo['consultas']:
+                regresiones.append(f"{nombre}: consultas {previo['consultas']} -> {actual['consultas']}")
+        if regresiones:
+            raise CommandError('Regresiones detectadas:\n  ' + '\n  '.join(regresiones))
+        self.stdout.write(self.style.SUCCESS(f'Sin regresiones respecto a {ruta}.'))
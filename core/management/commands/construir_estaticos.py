@@ -0,0 +1,50 @@
+import time
+
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+
+from core import estaticos
+
+
+class Command(BaseCommand):
+    help = ('Recolecta los estáticos en STATIC_ROOT minificados, con hash en el nombre y con variantes '
+            'gzip/brotli (collectstatic con AlmacenEstaticos) y muestra cuánto ocupa cada paso. '
+            'Reinicia el servidor después para que EstaticosMiddleware vea los archivos nuevos.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limpiar', action='store_true', help='Vacía STATIC_ROOT antes de recolectar.')
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        call_command('collectstatic', interactive=False, clear=options['limpiar'], verbosity=0)
+        duracion = time.perf_counter() - inicio
+        if estaticos.brotli is None:
+            self.stderr.write(self.style.WARNING('brotli no está instalado: solo se generó gzip.'))
+
+        self.stdout.write(f"{'archivo':<40} {'original':>9} {'minificado':>11} {'gzip':>8} {'brotli':>8}")
+        for nombre, con_hash in sorted(staticfiles_storage.hashed_files.items()):
+            if estaticos.minificador_para(nombre) is None:
+                continue
+            original = finders.find(nombre)
+            tamanos = [
+                _tamano(lambda: open(original, 'rb')),
+                _tamano(lambda: staticfiles_storage.open(con_hash)),
+                _tamano(lambda: staticfiles_storage.open(con_hash + '.gz')),
+                _tamano(lambda: staticfiles_storage.open(con_hash + '.br')),
+            ]
+            self.stdout.write(f'{con_hash:<40} ' + ' '.join(
+                f'{t:>{ancho}}' if t is not None else f"{'—':>{ancho}}" for t, ancho in zip(tamanos, (9, 11, 8, 8))
+            ))
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(staticfiles_storage.hashed_files)} archivos con hash en {duracion:.2f} s'
+        ))
+
+
+def _tamano(abrir):
+    try:
+        with abrir() as archivo:
+            return len(archivo.read())
+    except (FileNotFoundError, OSError):
+        return None
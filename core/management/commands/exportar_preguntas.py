@@ -0,0 +1,42 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+
+from core import banco
+from core.models import Pregunta
+
+
+class Command(BaseCommand):
+    help = 'Exporta el banco de preguntas a CSV o JSON Lines sin cargarlo entero en memoria.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--modulo', type=int, help='Solo este módulo (id).')
+        parser.add_argument('--tipo', choices=('D', 'E'))
+        parser.add_argument('--formato', choices=banco.FORMATOS, default='csv')
+        parser.add_argument('--lote', type=int, default=banco.TAM_LOTE, help='Filas leídas por consulta.')
+        parser.add_argument('--salida', help='Archivo a escribir (por defecto, la salida estándar).')
+
+    def handle(self, *args, **options):
+        preguntas = Pregunta.objects.all()
+        if options['modulo']:
+            preguntas = preguntas.filter(modulo_id=options['modulo'])
+        if options['tipo']:
+            preguntas = preguntas.filter(tipo_pregunta=options['tipo'])
+
+        salida = open(options['salida'], 'w', encoding='utf-8', newline='') if options['salida'] else sys.stdout
+        inicio = time.perf_counter()
+        filas = 0
+        try:
+            for linea in banco.exportar(preguntas, options['formato'], options['lote']):
+                salida.write(linea)
+                filas += 1
+        finally:
+            if options['salida']:
+                salida.close()
+        duracion = time.perf_counter() - inicio
+
+        if options['formato'] == 'csv':
+            filas -= 1  # cabecera
+        por_segundo = filas / duracion if duracion > 0 else 0
+        self.stderr.write(self.style.SUCCESS(f'{filas} preguntas en {duracion:.2f} s ({por_segundo:.0f} filas/s)'))
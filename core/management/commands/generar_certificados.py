@@ -0,0 +1,33 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand
+
+from core import certificados
+
+
+class Command(BaseCommand):
+    help = 'Genera en un ZIP todos los certificados aprobados de un cargo y/o módulo.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cargo', help='Solo usuarios con este Perfil.cargo (p. ej. FINANZAS).')
+        parser.add_argument('--modulo', type=int, help='Solo este módulo (id).')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Procesos para renderizar los PDF (por defecto, uno por núcleo).')
+        parser.add_argument('--lote', type=int, default=100,
+                            help='Progresos leídos y renderizados por bloque.')
+        parser.add_argument('--salida', default='certificados.zip', help='Ruta del ZIP a escribir.')
+
+    def handle(self, *args, **options):
+        progresos = certificados.progresos_completados(options['cargo'], options['modulo'])
+        archivos = certificados.pdfs_en_lotes(progresos, workers=options['workers'], tam_lote=options['lote'])
+
+        inicio = time.perf_counter()
+        total = certificados.escribir_zip(archivos, options['salida'])
+        duracion = time.perf_counter() - inicio
+
+        por_segundo = total / duracion if duracion > 0 else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"{total} certificados en {duracion:.2f} s ({por_segundo:.1f} PDF/s, "
+            f"{options['workers']} workers) -> {options['salida']}"
+        ))
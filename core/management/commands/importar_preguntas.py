@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core import banco
+
+
+class Command(BaseCommand):
+    help = ('Importa preguntas desde un CSV o JSON Lines, validando fila por fila y guardando en '
+            'bloques. Las filas con id existente se actualizan; las demás se crean.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo')
+        parser.add_argument('--formato', choices=banco.FORMATOS,
+                            help='Por defecto se deduce de la extensión (.jsonl o .csv).')
+        parser.add_argument('--lote', type=int, default=banco.TAM_LOTE, help='Filas por transacción.')
+        parser.add_argument('--sin-ids', action='store_true',
+                            help='Ignora la columna id y crea todas las preguntas como nuevas.')
+
+    def handle(self, *args, **options):
+        formato = options['formato'] or ('jsonl' if options['archivo'].endswith(('.jsonl', '.json')) else 'csv')
+        try:
+            archivo = open(options['archivo'], encoding='utf-8-sig', newline='')
+        except OSError as e:
+            raise CommandError(f'No se pudo abrir {options["archivo"]}: {e}')
+        with archivo:
+            resultado = banco.importar(banco.leer(archivo, formato), tam_lote=options['lote'],
+                                       usar_ids=not options['sin_ids'])
+
+        for numero, mensaje in resultado.errores:
+            self.stderr.write(f'línea {numero}: {mensaje}')
+        if resultado.con_error > len(resultado.errores):
+            self.stderr.write(f'... y {resultado.con_error - len(resultado.errores)} errores más')
+        estilo = self.style.SUCCESS if not resultado.con_error else self.style.WARNING
+        self.stdout.write(estilo(str(resultado)))
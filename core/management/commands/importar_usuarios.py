@@ -0,0 +1,73 @@
+import csv
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import altas
+
+
+class ArchivoCredenciales:
+    """CSV de las contraseñas generadas: se crea (solo legible por el dueño) con la primera que llega."""
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self.salida = None
+
+    def __call__(self, generadas):
+        if self.salida is None:
+            descriptor = os.open(self.ruta, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+            self.salida = os.fdopen(descriptor, 'w', encoding='utf-8', newline='')
+            self.escritor = csv.writer(self.salida)
+            self.escritor.writerow(['username', 'contrasena'])
+        self.escritor.writerows(generadas)
+        # El bloque ya está confirmado: sus contraseñas no pueden quedar solo en el buffer
+        self.salida.flush()
+
+    def cerrar(self):
+        if self.salida is not None:
+            self.salida.close()
+
+
+class Command(BaseCommand):
+    help = ('Da de alta usuarios con su Perfil desde un CSV (nombre, apellido, cargo, correo y, opcionales, '
+            'username y contrasena). Las contraseñas se hashean en varios procesos y se guarda por bloques.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo')
+        parser.add_argument('--lote', type=int, default=altas.TAM_LOTE, help='Filas por transacción.')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Procesos para hashear contraseñas (por defecto, uno por núcleo).')
+        parser.add_argument('--existentes', choices=altas.EXISTENTES, default='saltar',
+                            help='Qué hacer con los username que ya existen.')
+        parser.add_argument('--credenciales', required=True,
+                            help='Archivo nuevo donde escribir las contraseñas generadas para las filas que no '
+                                 'traen una; se crea legible solo por el dueño y nunca se sobrescribe.')
+
+    def handle(self, *args, **options):
+        # Antes de importar: si no se pudiera escribir después, las contraseñas se perderían
+        if os.path.lexists(options['credenciales']):
+            raise CommandError(f'{options["credenciales"]} ya existe; elige otro archivo para las credenciales.')
+        try:
+            archivo = open(options['archivo'], encoding='utf-8-sig', newline='')
+        except OSError as e:
+            raise CommandError(f'No se pudo abrir {options["archivo"]}: {e}')
+        credenciales = ArchivoCredenciales(options['credenciales'])
+        try:
+            with archivo:
+                resultado = altas.importar(altas.leer(archivo), tam_lote=options['lote'],
+                                           existentes=options['existentes'], workers=max(1, options['workers']),
+                                           credenciales=credenciales)
+        finally:
+            credenciales.cerrar()
+
+        if resultado.generadas:
+            self.stdout.write(self.style.WARNING(
+                f'{resultado.generadas} contraseñas generadas en {options["credenciales"]}: '
+                'entrégalas y borra el archivo.'
+            ))
+        for numero, mensaje in resultado.errores:
+            self.stderr.write(f'línea {numero}: {mensaje}')
+        if resultado.con_error > len(resultado.errores):
+            self.stderr.write(f'... y {resultado.con_error - len(resultado.errores)} errores más')
+        estilo = self.style.SUCCESS if not resultado.con_error else self.style.WARNING
+        self.stdout.write(estilo(str(resultado)))
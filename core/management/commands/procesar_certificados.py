@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core import trabajos
+
+
+class Command(BaseCommand):
+    help = ('Worker de la cola de certificados: dibuja en la caché en disco los PDF encolados al aprobar '
+            'un examen. Se pueden correr varios a la vez; cada uno toma trabajos distintos.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=20, help='Trabajos tomados por vuelta.')
+        parser.add_argument('--pausa', type=float, default=1.0,
+                            help='Segundos de espera cuando la cola está vacía.')
+        parser.add_argument('--una-vez', action='store_true', help='Vacía la cola y termina.')
+        parser.add_argument('--encolar-completados', action='store_true',
+                            help='Encola antes los módulos aprobados que no tienen trabajo (p. ej. tras una carga).')
+
+    def handle(self, *args, **options):
+        if options['encolar_completados']:
+            self.stdout.write(f'{trabajos.encolar_completados()} certificados encolados')
+        try:
+            while True:
+                # Un worker de larga vida no debe quedarse con conexiones vencidas
+                close_old_connections()
+                tomados = trabajos.tomar(options['lote'])
+                if not tomados:
+                    if options['una_vez']:
+                        break
+                    time.sleep(options['pausa'])
+                    continue
+                inicio = time.perf_counter()
+                listos = sum(trabajos.procesar(trabajo) for trabajo in tomados)
+                duracion = time.perf_counter() - inicio
+                estilo = self.style.SUCCESS if listos == len(tomados) else self.style.WARNING
+                self.stdout.write(estilo(f'{listos}/{len(tomados)} certificados listos en {duracion:.2f} s'))
+        except KeyboardInterrupt:
+            self.stdout.write('Worker detenido.')
@@ -0,0 +1,16 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core import reportes
+
+
+class Command(BaseCommand):
+    help = ('Recalcula desde cero el resumen por cargo y módulo (ResumenCargo) a partir de Progreso. '
+            'Úsalo tras cargas masivas sin señales o si se sospecha que los totales derivaron.')
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        filas = reportes.reconstruir()
+        duracion = time.perf_counter() - inicio
+        self.stdout.write(self.style.SUCCESS(f'{filas} filas de resumen en {duracion:.2f} s'))
@@ -0,0 +1,95 @@
+import random
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core import clasificacion, claves, reportes, verificacion
+from core.management import exigir_base_local
+from core.models import CARGO_CHOICES, Perfil, Modulo, Pregunta, Progreso
+
+PREFIJO = 'bench_'
+CONTRASENA = 'bench-anssd-2024'
+LETRAS = 'ABCD'
+
+
+class Command(BaseCommand):
+    help = ('Crea de forma determinista N usuarios con Perfil, M módulos y K preguntas por tipo '
+            'para pruebas de carga. Pensado para una base local: ANSSD_SQLITE=bench.sqlite3.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--usuarios', type=int, default=100)
+        parser.add_argument('--modulos', type=int, default=3)
+        parser.add_argument('--preguntas', type=int, default=10, help='Preguntas por tipo (D y E) y por módulo.')
+        parser.add_argument('--semilla', type=int, default=2024)
+        parser.add_argument('--limpiar', action='store_true', help='Borra antes los datos sembrados.')
+        parser.add_argument('--lote', type=int, default=1000)
+        parser.add_argument('--yes', action='store_true', help='Corre aunque la base no sea la de ANSSD_SQLITE.')
+
+    def handle(self, *args, **options):
+        exigir_base_local(options)
+        azar = random.Random(options['semilla'])
+        lote = options['lote']
+        inicio = time.perf_counter()
+
+        with transaction.atomic():
+            if options['limpiar']:
+                User.objects.filter(username__startswith=PREFIJO).delete()
+                Modulo.objects.filter(nombre__startswith=PREFIJO).delete()
+
+            elif User.objects.filter(username__startswith=PREFIJO).exists():
+                raise CommandError('Ya hay datos sembrados; usa --limpiar para reemplazarlos.')
+
+            Modulo.objects.bulk_create([
+                Modulo(nombre=f'{PREFIJO}módulo {i:03d}', descripcion=f'Módulo de prueba número {i}')
+                for i in range(options['modulos'])
+            ])
+            modulos = list(Modulo.objects.filter(nombre__startswith=PREFIJO).order_by('id'))
+
+            Pregunta.objects.bulk_create((
+                Pregunta(
+                    modulo=modulo, tipo_pregunta=tipo,
+                    texto=f'Pregunta {tipo}{k} del {modulo.nombre}: ¿cuál es la opción correcta?',
+                    opcion_a='Opción A', opcion_b='Opción B', opcion_c='Opción C', opcion_d='Opción D',
+                    respuesta_correcta=azar.choice(LETRAS),
+                )
+                for modulo in modulos for tipo in ('D', 'E') for k in range(options['preguntas'])
+            ), batch_size=lote)
+
+            # Un solo hash para todos: PBKDF2 por usuario dominaría el tiempo de siembra
+            clave = make_password(CONTRASENA)
+            User.objects.bulk_create((
+                User(username=f'{PREFIJO}{i:06d}', password=clave, email=f'{PREFIJO}{i:06d}@anssd.test')
+                for i in range(options['usuarios'])
+            ), batch_size=lote)
+            usuarios = list(User.objects.filter(username__startswith=PREFIJO).order_by('id'))
+
+            cargos = [c for c, _ in CARGO_CHOICES if c != 'SELECCIONE']
+            Perfil.objects.bulk_create((
+                Perfil(user=u, nombre=f'Nombre{i}', apellido=f'Apellido{i}', cargo=azar.choice(cargos), correo=u.email)
+                for i, u in enumerate(usuarios)
+            ), batch_size=lote)
+
+            preguntas = options['preguntas']
+            progresos = []
+            for u in usuarios:
+                for m in modulos:
+                    puntaje = azar.randint(0, preguntas)
+                    progresos.append(Progreso(user=u, modulo=m, puntaje=puntaje, completado=puntaje >= 0.7 * preguntas))
+            Progreso.objects.bulk_create(progresos, batch_size=lote)
+
+        # bulk_create no dispara señales: se invalidan a mano la caché de claves
+        # y las clasificaciones, y se recalculan el resumen por cargo y el
+        # registro de certificados
+        claves.invalidar()
+        clasificacion.invalidar_todas()
+        reportes.reconstruir()
+        verificacion.emitir_completados()
+
+        duracion = time.perf_counter() - inicio
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(usuarios)} usuarios, {len(modulos)} módulos y {len(modulos) * preguntas * 2} preguntas "
+            f"en {duracion:.2f} s (contraseña: {CONTRASENA})"
+        ))
@@ -0,0 +1,221 @@
+"""Instrumentación por petición y métricas agregadas en el proceso.
+
+MetricasMiddleware mide en cada petición el número y tiempo de consultas SQL
+(con un execute_wrapper instalado en cada conexión), el tiempo de render de plantillas
+(con el backend PlantillasDjango configurado en TEMPLATES), el tiempo de PDF
+(ReportLab) y el tiempo total de la vista. Lo devuelve en la cabecera
+Server-Timing y lo acumula por nombre de URL en histogramas que la vista
+`metricas` expone en formato de texto de Prometheus.
+
+Cualquier parte del código puede sumar su propio tramo con `medir(nombre)` y
+contar eventos (aciertos y fallos de caché, por ejemplo) con `contar(evento)`.
+"""
+import bisect
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.template.backends.django import DjangoTemplates, Template
+
+# Límites superiores (segundos) de los buckets del histograma de duración
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Medicion:
+    """Tramos ({'sql': s, 'plantilla': s, ...}) y consultas de la petición en curso."""
+
+    def __init__(self):
+        self.tiempos = defaultdict(float)
+        self.consultas = 0
+        self.inicio = perf_counter()
+
+
+# Es una ContextVar y no un atributo de la conexión: bajo ASGI el ORM corre en
+# hilos de sync_to_async, que heredan el contexto de la petición.
+_medicion = ContextVar('anssd_medicion', default=None)
+
+
+@contextmanager
+def medir(nombre):
+    """Suma la duración del bloque al tramo `nombre` de la petición en curso."""
+    medicion = _medicion.get()
+    if medicion is None:
+        yield
+        return
+    inicio = perf_counter()
+    try:
+        yield
+    finally:
+        medicion.tiempos[nombre] += perf_counter() - inicio
+
+
+def _envolver_sql(execute, sql, params, many, context):
+    medicion = _medicion.get()
+    if medicion is None:
+        return execute(sql, params, many, context)
+    inicio = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        medicion.tiempos['sql'] += perf_counter() - inicio
+        medicion.consultas += 1
+
+
+@receiver(connection_created, dispatch_uid='anssd_medicion_sql')
+def instalar_medicion_sql(connection, **kwargs):
+    # Cada conexión (de cualquier hilo) queda medida al abrirse
+    if _envolver_sql not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_envolver_sql)
+
+
+class Registro:
+    """Histogramas y contadores por vista, protegidos por un lock."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.limpiar()
+
+    def limpiar(self):
+        with self._lock:
+            self.buckets = defaultdict(lambda: [0] * (len(BUCKETS) + 1))
+            self.cantidad = defaultdict(int)
+            self.suma = defaultdict(float)
+            self.consultas = defaultdict(int)
+            self.tramos = defaultdict(float)  # (vista, tramo) -> segundos
+            self.estados = defaultdict(int)  # (vista, código) -> peticiones
+            self.eventos = defaultdict(int)  # evento -> veces
+
+    def registrar(self, vista, estado, duracion, consultas, tramos):
+        with self._lock:
+            self.buckets[vista][bisect.bisect_left(BUCKETS, duracion)] += 1
+            self.cantidad[vista] += 1
+            self.suma[vista] += duracion
+            self.consultas[vista] += consultas
+            self.estados[(vista, estado)] += 1
+            for tramo, segundos in tramos.items():
+                self.tramos[(vista, tramo)] += segundos
+
+    def contar(self, evento, cantidad=1):
+        with self._lock:
+            self.eventos[evento] += cantidad
+
+    def prometheus(self):
+        with self._lock:
+            lineas = [
+                '# HELP anssd_request_duration_seconds Duración de la vista por nombre de URL.',
+                '# TYPE anssd_request_duration_seconds histogram',
+            ]
+            for vista in sorted(self.buckets):
+                acumulado = 0
+                for limite, n in zip(BUCKETS + ('+Inf',), self.buckets[vista]):
+                    acumulado += n
+                    lineas.append(f'anssd_request_duration_seconds_bucket{{vista="{vista}",le="{limite}"}} {acumulado}')
+                lineas.append(f'anssd_request_duration_seconds_sum{{vista="{vista}"}} {self.suma[vista]:.6f}')
+                lineas.append(f'anssd_request_duration_seconds_count{{vista="{vista}"}} {self.cantidad[vista]}')
+
+            lineas += [
+                '# HELP anssd_requests_total Peticiones por vista y código de estado.',
+                '# TYPE anssd_requests_total counter',
+            ]
+            for (vista, estado), n in sorted(self.estados.items()):
+                lineas.append(f'anssd_requests_total{{vista="{vista}",codigo="{estado}"}} {n}')
+
+            lineas += [
+                '# HELP anssd_sql_queries_total Consultas SQL ejecutadas por vista.',
+                '# TYPE anssd_sql_queries_total counter',
+            ]
+            for vista, n in sorted(self.consultas.items()):
+                lineas.append(f'anssd_sql_queries_total{{vista="{vista}"}} {n}')
+
+            lineas += [
+                '# HELP anssd_tramo_seconds_total Tiempo acumulado por tramo (sql, plantilla, pdf...) y vista.',
+                '# TYPE anssd_tramo_seconds_total counter',
+            ]
+            for (vista, tramo), segundos in sorted(self.tramos.items()):
+                lineas.append(f'anssd_tramo_seconds_total{{vista="{vista}",tramo="{tramo}"}} {segundos:.6f}')
+
+            lineas += [
+                '# HELP anssd_eventos_total Eventos contados por la aplicación (p. ej. aciertos de caché).',
+                '# TYPE anssd_eventos_total counter',
+            ]
+            for evento, n in sorted(self.eventos.items()):
+                lineas.append(f'anssd_eventos_total{{evento="{evento}"}} {n}')
+        return '\n'.join(lineas) + '\n'
+
+
+registro = Registro()
+
+
+def contar(evento, cantidad=1):
+    registro.contar(evento, cantidad)
+
+
+class MetricasMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        # Las conexiones abiertas antes de cargar este módulo se cubren a mano
+        for conexion in connections.all(initialized_only=True):
+            instalar_medicion_sql(conexion)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        medicion = Medicion()
+        token = _medicion.set(medicion)
+        try:
+            response = self.get_response(request)
+        finally:
+            _medicion.reset(token)
+        return self.terminar(request, response, medicion)
+
+    async def __acall__(self, request):
+        medicion = Medicion()
+        token = _medicion.set(medicion)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _medicion.reset(token)
+        return self.terminar(request, response, medicion)
+
+    def terminar(self, request, response, medicion):
+        total = perf_counter() - medicion.inicio
+        tiempos = medicion.tiempos
+
+        match = getattr(request, 'resolver_match', None)
+        vista = (match.url_name or match.view_name) if match else 'sin_ruta'
+        registro.registrar(vista, response.status_code, total, medicion.consultas, tiempos)
+
+        partes = [f'sql;dur={tiempos["sql"] * 1000:.1f};desc="{medicion.consultas} consultas"']
+        partes += [f'{tramo};dur={seg * 1000:.1f}' for tramo, seg in tiempos.items() if tramo != 'sql']
+        partes.append(f'total;dur={total * 1000:.1f}')
+        response['Server-Timing'] = ', '.join(partes)
+        return response
+
+
+class PlantillaMedida(Template):
+
+    def render(self, context=None, request=None):
+        with medir('plantilla'):
+            return super().render(context, request)
+
+
+class PlantillasDjango(DjangoTemplates):
+    """Backend de plantillas de Django que mide el tiempo de render."""
+
+    def from_string(self, template_code):
+        return PlantillaMedida(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        plantilla = super().get_template(template_name)
+        return PlantillaMedida(plantilla.template, self)
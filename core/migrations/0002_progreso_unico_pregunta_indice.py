@@ -0,0 +1,37 @@
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def eliminar_duplicados(apps, schema_editor):
+    # Conserva un progreso por (user, modulo): el completado y con más puntaje
+    Progreso = apps.get_model('core', 'Progreso')
+    duplicados = (
+        Progreso.objects.values('user_id', 'modulo_id')
+        .annotate(cantidad=Count('id'))
+        .filter(cantidad__gt=1)
+    )
+    for grupo in duplicados.iterator():
+        filas = Progreso.objects.filter(
+            user_id=grupo['user_id'], modulo_id=grupo['modulo_id']
+        ).order_by('-completado', '-puntaje', 'id')
+        conservar = filas.values_list('id', flat=True)[0]
+        filas.exclude(id=conservar).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(eliminar_duplicados, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='progreso',
+            constraint=models.UniqueConstraint(fields=('user', 'modulo'), name='progreso_user_modulo_unico'),
+        ),
+        migrations.AddIndex(
+            model_name='pregunta',
+            index=models.Index(fields=['modulo', 'tipo_pregunta'], name='pregunta_modulo_tipo_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.0 on 2026-10-18 06:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_progreso_unico_pregunta_indice'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EntradaTutor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pregunta', models.CharField(max_length=255, unique=True)),
+                ('respuesta', models.TextField()),
+                ('activa', models.BooleanField(default=True)),
+            ],
+            options={
+                'ordering': ['id'],
+            },
+        ),
+    ]
@@ -0,0 +1,65 @@
+from django.db import migrations
+
+# Respuestas que antes estaban fijas en la vista `tutor`
+RESPUESTAS_INICIALES = {
+    '¿Qué es seguridad digital?': 'Es el conjunto de prácticas y herramientas para proteger información en línea, como contraseñas seguras y evitar phishing.',
+    '¿Cómo usar Excel?': 'Empieza con fórmulas básicas como =SUMA(A1:A10) para sumar celdas.',
+    '¿Cómo redactar un correo profesional?': 'Usa un saludo formal, estructura clara (introducción, cuerpo, cierre) y revisa la ortografía.',
+    '¿Qué es phishing?': 'Es un intento fraudulento de obtener información sensible haciéndose pasar por una entidad confiable en una comunicación electrónica.',
+    '¿Cómo crear una contraseña segura?': 'Usa una combinación de letras mayúsculas, minúsculas, números y símbolos. Evita palabras comunes y usa al menos 12 caracteres.',
+    '¿Qué es una VPN?': 'Una VPN (Red Privada Virtual) cifra tu conexión a internet para proteger tu privacidad y datos en línea.',
+    '¿Cómo hacer una presentación efectiva?': 'Usa diapositivas claras, con imágenes relevantes, y practica tu discurso para mantener la atención de la audiencia.',
+    '¿Qué es el almacenamiento en la nube?': 'Es un servicio que permite guardar datos en servidores remotos accesibles desde internet, facilitando el acceso y la colaboración.',
+    '¿Cómo evitar el spam en el correo?': 'No compartas tu correo en sitios públicos, usa filtros de spam y no respondas a correos sospechosos.',
+    '¿Qué es el software libre?': 'Es software que puede ser usado, modificado y distribuido libremente por cualquier persona.',
+    '¿Cómo hacer una copia de seguridad?': 'Usa servicios en la nube o dispositivos externos para guardar copias de tus archivos importantes regularmente.',
+    '¿Qué es la autenticación de dos factores?': 'Es un método de seguridad que requiere dos formas de verificación para acceder a una cuenta, como una contraseña y un código enviado a tu teléfono.',
+    '¿Cómo mejorar la comunicación en equipo?': 'Usa herramientas colaborativas, establece canales claros de comunicación y fomenta la retroalimentación constructiva.',
+    '¿Qué es un firewall?': 'Es una barrera de seguridad que monitorea y controla el tráfico de red entrante y saliente basado en reglas de seguridad predefinidas.',
+    '¿Cómo organizar archivos digitales?': 'Usa carpetas con nombres claros, etiquetas y realiza limpiezas periódicas para eliminar archivos innecesarios.',
+    '¿Qué es el teletrabajo?': 'Es la modalidad de trabajo que permite realizar tareas laborales desde cualquier lugar fuera de la oficina, generalmente usando tecnología digital.',
+    '¿Cómo usar PowerPoint?': 'Crea diapositivas con títulos claros, usa listas con viñetas y añade imágenes para hacerlas más atractivas.',
+    '¿Qué es el Big Data?': 'Es el manejo y análisis de grandes volúmenes de datos para descubrir patrones, tendencias y asociaciones.',
+    '¿Cómo proteger mi privacidad en redes sociales?': 'Ajusta la configuración de privacidad, no compartas información personal y sé selectivo con tus contactos.',
+    '¿Qué es el Internet de las Cosas (IoT)?': 'Es la interconexión de dispositivos físicos a internet, permitiendo enviar y recibir datos para mejorar la eficiencia y funcionalidad.',
+    '¿Cómo usar Word?': 'Usa estilos para títulos, revisa la ortografía y aprovecha las plantillas para documentos comunes.',
+    '¿Qué es la inteligencia artificial?': 'Es la simulación de procesos de inteligencia humana por parte de máquinas, especialmente sistemas informáticos.',
+    '¿Cómo hacer videollamadas efectivas?': 'Asegúrate de tener buena iluminación, un fondo adecuado y prueba tu equipo antes de la llamada.',
+    '¿Qué es el blockchain?': 'Es una tecnología de registro distribuido que asegura la integridad y transparencia de las transacciones digitales.',
+    '¿Cómo gestionar el tiempo usando herramientas digitales?': 'Usa calendarios en línea, aplicaciones de tareas y establece recordatorios para mantenerte organizado.',
+    '¿Qué es el machine learning?': 'Es una rama de la inteligencia artificial que permite a las máquinas aprender de los datos y mejorar su rendimiento sin ser programadas explícitamente.',
+    '¿Cómo colaborar en documentos en línea?': 'Usa plataformas como Google Docs o Microsoft OneDrive que permiten la edición simultánea y comentarios en tiempo real.',
+    '¿Qué es la realidad aumentada?': 'Es una tecnología que superpone información digital (imágenes, sonidos) en el mundo real a través de dispositivos como smartphones o gafas especiales.',
+    '¿Cómo mantener mi computadora segura?': 'Mantén tu software actualizado, usa antivirus y evita descargar archivos de fuentes no confiables.',
+    '¿Qué es el SaaS (Software como Servicio)?': 'Es un modelo de distribución de software donde las aplicaciones se alojan en la nube y se accede a ellas a través de internet.',
+    '¿Cómo usar herramientas de gestión de proyectos?': 'Utiliza plataformas como Trello o Asana para organizar tareas, asignar responsabilidades y seguir el progreso del equipo.',
+    '¿Qué es la computación en la nube?': 'Es el uso de servidores remotos en internet para almacenar, gestionar y procesar datos, en lugar de hacerlo en un servidor local o una computadora personal.',
+    '¿Cómo hacer búsquedas efectivas en internet?': 'Usa palabras clave específicas, comillas para frases exactas y operadores como AND, OR para refinar resultados.',
+    '¿Qué es el desarrollo web?': 'Es la creación y mantenimiento de sitios web, que incluye aspectos como diseño, contenido y funcionalidad.',
+    '¿Cómo proteger mis dispositivos móviles?': 'Usa contraseñas, activa la autenticación de dos factores y evita conectarte a redes Wi-Fi públicas sin protección.',
+    '¿Qué es la ciberseguridad?': 'Es la práctica de proteger sistemas, redes y programas de ataques digitales para salvaguardar la información y la privacidad.'
+}
+
+
+def cargar_respuestas(apps, schema_editor):
+    EntradaTutor = apps.get_model('core', 'EntradaTutor')
+    EntradaTutor.objects.bulk_create(
+        [EntradaTutor(pregunta=pregunta, respuesta=respuesta) for pregunta, respuesta in RESPUESTAS_INICIALES.items()],
+        ignore_conflicts=True,
+    )
+
+
+def quitar_respuestas(apps, schema_editor):
+    EntradaTutor = apps.get_model('core', 'EntradaTutor')
+    EntradaTutor.objects.filter(pregunta__in=RESPUESTAS_INICIALES).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_entradatutor'),
+    ]
+
+    operations = [
+        migrations.RunPython(cargar_respuestas, quitar_respuestas),
+    ]
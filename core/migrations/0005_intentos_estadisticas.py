@@ -0,0 +1,48 @@
+# Generated by Django 5.0 on 2026-10-18 06:34
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_cargar_respuestas_tutor'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EstadisticaPregunta',
+            fields=[
+                ('pregunta', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to='core.pregunta')),
+                ('mostrada', models.IntegerField(default=0)),
+                ('correctas', models.IntegerField(default=0)),
+                ('opcion_a', models.IntegerField(default=0)),
+                ('opcion_b', models.IntegerField(default=0)),
+                ('opcion_c', models.IntegerField(default=0)),
+                ('opcion_d', models.IntegerField(default=0)),
+                ('en_blanco', models.IntegerField(default=0)),
+                ('suma_puntaje', models.BigIntegerField(default=0)),
+                ('suma_puntaje_cuadrado', models.BigIntegerField(default=0)),
+                ('suma_puntaje_correctas', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Intento',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('D', 'Diagnóstico'), ('E', 'Examen de Módulo')], max_length=1)),
+                ('fecha', models.DateTimeField(auto_now_add=True)),
+                ('puntaje', models.IntegerField()),
+                ('preguntas', models.TextField()),
+                ('respuestas', models.TextField()),
+                ('modulo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.modulo')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'modulo', 'tipo'], name='intento_user_modulo_tipo_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.0 on 2026-10-18 06:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def llenar_resumen(apps, schema_editor):
+    # Los totales de los progresos que ya existen; desde aquí se mantienen con deltas
+    Progreso = apps.get_model('core', 'Progreso')
+    ResumenCargo = apps.get_model('core', 'ResumenCargo')
+    agregados = (
+        Progreso.objects
+        .annotate(cargo_usuario=Coalesce('user__perfil__cargo', Value('SIN PERFIL')))
+        .values('cargo_usuario', 'modulo_id')
+        .annotate(usuarios=Count('id'), completados=Count('id', filter=Q(completado=True)),
+                  suma_puntaje=Coalesce(Sum('puntaje'), 0))
+        .order_by()
+    )
+    ResumenCargo.objects.bulk_create([
+        ResumenCargo(cargo=a['cargo_usuario'], modulo_id=a['modulo_id'], usuarios=a['usuarios'],
+                     completados=a['completados'], suma_puntaje=a['suma_puntaje'])
+        for a in agregados
+    ], batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_intentos_estadisticas'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumenCargo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cargo', models.CharField(max_length=100)),
+                ('usuarios', models.IntegerField(default=0)),
+                ('completados', models.IntegerField(default=0)),
+                ('suma_puntaje', models.BigIntegerField(default=0)),
+                ('modulo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.modulo')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='resumencargo',
+            constraint=models.UniqueConstraint(fields=('cargo', 'modulo'), name='resumencargo_cargo_modulo_unico'),
+        ),
+        migrations.RunPython(llenar_resumen, migrations.RunPython.noop),
+    ]
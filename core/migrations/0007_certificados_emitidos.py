@@ -0,0 +1,52 @@
+# Generated by Django 5.0 on 2026-10-18 06:47
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.utils.crypto import salted_hmac
+
+
+# Copia congelada de core.verificacion.codigo al crear esta migración
+def codigo(user_id, modulo_id, fecha):
+    base = f"CD-{user_id:06d}-{modulo_id:03d}-{fecha.strftime('%Y%m')}"
+    clave = getattr(settings, 'CERTIFICADOS_CLAVE_FIRMA', None) or settings.SECRET_KEY
+    firma = salted_hmac('core.verificacion.certificado', base, secret=clave, algorithm='sha256').hexdigest()[:16]
+    return f'{base}-{firma.upper()}'
+
+
+def registrar_aprobados(apps, schema_editor):
+    # Los módulos ya aprobados reciben su código firmado, el mismo que imprime el PDF
+    Progreso = apps.get_model('core', 'Progreso')
+    Certificado = apps.get_model('core', 'Certificado')
+    aprobados = Progreso.objects.filter(completado=True).values_list('user_id', 'modulo_id', 'user__date_joined')
+    Certificado.objects.bulk_create(
+        (Certificado(user_id=user_id, modulo_id=modulo_id, codigo=codigo(user_id, modulo_id, fecha))
+         for user_id, modulo_id, fecha in list(aprobados)),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_resumen_cargo'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Certificado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('codigo', models.CharField(max_length=64, unique=True)),
+                ('emitido', models.DateTimeField(auto_now_add=True)),
+                ('modulo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.modulo')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='certificado',
+            constraint=models.UniqueConstraint(fields=('user', 'modulo'), name='certificado_user_modulo_unico'),
+        ),
+        migrations.RunPython(registrar_aprobados, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,167 @@
+# Generated by Django 5.0 on 2026-10-18 06:57
+
+import html
+import re
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Copia congelada de core.lecciones.markdown_a_html al crear esta migración:
+# los cambios posteriores al renderizador no deben alterar lo que carga.
+_NIVEL_BASE = 4
+_TITULO = re.compile(r'^(#{1,6})\s+(.*?)\s*#*$')
+_VINETA = re.compile(r'^[-*]\s+(.*)$')
+_NUMERADA = re.compile(r'^\d+[.)]\s+(.*)$')
+# Sobre el texto ya escapado: `código` o [texto](url)
+_CODIGO_O_ENLACE = re.compile(r'`([^`]+)`|\[([^\]]+)\]\(([^)\s]+)\)')
+_NEGRITA = re.compile(r'\*\*(?=\S)(.+?)(?<=\S)\*\*')
+_CURSIVA = re.compile(r'\*(?=\S)(.+?)(?<=\S)\*')
+_ESQUEMAS = ('http://', 'https://', 'mailto:')
+
+
+def _enfasis(texto):
+    return _CURSIVA.sub(r'<em>\1</em>', _NEGRITA.sub(r'<strong>\1</strong>', texto))
+
+
+def _enlace(texto, url):
+    destino = html.unescape(url)
+    if destino.lower().startswith(_ESQUEMAS):
+        return f'<a href="{url}" target="_blank" rel="noopener" class="enlace-tema">{texto}</a>'
+    if destino.startswith('/') and not destino.startswith('//'):
+        return f'<a href="{url}">{texto}</a>'
+    # javascript:, data:, etc. quedan como texto
+    return texto
+
+
+def _en_linea(texto):
+    texto = html.escape(texto)
+    partes, inicio = [], 0
+    for coincidencia in _CODIGO_O_ENLACE.finditer(texto):
+        partes.append(_enfasis(texto[inicio:coincidencia.start()]))
+        codigo, etiqueta, url = coincidencia.groups()
+        partes.append(f'<code>{codigo}</code>' if codigo is not None else _enlace(_enfasis(etiqueta), url))
+        inicio = coincidencia.end()
+    partes.append(_enfasis(texto[inicio:]))
+    return ''.join(partes)
+
+
+def markdown_a_html(texto):
+    bloques, parrafo, lista = [], [], None  # lista: (etiqueta, [elementos])
+
+    def cerrar():
+        nonlocal lista
+        if parrafo:
+            bloques.append(f"<p>{_en_linea(' '.join(parrafo))}</p>")
+            parrafo.clear()
+        if lista:
+            etiqueta, elementos = lista
+            items = ''.join(f"<li>{_en_linea(' '.join(e))}</li>" for e in elementos)
+            bloques.append(f'<{etiqueta}>{items}</{etiqueta}>')
+            lista = None
+
+    for linea in texto.replace('\r\n', '\n').split('\n'):
+        limpia = linea.strip()
+        if not limpia:
+            cerrar()
+            continue
+        titulo = _TITULO.match(limpia)
+        elemento = _VINETA.match(limpia) or _NUMERADA.match(limpia)
+        if titulo:
+            cerrar()
+            nivel = min(len(titulo[1]) + _NIVEL_BASE, 6)
+            bloques.append(f'<h{nivel}>{_en_linea(titulo[2])}</h{nivel}>')
+        elif elemento:
+            etiqueta = 'ul' if _VINETA.match(limpia) else 'ol'
+            if parrafo or (lista and lista[0] != etiqueta):
+                cerrar()
+            if lista is None:
+                lista = (etiqueta, [])
+            lista[1].append([elemento[1]])
+        elif lista and linea[:1].isspace():
+            lista[1][-1].append(limpia)  # continuación del elemento anterior
+        else:
+            if lista:
+                cerrar()
+            parrafo.append(limpia)
+    cerrar()
+    return '\n'.join(bloques)
+
+
+# Temas que antes estaban fijos en core/modulo.html, por la parte del nombre
+# del módulo con la que la plantilla los elegía: (título, texto, enlace)
+LECCIONES_INICIALES = {
+    'comunicación digital': [
+        ('Correo electrónico', 'Formal, adjuntos, respuesta.',
+         '[Ver video sobre correo electrónico profesional](https://youtu.be/KUXOy3o9T2w?si=Glqa4DoJbKhShwcX)'),
+        ('Foros y chats', 'Netiqueta, participación.',
+         '[Ver video sobre participación en foros y chats](https://www.uned.es/universidad/centros/dam/jcr:58ade1b8-64d6-40f8-91f5-86c3cdd38fa5/hacer_buen_uso_de_foros-1.pdf)'),
+        ('Redes sociales', 'Uso profesional, privacidad.',
+         '[Ver video sobre uso profesional de redes sociales](https://www-medesk-net.translate.goog/en/blog/communicate-professionally-through-social-media/?_x_tr_sl=en&_x_tr_tl=es&_x_tr_hl=es&_x_tr_pto=tc)'),
+        ('Videollamadas', 'Herramientas, etiqueta.',
+         '[Ver video sobre videollamadas efectivas](http://www.ride.org.mx/index.php/RIDE/article/view/959/3050)'),
+    ],
+    'ofimáticas': [
+        ('Microsoft Word', 'Formato texto, tablas, documentos.',
+         '[Ver video sobre creación y formato en Word](https://www.crehana.com/blog/negocios/word-caracteristicas-y-funciones/)'),
+        ('Microsoft Excel', 'Fórmulas, formato, gráficos.',
+         '[Ver video sobre funciones básicas en Excel](https://blog.hubspot.es/marketing/para-que-sirve-excel)'),
+        ('Microsoft PowerPoint', 'Diapositivas, presentaciones.',
+         '[Ver video sobre creación de presentaciones en PowerPoint](https://es.slideshare.net/slideshow/todo-sobre-powerpoint-66230972/66230972)'),
+        ('Colaboración', 'Trabajo en equipo en la nube.',
+         '[Ver video sobre colaboración en documentos en línea](https://www.bitrix24.es/articles/qu-es-la-colaboraci-n-en-la-nube-definici-n-beneficios-y-su-importancia.php)'),
+    ],
+    'seguro': [
+        ('Contraseñas', 'Creación y gestión segura.',
+         '[Ver video sobre creación de contraseñas seguras](https://youtu.be/B1_wLepxuEI?si=KdJkgh_fyftcdm_5)'),
+        ('Protección', 'Antivirus, firewall, VPN.',
+         '[Ver video sobre firewalls y su importancia](https://www-paloaltonetworks-com.translate.goog/cyberpedia/firewall-vs-antivirus?_x_tr_sl=en&_x_tr_tl=es&_x_tr_hl=es&_x_tr_pto=tc)'),
+        ('Phishing', 'Identificación y prevención.',
+         '[Ver video sobre cómo identificar correos de phishing](https://dspace.ups.edu.ec/bitstream/123456789/21699/4/UPS-GT003573.pdf)'),
+        ('Redes sociales', 'Seguridad y privacidad.',
+         '[Ver video sobre seguridad en redes sociales](https://youtu.be/WsOm9gdNlas?si=1clh9FI6RHgIqVfd)'),
+    ],
+}
+
+
+def cargar_lecciones(apps, schema_editor):
+    Modulo = apps.get_model('core', 'Modulo')
+    Leccion = apps.get_model('core', 'Leccion')
+    nuevas = []
+    for modulo in Modulo.objects.all():
+        for parte, temas in LECCIONES_INICIALES.items():
+            if parte in modulo.nombre.lower():
+                for orden, (titulo, texto, enlace) in enumerate(temas, start=1):
+                    contenido = f'{texto}\n\n{enlace}'
+                    nuevas.append(Leccion(modulo=modulo, orden=orden, titulo=titulo, contenido=contenido,
+                                          html=markdown_a_html(contenido)))
+                break
+    Leccion.objects.bulk_create(nuevas)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_certificados_emitidos'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Leccion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('orden', models.PositiveIntegerField(default=0)),
+                ('titulo', models.CharField(max_length=200)),
+                ('contenido', models.TextField(help_text='Markdown: # títulos, listas con -, **negrita**, *cursiva*, [enlace](https://...)')),
+                ('html', models.TextField(blank=True, editable=False)),
+                ('version', models.PositiveIntegerField(default=1, editable=False)),
+                ('actualizado', models.DateTimeField(auto_now=True)),
+                ('modulo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lecciones', to='core.modulo')),
+            ],
+            options={
+                'verbose_name_plural': 'lecciones',
+                'ordering': ['modulo', 'orden', 'id'],
+                'indexes': [models.Index(fields=['modulo', 'orden'], name='leccion_modulo_orden_idx')],
+            },
+        ),
+        migrations.RunPython(cargar_lecciones, migrations.RunPython.noop),
+    ]
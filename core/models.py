@@ -57,6 +57,12 @@ class Pregunta(models.Model):
    
     tipo_pregunta = models.CharField(max_length=1, choices=TIPO_CHOICES, default='D') 
     
+    class Meta:
+        # Todas las vistas filtran por módulo y tipo de pregunta
+        indexes = [
+            models.Index(fields=['modulo', 'tipo_pregunta'], name='pregunta_modulo_tipo_idx'),
+        ]
+
     def __str__(self):
         return self.texto
 
@@ -67,6 +73,162 @@ class Progreso(models.Model):
     modulo = models.ForeignKey(Modulo, on_delete=models.CASCADE)
     completado = models.BooleanField(default=False)
     puntaje = models.IntegerField(default=0) 
+
+    class Meta:
+        # Un solo progreso por usuario y módulo; permite el upsert atómico
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'modulo'], name='progreso_user_modulo_unico'),
+        ]
+
     def __str__(self):
         return f"{self.user.username} - {self.modulo.nombre}"
-    
\ No newline at end of file
+    
+
+# Base de conocimiento del Tutor IA, editable desde el admin
+class EntradaTutor(models.Model):
+
+    pregunta = models.CharField(max_length=255, unique=True)
+    respuesta = models.TextField()
+    activa = models.BooleanField(default=True)
+
+    class Meta:
+        ordering = ['id']
+
+    def __str__(self):
+        return self.pregunta
+
+
+# Historial de intentos (diagnóstico por módulo o examen); nunca se modifica
+class Intento(models.Model):
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    modulo = models.ForeignKey(Modulo, on_delete=models.CASCADE)
+    tipo = models.CharField(max_length=1, choices=Pregunta.TIPO_CHOICES)
+    fecha = models.DateTimeField(auto_now_add=True)
+    puntaje = models.IntegerField()
+    # Ids de las preguntas mostradas, separados por comas, y una letra por
+    # pregunta en el mismo orden ('-' si quedó en blanco): '12,13,14' / 'AC-'
+    preguntas = models.TextField()
+    respuestas = models.TextField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'modulo', 'tipo'], name='intento_user_modulo_tipo_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.modulo.nombre} ({self.puntaje})"
+
+
+# Contadores por pregunta, sumados con F() en cada intento (ver core/analitica.py)
+class EstadisticaPregunta(models.Model):
+
+    pregunta = models.OneToOneField(Pregunta, on_delete=models.CASCADE, primary_key=True)
+    mostrada = models.IntegerField(default=0)
+    correctas = models.IntegerField(default=0)
+    opcion_a = models.IntegerField(default=0)
+    opcion_b = models.IntegerField(default=0)
+    opcion_c = models.IntegerField(default=0)
+    opcion_d = models.IntegerField(default=0)
+    en_blanco = models.IntegerField(default=0)
+    # Sumas del puntaje total del intento, para la discriminación (punto-biserial)
+    suma_puntaje = models.BigIntegerField(default=0)
+    suma_puntaje_cuadrado = models.BigIntegerField(default=0)
+    suma_puntaje_correctas = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"Estadística de {self.pregunta_id}"
+
+
+# Totales por cargo y módulo para los reportes; los mantiene core/reportes.py
+class ResumenCargo(models.Model):
+
+    cargo = models.CharField(max_length=100)
+    modulo = models.ForeignKey(Modulo, on_delete=models.CASCADE)
+    usuarios = models.IntegerField(default=0)
+    completados = models.IntegerField(default=0)
+    suma_puntaje = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['cargo', 'modulo'], name='resumencargo_cargo_modulo_unico'),
+        ]
+
+    def __str__(self):
+        return f"{self.cargo} - {self.modulo_id}"
+
+
+# Certificados emitidos; el código firmado se verifica en /verificar/<código>/ (ver core/verificacion.py)
+class Certificado(models.Model):
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    modulo = models.ForeignKey(Modulo, on_delete=models.CASCADE)
+    codigo = models.CharField(max_length=64, unique=True)
+    emitido = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'modulo'], name='certificado_user_modulo_unico'),
+        ]
+
+    def __str__(self):
+        return self.codigo
+
+
+# Lecciones de un módulo en Markdown; el HTML se renderiza al guardar (ver core/lecciones.py)
+class Leccion(models.Model):
+
+    modulo = models.ForeignKey(Modulo, on_delete=models.CASCADE, related_name='lecciones')
+    orden = models.PositiveIntegerField(default=0)
+    titulo = models.CharField(max_length=200)
+    contenido = models.TextField(help_text='Markdown: # títulos, listas con -, **negrita**, *cursiva*, [enlace](https://...)')
+    html = models.TextField(blank=True, editable=False)
+    # Sube cada vez que cambia el contenido
+    version = models.PositiveIntegerField(default=1, editable=False)
+    actualizado = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['modulo', 'orden', 'id']
+        verbose_name_plural = 'lecciones'
+        indexes = [
+            models.Index(fields=['modulo', 'orden'], name='leccion_modulo_orden_idx'),
+        ]
+
+    def __str__(self):
+        return self.titulo
+
+
+# Cola de certificados por dibujar en segundo plano (ver core/trabajos.py)
+class TrabajoCertificado(models.Model):
+
+    PENDIENTE = 'P'
+    EN_PROCESO = 'E'
+    LISTO = 'L'
+    FALLIDO = 'F'
+    ESTADO_CHOICES = [
+        (PENDIENTE, 'Pendiente'),
+        (EN_PROCESO, 'En proceso'),
+        (LISTO, 'Listo'),
+        (FALLIDO, 'Fallido'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    modulo = models.ForeignKey(Modulo, on_delete=models.CASCADE)
+    estado = models.CharField(max_length=1, choices=ESTADO_CHOICES, default=PENDIENTE)
+    intentos = models.IntegerField(default=0)
+    creado = models.DateTimeField()
+    iniciado = models.DateTimeField(null=True, blank=True)
+    terminado = models.DateTimeField(null=True, blank=True)
+    error = models.TextField(blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'modulo'], name='trabajo_user_modulo_unico'),
+        ]
+        # El worker toma los pendientes más antiguos
+        indexes = [
+            models.Index(fields=['estado', 'creado'], name='trabajo_estado_creado_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} - {self.modulo_id} ({self.get_estado_display()})"
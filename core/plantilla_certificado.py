@@ -0,0 +1,188 @@
+"""Diseño del certificado PDF, dibujado con ReportLab.
+
+Lo que no cambia entre certificados (fondo, borde, logo, firma, textos fijos
+y adornos) está en _dibujar_capa_fija, con la geometría del logo y de la
+firma calculada una sola vez al importar el módulo. Cada certificado es un PDF
+de una página, así que la capa fija se dibuja en cada uno: un form XObject no
+tendría dónde reutilizarse.
+
+ReportLab tarda en importarse (unos 70 ms, con PIL), así que este módulo no
+se importa al arrancar: certificados.renderizar_pdf lo carga la primera vez
+que hay que dibujar un PDF. Al cambiar el diseño hay que subir
+certificados.VERSION_PLANTILLA.
+"""
+from io import BytesIO
+from math import pi, sin
+
+from reportlab.pdfgen import canvas
+from reportlab.lib.pagesizes import landscape, A4
+from reportlab.lib.units import inch
+from reportlab.lib.colors import HexColor, Color
+
+WIDTH, HEIGHT = landscape(A4)
+MARGIN = 0.6 * inch
+Y_BASE = HEIGHT - 6.0 * inch
+X_FECHA = 3 * inch
+X_FIRMA = WIDTH - 3 * inch
+
+
+def _segmentos_logo():
+    """Segmentos (x1, y1, x2, y2, color) de la onda con degradado del logo."""
+    logo_x = WIDTH - MARGIN - 1.2*inch
+    logo_y = HEIGHT - MARGIN - 0.8*inch
+    segments = 100
+    w = 0.8 * inch
+    amp = 0.2 * inch
+    freq = 1
+    phase = 3 * pi / 2
+    start_x = logo_x - 0.4 * inch
+    start_color = Color(54/255, 209/255, 220/255)  # Azul
+    end_color = Color(255/255, 94/255, 98/255)  # Rosa
+
+    segmentos = []
+    for i in range(segments):
+        t1 = i / segments
+        t2 = (i + 1) / segments
+        y1 = logo_y + amp * sin(2 * pi * freq * t1 + phase)
+        x1 = start_x + w * t1
+        y2 = logo_y + amp * sin(2 * pi * freq * t2 + phase)
+        x2 = start_x + w * t2
+        fraction = (t1 + t2) / 2
+        r = start_color.red + fraction * (end_color.red - start_color.red)
+        g = start_color.green + fraction * (end_color.green - start_color.green)
+        b = start_color.blue + fraction * (end_color.blue - start_color.blue)
+        segmentos.append((x1, y1, x2, y2, Color(r, g, b)))
+    return (logo_x, logo_y), segmentos
+
+
+(LOGO_X, LOGO_Y), SEGMENTOS_LOGO = _segmentos_logo()
+
+# Firma gráfica: pares de puntos consecutivos ya calculados
+_PUNTOS_FIRMA = [
+    (X_FIRMA-1.2*inch, Y_BASE - 0.5*inch),
+    (X_FIRMA-0.9*inch, Y_BASE - 0.4*inch),
+    (X_FIRMA-0.6*inch, Y_BASE - 0.6*inch),
+    (X_FIRMA-0.3*inch, Y_BASE - 0.35*inch),
+    (X_FIRMA, Y_BASE - 0.55*inch),
+    (X_FIRMA+0.3*inch, Y_BASE - 0.4*inch),
+    (X_FIRMA+0.6*inch, Y_BASE - 0.65*inch),
+    (X_FIRMA+0.9*inch, Y_BASE - 0.45*inch)
+]
+LINEAS_FIRMA = [(*a, *b) for a, b in zip(_PUNTOS_FIRMA, _PUNTOS_FIRMA[1:])]
+
+
+def _dibujar_capa_fija(p):
+    # --- FONDO LIMPIO ---
+    p.setFillColor(HexColor("#FFFFFF"))
+    p.rect(0, 0, WIDTH, HEIGHT, fill=1)
+
+    # --- BORDE ELEGANTE ---
+    p.setStrokeColor(HexColor("#2C5F9B"))
+    p.setLineWidth(6)
+    p.rect(MARGIN, MARGIN, WIDTH-2*MARGIN, HEIGHT-2*MARGIN, stroke=1, fill=0)
+
+    # --- LOGOTIPO EN ESQUINA SUPERIOR DERECHA ---
+    p.setLineWidth(0.15*inch)
+    p.setLineCap(1)
+    for x1, y1, x2, y2, color in SEGMENTOS_LOGO:
+        p.setStrokeColor(color)
+        p.line(x1, y1, x2, y2)
+
+    # Texto ANSSD debajo del logo
+    p.setFont("Helvetica-Bold", 10)
+    p.setFillColor(HexColor("#2C5F9B"))
+    p.drawCentredString(LOGO_X, LOGO_Y - 0.7*inch, "ANSSD")
+
+    # --- ENCABEZADO ---
+    p.setFont("Helvetica-Bold", 24)
+    p.setFillColor(HexColor("#1A365D"))
+    p.drawCentredString(WIDTH/2, HEIGHT-1.8*inch, "CERTIFICADO DE PARTICIPACIÓN")
+
+    # Línea decorativa bajo el título
+    p.setStrokeColor(HexColor("#E6A23C"))
+    p.setLineWidth(2)
+    p.line(WIDTH/2-1.6*inch, HEIGHT-2.0*inch, WIDTH/2+1.6*inch, HEIGHT-2.0*inch)
+
+    # --- TEXTOS FIJOS DEL CONTENIDO ---
+    p.setFont("Helvetica", 13)
+    p.setFillColor(HexColor("#555555"))
+    p.drawCentredString(WIDTH/2, HEIGHT-2.6*inch, "Se otorga el presente certificado a:")
+
+    p.setFont("Helvetica", 12)
+    p.setFillColor(HexColor("#666666"))
+    p.drawCentredString(WIDTH/2, HEIGHT-3.9*inch, "Por haber completado exitosamente el")
+
+    p.setFont("Helvetica", 11)
+    p.setFillColor(HexColor("#777777"))
+    p.drawCentredString(WIDTH/2, HEIGHT-4.9*inch, "demostrando competencia y dedicación en el aprendizaje")
+
+    # --- SECCIÓN INFERIOR: FIRMA Y FECHA ---
+    p.setStrokeColor(HexColor("#CBD5E0"))
+    p.setLineWidth(0.5)
+    p.line(2*inch, Y_BASE, WIDTH-2*inch, Y_BASE)
+
+    p.setFont("Helvetica-Bold", 11)
+    p.setFillColor(HexColor("#2C5F9B"))
+    p.drawCentredString(X_FECHA, Y_BASE - 0.6*inch, "Fecha de Emisión")
+
+    # FIRMA GRÁFICA
+    p.setStrokeColor(HexColor("#2C5F9B"))
+    p.setLineWidth(1.8)
+    p.lines(LINEAS_FIRMA)
+
+    # Línea de firma
+    p.setLineWidth(1)
+    p.line(X_FIRMA-1.0*inch, Y_BASE - 0.7*inch, X_FIRMA+1.0*inch, Y_BASE - 0.7*inch)
+
+    # Información del firmante
+    p.setFont("Helvetica-Bold", 11)
+    p.setFillColor(HexColor("#2C5F9B"))
+    p.drawCentredString(X_FIRMA, Y_BASE - 0.9*inch, "Ing. Elena Mendoza")
+
+    p.setFont("Helvetica-Oblique", 10)
+    p.setFillColor(HexColor("#666666"))
+    p.drawCentredString(X_FIRMA, Y_BASE - 1.1*inch, "Coordinadora de Formación Digital ANSSD")
+
+    # --- ELEMENTOS DECORATIVOS ---
+    p.setStrokeColor(HexColor("#E6A23C"))
+    p.setLineWidth(1)
+    corner_size = 0.2 * inch
+    # Esquina superior izquierda
+    p.line(MARGIN, HEIGHT-MARGIN-corner_size, MARGIN, HEIGHT-MARGIN)
+    p.line(MARGIN, HEIGHT-MARGIN, MARGIN+corner_size, HEIGHT-MARGIN)
+
+
+def dibujar_certificado(p, datos):
+    """Dibuja un certificado completo en el canvas `p`."""
+    _dibujar_capa_fija(p)
+
+    # Nombre completo del usuario (nombre + apellido)
+    p.setFont("Helvetica-Bold", 28)
+    p.setFillColor(HexColor("#2C5F9B"))
+    p.drawCentredString(WIDTH/2, HEIGHT-3.3*inch, datos['nombre_completo'])
+
+    # Nombre del módulo
+    p.setFont("Helvetica-Bold", 16)
+    p.setFillColor(HexColor("#1A365D"))
+    p.drawCentredString(WIDTH/2, HEIGHT-4.4*inch, f"MÓDULO DE {datos['modulo']}")
+
+    # Fecha de emisión
+    p.setFont("Helvetica", 11)
+    p.setFillColor(HexColor("#1A365D"))
+    p.drawCentredString(X_FECHA, Y_BASE - 0.9*inch, datos['fecha'])
+
+    # --- CÓDIGO DE VERIFICACIÓN ---
+    p.setFont("Helvetica", 8)
+    p.setFillColor(HexColor("#666666"))
+    p.drawCentredString(WIDTH/2, MARGIN + 0.2*inch, f"CÓDIGO DE VERIFICACIÓN: {datos['codigo']}")
+
+    p.showPage()
+
+
+def renderizar(datos):
+    """Bytes del PDF de `datos` (ver certificados.datos_certificado). `invariant` hace la salida reproducible."""
+    buffer = BytesIO()
+    p = canvas.Canvas(buffer, pagesize=landscape(A4), invariant=1)
+    dibujar_certificado(p, datos)
+    p.save()
+    return buffer.getvalue()
@@ -0,0 +1,146 @@
+"""Lecturas de reportes y paneles en la réplica de la base de datos.
+
+Si DATABASES tiene el alias `replica` (ANSSD_DB_REPLICA_HOST o
+ANSSD_SQLITE_REPLICA en settings), las vistas marcadas con
+@lecturas_en_replica —inicio, progreso, reportes, análisis, verificación de
+certificados— leen los modelos de core desde ella. Todo lo demás, y toda
+escritura, va a `default`. La sesión y el usuario se leen siempre de la
+primaria: un login recién hecho podría no haber llegado a la réplica. Lo que
+se guarda en la caché (resumen de progreso, verificación de certificados) se
+arma también desde la primaria, con using(DEFAULT_DB_ALIAS): una lectura
+atrasada de la réplica quedaría cacheada hasta la próxima invalidación.
+
+Leer lo propio: una petición que escribe (POST, PUT...) deja la cookie
+COOKIE con la hora hasta la que ese navegador lee de la primaria
+(DATABASE_REPLICA_RETRASO segundos). Así, al volver del examen, el progreso
+muestra el resultado aunque la réplica vaya atrasada.
+
+La marca es una ContextVar: la heredan los hilos de sync_to_async (vistas y
+ORM async) y se vuelve a poner al generar el contenido de las respuestas en
+streaming, que se consume después de la vista.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+ALIAS = 'replica'
+COOKIE = 'anssd_primaria'
+METODOS_SEGUROS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+_en_replica = ContextVar('anssd_en_replica', default=False)
+
+
+def disponible():
+    return ALIAS in settings.DATABASES
+
+
+def activa():
+    """True si las lecturas de core van ahora a la réplica."""
+    return _en_replica.get() and disponible()
+
+
+@contextmanager
+def lecturas():
+    token = _en_replica.set(True)
+    try:
+        yield
+    finally:
+        _en_replica.reset(token)
+
+
+def _leer_de_primaria(request):
+    try:
+        return float(request.COOKIES.get(COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def _streaming_en_replica(response):
+    # Se marca alrededor de cada trozo: entre uno y otro el servidor puede
+    # cambiar de hilo (ASGI) y la marca no debe quedar puesta fuera
+    if not getattr(response, 'streaming', False) or response.is_async:
+        return response
+    partes = iter(response.streaming_content)
+
+    def generar():
+        while True:
+            with lecturas():
+                try:
+                    parte = next(partes)
+                except StopIteration:
+                    return
+            yield parte
+
+    response.streaming_content = generar()
+    return response
+
+
+def lecturas_en_replica(vista):
+    """Las consultas de lectura de la vista (sync o async) van a la réplica, si hay."""
+    if iscoroutinefunction(vista):
+        @wraps(vista)
+        async def envuelta_async(request, *args, **kwargs):
+            if not disponible() or _leer_de_primaria(request):
+                return await vista(request, *args, **kwargs)
+            with lecturas():
+                return await vista(request, *args, **kwargs)
+        return envuelta_async
+
+    @wraps(vista)
+    def envuelta(request, *args, **kwargs):
+        if not disponible() or _leer_de_primaria(request):
+            return vista(request, *args, **kwargs)
+        with lecturas():
+            response = vista(request, *args, **kwargs)
+        return _streaming_en_replica(response)
+    return envuelta
+
+
+class RouterReplica:
+    """Lecturas de core a la réplica dentro de @lecturas_en_replica; el resto a default."""
+
+    def db_for_read(self, model, **hints):
+        if activa() and model._meta.app_label == 'core':
+            return ALIAS
+        # Explícito: sin router Django leería los relacionados de un objeto de la réplica en la réplica
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        # Aunque el objeto se haya leído de la réplica
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True  # La réplica es copia de la primaria
+
+    def allow_migrate(self, db, app_label, **hints):
+        return None if db != ALIAS else False
+
+
+class PrimariaTrasEscrituraMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.marcar(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.marcar(request, await self.get_response(request))
+
+    def marcar(self, request, response):
+        if disponible() and request.method not in METODOS_SEGUROS and response.status_code < 400:
+            retraso = getattr(settings, 'DATABASE_REPLICA_RETRASO', 10)
+            response.set_cookie(COOKIE, f'{time.time() + retraso:.0f}', max_age=retraso,
+                                httponly=True, samesite='Lax')
+        return response
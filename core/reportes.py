@@ -0,0 +1,173 @@
+"""Reportes por cargo (Perfil.cargo) y módulo.
+
+Los totales viven en ResumenCargo, una fila por (cargo, módulo) con cuántos
+usuarios tienen Progreso, cuántos lo completaron y la suma de puntajes. El
+reporte lee esas filas y nunca cruza Progreso, User y Perfil de toda la
+organización.
+
+La tabla se mantiene con deltas aplicados con F() dentro de la misma
+transacción que el cambio:
+
+- `guardar_progresos` (upsert sin señales) llama a `registrar_upsert` con los
+  valores que tenían las filas antes de escribir, leídos con la fila del
+  usuario bloqueada para que dos envíos simultáneos no cuenten dos veces;
+- las señales de Progreso cubren save() y delete() (admin, get_or_create);
+- las señales de Perfil mueven los totales del usuario de un cargo a otro.
+
+Los usuarios sin Perfil cuentan en SIN_PERFIL. `reconstruir` (comando
+reconstruir_reportes) recalcula todo desde cero, p. ej. tras cargas masivas.
+"""
+import csv
+from collections import defaultdict
+from types import SimpleNamespace
+
+from django.db import transaction
+from django.db.models import BigIntegerField, Case, Count, F, Q, Sum, Value, When
+from django.db.models.functions import Coalesce
+
+from .models import Perfil, Progreso, ResumenCargo
+
+SIN_PERFIL = 'SIN PERFIL'
+TAM_LOTE = 2000
+CAMPOS_TOTALES = ('usuarios', 'completados', 'suma_puntaje')
+COLUMNAS_DETALLE = ('usuario', 'nombre', 'apellido', 'cargo', 'modulo', 'completado', 'puntaje')
+
+
+def cargo_de(user_id):
+    return Perfil.objects.filter(user_id=user_id).values_list('cargo', flat=True).first() or SIN_PERFIL
+
+
+def aplicar(cargo, deltas):
+    """Suma `deltas` ({modulo_id: (usuarios, completados, puntaje)}) a las filas del cargo."""
+    deltas = {modulo_id: delta for modulo_id, delta in deltas.items() if any(delta)}
+    if not deltas:
+        return
+    # Solo puede faltar la fila cuando entra un usuario nuevo al módulo; los
+    # deltas negativos no la crean (en el borrado en cascada de un Modulo su
+    # fila ya no está y no debe reaparecer)
+    nuevas = [ResumenCargo(cargo=cargo, modulo_id=modulo_id) for modulo_id, delta in deltas.items() if delta[0] > 0]
+    if nuevas:
+        ResumenCargo.objects.bulk_create(nuevas, ignore_conflicts=True)
+    # Un solo UPDATE para todos los módulos: cada columna es un CASE con un
+    # WHEN por valor distinto del delta
+    cambios = {}
+    for posicion, campo in enumerate(CAMPOS_TOTALES):
+        por_valor = defaultdict(list)
+        for modulo_id, delta in deltas.items():
+            if delta[posicion]:
+                por_valor[delta[posicion]].append(modulo_id)
+        if por_valor:
+            cambios[campo] = F(campo) + Case(
+                *[When(modulo_id__in=ids, then=Value(valor)) for valor, ids in por_valor.items()],
+                default=Value(0), output_field=BigIntegerField(),
+            )
+    ResumenCargo.objects.filter(cargo=cargo, modulo_id__in=list(deltas)).update(**cambios)
+
+
+def _delta(anterior, actual):
+    """Delta entre dos estados (completado, puntaje); None es que la fila no existe."""
+    usuarios = (actual is not None) - (anterior is not None)
+    completado_antes, puntaje_antes = anterior or (False, 0)
+    completado_ahora, puntaje_ahora = actual or (False, 0)
+    return usuarios, int(completado_ahora) - int(completado_antes), puntaje_ahora - puntaje_antes
+
+
+def registrar_upsert(user_id, anteriores, valores, cargo=None):
+    """Aplica el efecto de guardar_progresos.
+
+    `anteriores` es {modulo_id: (completado, puntaje)} leído antes del upsert y
+    `valores` lo que se escribió ({modulo_id: {campo: valor}}); los campos que
+    no vienen conservan el valor anterior, como en el UPDATE. `cargo` evita
+    leerlo otra vez si quien llama ya lo tiene.
+    """
+    deltas = {}
+    for modulo_id, datos in valores.items():
+        anterior = anteriores.get(modulo_id)
+        completado, puntaje = anterior or (False, 0)
+        actual = (datos.get('completado', completado), datos.get('puntaje', puntaje))
+        deltas[modulo_id] = _delta(anterior, actual)
+    aplicar(cargo or cargo_de(user_id), deltas)
+
+
+def progreso_cambiado(user_id, modulo_id, anterior, actual):
+    aplicar(cargo_de(user_id), {modulo_id: _delta(anterior, actual)})
+
+
+def _totales_usuario(user_id):
+    filas = Progreso.objects.filter(user_id=user_id).values_list('modulo_id', 'completado', 'puntaje')
+    return {modulo_id: (1, int(completado), puntaje) for modulo_id, completado, puntaje in filas}
+
+
+def mover_usuario(user_id, cargo_anterior, cargo_nuevo):
+    """Pasa los totales del usuario de un cargo a otro (cambio o baja de Perfil)."""
+    if cargo_anterior == cargo_nuevo:
+        return
+    totales = _totales_usuario(user_id)
+    aplicar(cargo_anterior, {m: tuple(-x for x in t) for m, t in totales.items()})
+    aplicar(cargo_nuevo, totales)
+
+
+def reconstruir():
+    """Recalcula ResumenCargo entero con una agregación sobre Progreso. Devuelve las filas."""
+    agregados = (
+        Progreso.objects
+        .annotate(cargo_usuario=Coalesce('user__perfil__cargo', Value(SIN_PERFIL)))
+        .values('cargo_usuario', 'modulo_id')
+        .annotate(usuarios=Count('id'), completados=Count('id', filter=Q(completado=True)),
+                  suma_puntaje=Coalesce(Sum('puntaje'), 0))
+        .order_by()
+    )
+    filas = [
+        ResumenCargo(cargo=a['cargo_usuario'], modulo_id=a['modulo_id'], usuarios=a['usuarios'],
+                     completados=a['completados'], suma_puntaje=a['suma_puntaje'])
+        for a in agregados
+    ]
+    with transaction.atomic():
+        ResumenCargo.objects.all().delete()
+        ResumenCargo.objects.bulk_create(filas, batch_size=TAM_LOTE)
+    return len(filas)
+
+
+def filas_reporte(cargo=None):
+    """Tasa de aprobación y puntaje promedio por cargo y módulo, desde ResumenCargo."""
+    resumenes = ResumenCargo.objects.filter(usuarios__gt=0).select_related('modulo').order_by('cargo', 'modulo_id')
+    if cargo:
+        resumenes = resumenes.filter(cargo=cargo)
+    return [
+        SimpleNamespace(
+            cargo=r.cargo,
+            modulo=r.modulo.nombre,
+            usuarios=r.usuarios,
+            completados=r.completados,
+            tasa=round(r.completados / r.usuarios * 100, 1),
+            promedio=round(r.suma_puntaje / r.usuarios, 2),
+        )
+        for r in resumenes
+    ]
+
+
+class _Eco:
+    """Pseudo-archivo para csv.writer: devuelve la línea en vez de guardarla."""
+
+    def write(self, valor):
+        return valor
+
+
+def detalle_csv(cargo=None, modulo_id=None, tam_lote=TAM_LOTE):
+    """Genera el CSV por usuario y módulo leyendo la base por bloques (cursor del servidor)."""
+    progresos = Progreso.objects.order_by('id').values_list(
+        'user__username', 'user__perfil__nombre', 'user__perfil__apellido', 'user__perfil__cargo',
+        'modulo__nombre', 'completado', 'puntaje',
+    )
+    if cargo == SIN_PERFIL:
+        progresos = progresos.filter(user__perfil__isnull=True)
+    elif cargo:
+        progresos = progresos.filter(user__perfil__cargo=cargo)
+    if modulo_id:
+        progresos = progresos.filter(modulo_id=modulo_id)
+
+    escritor = csv.writer(_Eco())
+    yield escritor.writerow(COLUMNAS_DETALLE)
+    for usuario, nombre, apellido, cargo_usuario, modulo, completado, puntaje in progresos.iterator(chunk_size=tam_lote):
+        yield escritor.writerow((usuario, nombre or '', apellido or '', cargo_usuario or SIN_PERFIL, modulo,
+                                 'sí' if completado else 'no', puntaje))
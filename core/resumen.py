@@ -0,0 +1,105 @@
+"""Resumen de progreso por usuario guardado en la caché de Django.
+
+`home` y `progreso` leen lo mismo en cada visita: si hizo el diagnóstico, los
+módulos completados y pendientes y el porcentaje. El resumen se arma una vez,
+se guarda en la caché y se descarta cuando cambia algo que lo afecta:
+
+- un Progreso del usuario (señales y `guardar_progresos`) -> solo ese usuario;
+- cualquier Modulo (nombre, alta o baja) -> todos, cambiando una versión global.
+
+El resumen se arma siempre desde la primaria, aunque la vista lea de la
+réplica: uno armado con la réplica atrasada quedaría en la caché (y con él el
+ETag de sellos) hasta el próximo cambio del usuario.
+
+Los aciertos y fallos se cuentan en las métricas (resumen_cache_hit/miss).
+Con varios workers la caché debe ser compartida (ANSSD_REDIS_URL o
+ANSSD_MEMCACHED en settings): la invalidación de un worker es la de todos.
+"""
+import uuid
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+from .metricas import contar
+from .models import Progreso
+
+CLAVE_VERSION = 'core:resumen:version'
+DURACION = getattr(settings, 'RESUMEN_CACHE_SEGUNDOS', 60 * 60 * 24)
+
+FilaProgreso = namedtuple('FilaProgreso', 'modulo_id modulo_nombre completado puntaje')
+
+
+class Resumen:
+
+    def __init__(self, filas):
+        self.progresos = filas
+        self.modulos_pendientes = [fila for fila in filas if not fila.completado]
+        self.total = len(filas)
+        self.completados = self.total - len(self.modulos_pendientes)
+        self.porcentaje = round((self.completados / self.total) * 100) if self.total > 0 else 0
+
+    @property
+    def diagnostico_completado(self):
+        return self.total > 0
+
+
+def _clave(user_id):
+    return f'core:resumen:{user_id}'
+
+
+def _filas(user):
+    return (
+        Progreso.objects.using(DEFAULT_DB_ALIAS).filter(user=user)
+        .order_by('modulo__id')
+        .values_list('modulo_id', 'modulo__nombre', 'completado', 'puntaje')
+    )
+
+
+def calcular(user):
+    return Resumen([FilaProgreso(*fila) for fila in _filas(user)])
+
+
+def obtener(user):
+    """Resumen del usuario desde la caché; se recalcula solo si falta o está viejo."""
+    guardados = cache.get_many([CLAVE_VERSION, _clave(user.id)])
+    version = guardados.get(CLAVE_VERSION)
+    guardado = guardados.get(_clave(user.id))
+    if version is not None and guardado is not None and guardado[0] == version:
+        contar('resumen_cache_hit')
+        return guardado[1]
+
+    contar('resumen_cache_miss')
+    if version is None:
+        cache.add(CLAVE_VERSION, uuid.uuid4().hex, None)
+        version = cache.get(CLAVE_VERSION)
+    resumen = calcular(user)
+    cache.set(_clave(user.id), (version, resumen), DURACION)
+    return resumen
+
+
+async def aobtener(user):
+    """Igual que obtener, con la caché y el ORM async (vistas ASGI)."""
+    guardados = await cache.aget_many([CLAVE_VERSION, _clave(user.id)])
+    version = guardados.get(CLAVE_VERSION)
+    guardado = guardados.get(_clave(user.id))
+    if version is not None and guardado is not None and guardado[0] == version:
+        contar('resumen_cache_hit')
+        return guardado[1]
+
+    contar('resumen_cache_miss')
+    if version is None:
+        await cache.aadd(CLAVE_VERSION, uuid.uuid4().hex, None)
+        version = await cache.aget(CLAVE_VERSION)
+    resumen = Resumen([FilaProgreso(*fila) async for fila in _filas(user)])
+    await cache.aset(_clave(user.id), (version, resumen), DURACION)
+    return resumen
+
+
+def invalidar(user_id):
+    cache.delete(_clave(user_id))
+
+
+def invalidar_todos():
+    cache.set(CLAVE_VERSION, uuid.uuid4().hex, None)
@@ -0,0 +1,131 @@
+"""Sellos de versión por usuario para responder 304 Not Modified.
+
+`progreso`, `perfil` y `certificado` dependen solo de los datos del usuario
+(Progreso, Perfil, User), de los nombres de los módulos y, el certificado, del
+diseño del PDF. Cada usuario tiene en la caché de Django un sello, la hora de
+su último cambio, que las señales renuevan al confirmar la transacción.
+
+Con el sello se arman el ETag y el Last-Modified que usan los decoradores
+`condition` de las vistas: si el navegador trae el mismo ETag, Django responde
+304 sin ejecutar la vista (ni renderizar la plantilla ni dibujar el PDF).
+
+Si el sello se pierde de la caché se crea uno nuevo con la hora actual: en el
+peor caso se responde una vez completo de más. Que nunca salga un 304
+desactualizado depende de que todos los workers vean el mismo sello, es decir,
+de una caché compartida (ANSSD_REDIS_URL o ANSSD_MEMCACHED en settings): con
+LocMemCache y varios procesos, un worker que no vio el cambio conserva el
+sello viejo y puede responder 304 con datos anteriores.
+"""
+import time
+import uuid
+from datetime import datetime, timezone
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+
+from .resumen import CLAVE_VERSION as VERSION_MODULOS
+
+
+def _clave(user_id):
+    return f'core:sello:{user_id}'
+
+
+def tocar(user_id):
+    cache.set(_clave(user_id), time.time(), None)
+
+
+async def atocar(user_id):
+    await cache.aset(_clave(user_id), time.time(), None)
+
+
+def sello(user_id):
+    """(sello del usuario, versión global de los módulos)."""
+    guardados = cache.get_many([_clave(user_id), VERSION_MODULOS])
+    valor = guardados.get(_clave(user_id))
+    if valor is None:
+        cache.add(_clave(user_id), time.time(), None)
+        valor = cache.get(_clave(user_id))
+    version = guardados.get(VERSION_MODULOS)
+    if version is None:
+        # Igual que resumen.obtener: la versión se crea una vez y la comparten todos
+        cache.add(VERSION_MODULOS, uuid.uuid4().hex, None)
+        version = cache.get(VERSION_MODULOS)
+    return valor, version
+
+
+async def asello(user_id):
+    """Igual que sello, con la caché async (vistas ASGI)."""
+    guardados = await cache.aget_many([_clave(user_id), VERSION_MODULOS])
+    valor = guardados.get(_clave(user_id))
+    if valor is None:
+        await cache.aadd(_clave(user_id), time.time(), None)
+        valor = await cache.aget(_clave(user_id))
+    version = guardados.get(VERSION_MODULOS)
+    if version is None:
+        await cache.aadd(VERSION_MODULOS, uuid.uuid4().hex, None)
+        version = await cache.aget(VERSION_MODULOS)
+    return valor, version
+
+
+def _sello_de(request):
+    # Se guarda en la petición: condition pide el ETag y el Last-Modified por separado
+    if not hasattr(request, '_sello'):
+        request._sello = sello(request.user.id) if request.user.is_authenticated else None
+    return request._sello
+
+
+def _hay_mensajes(request):
+    return len(get_messages(request)) > 0
+
+
+def condicional(recurso, version=''):
+    """`condition` con ETag y Last-Modified a partir del sello del usuario.
+
+    Va debajo de login_required (o login_requerido en las vistas async), que
+    ya resolvió request.user. `version` se agrega al ETag (p. ej. la versión
+    de la plantilla del certificado). La respuesta es privada y el navegador
+    la revalida en cada visita (no-cache), que es cuando llega el 304.
+
+    En las vistas async el sello se lee antes con la caché async: las
+    funciones de `condition` son síncronas y corren en el event loop, así que
+    ahí solo leen request._sello.
+
+    Con mensajes de django.contrib.messages pendientes la vista se ejecuta
+    siempre: un 304 no renderiza la plantilla, no los consume y aparecerían
+    una página tarde.
+    """
+    def etag(request, *args, **kwargs):
+        datos = _sello_de(request)
+        if datos is None:
+            return None
+        valor, modulos = datos
+        extra = '-'.join(str(v) for v in (*kwargs.values(), version) if v != '')
+        return f'"{recurso}-{request.user.id}-{valor:.6f}-{modulos}{"-" + extra if extra else ""}"'
+
+    def ultima_modificacion(request, *args, **kwargs):
+        datos = _sello_de(request)
+        return datetime.fromtimestamp(datos[0], tz=timezone.utc) if datos else None
+
+    def decorador(vista):
+        condicionada = condition(etag_func=etag, last_modified_func=ultima_modificacion)(vista)
+        if iscoroutinefunction(vista):
+            @wraps(vista)
+            async def envuelta(request, *args, **kwargs):
+                # Los mensajes pueden estar en la sesión, que no tiene API async
+                if await sync_to_async(_hay_mensajes)(request):
+                    return await vista(request, *args, **kwargs)
+                if not hasattr(request, '_sello'):
+                    request._sello = await asello(request.user.id) if request.user.is_authenticated else None
+                return await condicionada(request, *args, **kwargs)
+        else:
+            @wraps(vista)
+            def envuelta(request, *args, **kwargs):
+                if _hay_mensajes(request):
+                    return vista(request, *args, **kwargs)
+                return condicionada(request, *args, **kwargs)
+        return cache_control(private=True, no_cache=True)(envuelta)
+    return decorador
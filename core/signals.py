@@ -0,0 +1,126 @@
+from django.db import transaction
+from django.contrib.auth.models import User
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Certificado, Perfil, Leccion, Modulo, Pregunta, Progreso, EntradaTutor
+from . import certificados, clasificacion, claves, conocimiento, lecciones, reportes, resumen, sellos, verificacion
+
+
+@receiver([post_save, post_delete], sender=Pregunta)
+def invalidar_claves(sender, **kwargs):
+    # Se invalida al confirmar la transacción, para que ningún worker vuelva a
+    # cargar el banco antes de que el cambio sea visible en la base de datos.
+    transaction.on_commit(claves.invalidar)
+
+
+@receiver([post_save, post_delete], sender=Perfil)
+def invalidar_certificados(sender, instance, **kwargs):
+    # El nombre impreso sale del Perfil: los PDF guardados dejan de ser válidos
+    transaction.on_commit(lambda: certificados.invalidar_usuario(instance.user_id))
+
+
+@receiver([post_save, post_delete], sender=Certificado)
+def invalidar_verificacion(sender, instance, **kwargs):
+    # Un código revocado deja de verificarse en cuanto se confirma el borrado
+    transaction.on_commit(lambda: verificacion.invalidar(instance.codigo))
+
+
+@receiver([post_save, post_delete], sender=EntradaTutor)
+def invalidar_tutor(sender, **kwargs):
+    transaction.on_commit(conocimiento.invalidar)
+
+
+@receiver([post_save, post_delete], sender=Progreso)
+def invalidar_resumen(sender, instance, **kwargs):
+    transaction.on_commit(lambda: resumen.invalidar(instance.user_id))
+
+
+@receiver([post_save, post_delete], sender=Progreso)
+@receiver([post_save, post_delete], sender=Perfil)
+@receiver(post_save, sender=User)
+def renovar_sello(sender, instance, **kwargs):
+    # progreso, perfil y certificado dejan de responder 304 (ver core/sellos.py).
+    # User se guarda también al iniciar sesión, que cambia el token CSRF de las páginas
+    user_id = instance.pk if sender is User else instance.user_id
+    transaction.on_commit(lambda: sellos.tocar(user_id))
+
+
+@receiver([post_save, post_delete], sender=Modulo)
+def invalidar_por_modulo(sender, instance, **kwargs):
+    # El nombre del módulo aparece en el resumen de todos los usuarios, en las
+    # hojas de preguntas, que se versionan junto con el banco de preguntas, y
+    # en la página de sus lecciones
+    transaction.on_commit(resumen.invalidar_todos)
+    transaction.on_commit(claves.invalidar)
+    transaction.on_commit(lambda: lecciones.invalidar(instance.pk))
+
+
+@receiver(pre_save, sender=Leccion)
+def renderizar_leccion(sender, instance, raw=False, **kwargs):
+    if not raw:
+        lecciones.preparar(instance)
+
+
+@receiver([post_save, post_delete], sender=Leccion)
+def invalidar_lecciones(sender, instance, **kwargs):
+    transaction.on_commit(lambda: lecciones.invalidar(instance.modulo_id))
+
+
+# --- Totales por cargo (ResumenCargo) ---
+# Van dentro de la transacción del cambio, no en on_commit: si el cambio se
+# deshace, el delta también.
+
+@receiver(pre_save, sender=Progreso)
+def recordar_progreso(sender, instance, **kwargs):
+    instance._anterior = None
+    if instance.pk is not None:
+        instance._anterior = (
+            Progreso.objects.filter(pk=instance.pk).values_list('completado', 'puntaje').first()
+        )
+
+
+@receiver(post_save, sender=Progreso)
+def reportar_progreso(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    anterior = getattr(instance, '_anterior', None)
+    actual = (instance.completado, instance.puntaje)
+    reportes.progreso_cambiado(instance.user_id, instance.modulo_id, anterior, actual)
+    transaction.on_commit(lambda: clasificacion.progreso_cambiado(instance.user_id, instance.modulo_id, anterior, actual))
+
+
+@receiver(post_save, sender=Progreso)
+def emitir_certificado(sender, instance, raw=False, **kwargs):
+    # Aprobaciones fuera del examen (admin, shell); el examen emite en guardar_progresos
+    anterior = getattr(instance, '_anterior', None)
+    if raw or not instance.completado or (anterior and anterior[0]):
+        return
+    verificacion.emitir(instance.user, instance.modulo_id)
+
+
+@receiver(post_delete, sender=Progreso)
+def reportar_progreso_borrado(sender, instance, **kwargs):
+    anterior = (instance.completado, instance.puntaje)
+    reportes.progreso_cambiado(instance.user_id, instance.modulo_id, anterior, None)
+    transaction.on_commit(lambda: clasificacion.progreso_cambiado(instance.user_id, instance.modulo_id, anterior, None))
+
+
+@receiver(pre_save, sender=Perfil)
+def recordar_cargo(sender, instance, **kwargs):
+    instance._cargo_anterior = reportes.cargo_de(instance.user_id)
+
+
+@receiver(post_save, sender=Perfil)
+def reportar_cargo(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    anterior = instance._cargo_anterior
+    reportes.mover_usuario(instance.user_id, anterior, instance.cargo)
+    transaction.on_commit(lambda: clasificacion.mover_usuario(instance.user_id, anterior, instance.cargo))
+
+
+@receiver(post_delete, sender=Perfil)
+def reportar_perfil_borrado(sender, instance, **kwargs):
+    reportes.mover_usuario(instance.user_id, instance.cargo, reportes.SIN_PERFIL)
+    transaction.on_commit(lambda: clasificacion.mover_usuario(instance.user_id, instance.cargo, reportes.SIN_PERFIL))
@@ -54,5 +54,23 @@ document.addEventListener('DOMContentLoaded', function() {
         }, 5000);
     });
 
+    // Certificado en preparación: consulta el estado y descarga cuando está listo
+    const esperaCertificado = document.querySelector('[data-estado-certificado]');
+    if (esperaCertificado) {
+        const consultar = () => {
+            fetch(esperaCertificado.dataset.estadoCertificado, { credentials: 'same-origin' })
+                .then(respuesta => respuesta.json())
+                .then(datos => {
+                    if (datos.descargar) {
+                        window.location = datos.url;
+                    } else {
+                        setTimeout(consultar, 2000);
+                    }
+                })
+                .catch(() => setTimeout(consultar, 5000));
+        };
+        setTimeout(consultar, 1000);
+    }
+
     console.log('Scripts cargados correctamente');
 });
\ No newline at end of file
@@ -1,3 +1,1527 @@
-from django.test import TestCase
+import asyncio
+import csv
+import gzip
+import json
+import pickle
+import random
+import re
+import shutil
+import tempfile
+import time
+import zipfile
+from io import BytesIO, StringIO
+from datetime import timedelta
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.test import RequestFactory, TestCase, override_settings
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, transaction
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.core.cache import cache
+from django.contrib.auth.models import User
+from django.contrib.messages import constants
+from django.contrib.messages.storage.base import Message
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.contrib.sessions.models import Session
+from django.http import HttpResponse, StreamingHttpResponse
+from django.conf import settings
+from django.urls import path, reverse
+from django.utils import timezone
+
+from .models import (
+    Perfil, Modulo, Pregunta, Progreso, EntradaTutor, Intento, EstadisticaPregunta, ResumenCargo, Certificado,
+    Leccion, TrabajoCertificado,
+)
+from .claves import CacheClaves, claves
+from . import claves as claves_banco
+from . import (
+    altas, analitica, banco, certificados, clasificacion, conocimiento, estaticos, lecciones, replica, reportes, resumen,
+    trabajos, verificacion, views_async,
+)
+from . import urls as urls_core
+from .calificacion import EXAMEN_EXPIRADO, EXAMEN_SIN_PREGUNTAS, guardar_progresos
+from .checks import cache_compartida
+from .metricas import registro
+
+CACHE_PRUEBAS = Path(tempfile.gettempdir()) / 'anssd_pruebas_certificados'
+
+
+def crear_modulo(nombre, preguntas_d=3, preguntas_e=0, correcta='A'):
+    modulo = Modulo.objects.create(nombre=nombre, descripcion=f'Descripción de {nombre}')
+    for tipo, cantidad in (('D', preguntas_d), ('E', preguntas_e)):
+        for i in range(cantidad):
+            Pregunta.objects.create(
+                modulo=modulo, texto=f'{nombre} {tipo}{i}',
+                opcion_a='a', opcion_b='b', opcion_c='c', opcion_d='d',
+                respuesta_correcta=correcta, tipo_pregunta=tipo,
+            )
+    return modulo
+
+
+def respuestas_diagnostico(letra='A'):
+    return {f'pregunta_{pk}': letra for pk in Pregunta.objects.filter(tipo_pregunta='D').values_list('id', flat=True)}
+
+
+def crear_modulos_variados(cantidad, desde=0):
+    # Cada módulo con otra respuesta correcta y otra cantidad de preguntas
+    return [crear_modulo(f'M{i}', preguntas_d=2 + i % 3, correcta='ABCD'[i % 4]) for i in range(desde, desde + cantidad)]
+
+
+def respuestas_variadas(semilla=0):
+    # Letras distintas y algunas en blanco: cada módulo saca otro puntaje y
+    # cada pregunta suma otros contadores
+    respuestas = {}
+    for pk, correcta in Pregunta.objects.filter(tipo_pregunta='D').values_list('id', 'respuesta_correcta'):
+        if (pk + semilla) % 7:
+            respuestas[f'pregunta_{pk}'] = correcta if (pk + semilla) % 3 else 'ABCD'[(pk + semilla) % 4]
+    return respuestas
+
+
+class BaseTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        claves.limpiar()
+        self.user = User.objects.create_user('estudiante', password='clave-segura-123')
+        Perfil.objects.create(user=self.user, nombre='Ana', apellido='Pérez')
+        self.client.force_login(self.user)
+
+
+class DiagnosticoTests(BaseTests):
+
+    def test_califica_y_guarda_progreso(self):
+        m1 = crear_modulo('Uno')
+        m2 = crear_modulo('Dos', correcta='B')
+        respuesta = self.client.post(reverse('diagnostico'), respuestas_diagnostico('A'))
+        self.assertRedirects(respuesta, reverse('progreso'))
+        self.assertEqual(Progreso.objects.get(user=self.user, modulo=m1).puntaje, 3)
+        self.assertEqual(Progreso.objects.get(user=self.user, modulo=m2).puntaje, 0)
+        self.assertEqual(self.client.session['brechas'], [m2.id])
+
+    def test_repetir_diagnostico_actualiza_sin_duplicar(self):
+        m1 = crear_modulo('Uno')
+        self.client.post(reverse('diagnostico'), respuestas_diagnostico('A'))
+        self.client.post(reverse('diagnostico'), respuestas_diagnostico('C'))
+        self.assertEqual(Progreso.objects.filter(user=self.user, modulo=m1).count(), 1)
+        self.assertEqual(Progreso.objects.get(user=self.user, modulo=m1).puntaje, 0)
+
+    def contar_consultas(self, metodo, datos=None):
+        with CaptureQueriesContext(connection) as ctx:
+            getattr(self.client, metodo)(reverse('diagnostico'), datos or {})
+        return len(ctx.captured_queries)
+
+    def test_consultas_constantes_con_mas_modulos(self):
+        crear_modulos_variados(2)
+        # Primer envío crea los Progreso; el segundo los actualiza con otras respuestas
+        get_pocos = self.contar_consultas('get')
+        post_pocos = self.contar_consultas('post', respuestas_variadas())
+        repost_pocos = self.contar_consultas('post', respuestas_variadas(semilla=1))
+
+        Progreso.objects.all().delete()
+        with self.captureOnCommitCallbacks(execute=True):
+            crear_modulos_variados(10, desde=2)
+        self.assertEqual(self.contar_consultas('get'), get_pocos)
+        self.assertEqual(self.contar_consultas('post', respuestas_variadas()), post_pocos)
+        self.assertEqual(self.contar_consultas('post', respuestas_variadas(semilla=1)), repost_pocos)
+        # Los puntajes varían entre módulos: ningún agrupamiento por valor oculta el costo
+        self.assertGreater(len(set(Progreso.objects.filter(user=self.user).values_list('puntaje', flat=True))), 2)
+
+
+class CacheClavesTests(BaseTests):
+
+    def test_segunda_lectura_no_consulta(self):
+        modulo = crear_modulo('Uno', preguntas_d=2, preguntas_e=3)
+        with self.assertNumQueries(1):
+            examen = claves.obtener(modulo.id, 'E')
+        with self.assertNumQueries(0):
+            self.assertEqual(claves.obtener(modulo.id, 'E'), examen)
+        self.assertEqual(len(examen), 3)
+        self.assertEqual(examen[0].respuesta_correcta, 'A')
+
+    def test_guardar_pregunta_invalida(self):
+        modulo = crear_modulo('Uno', preguntas_d=2)
+        claves.obtener(modulo.id, 'D')
+        pregunta = Pregunta.objects.filter(modulo=modulo).first()
+        pregunta.respuesta_correcta = 'C'
+        with self.captureOnCommitCallbacks(execute=True):
+            pregunta.save()
+        with self.assertNumQueries(1):
+            self.assertEqual(claves.obtener(modulo.id, 'D')[0].respuesta_correcta, 'C')
+
+    def test_borrar_pregunta_invalida(self):
+        modulo = crear_modulo('Uno', preguntas_d=2)
+        claves.obtener(modulo.id, 'D')
+        with self.captureOnCommitCallbacks(execute=True):
+            Pregunta.objects.filter(modulo=modulo).first().delete()
+        self.assertEqual(len(claves.obtener(modulo.id, 'D')), 1)
+
+    def test_lru_respeta_limite(self):
+        pequena = CacheClaves(max_preguntas=4)
+        modulos = [crear_modulo(f'M{i}', preguntas_d=2) for i in range(3)]
+        pequena.obtener(modulos[0].id, 'D')
+        pequena.obtener(modulos[1].id, 'D')
+        pequena.obtener(modulos[0].id, 'D')  # el módulo 0 pasa a ser el más reciente
+        pequena.obtener(modulos[2].id, 'D')
+        self.assertEqual(len(pequena), 2)
+        with self.assertNumQueries(0):
+            pequena.obtener(modulos[0].id, 'D')
+        with self.assertNumQueries(1):
+            pequena.obtener(modulos[1].id, 'D')
+
+    def test_examen_por_ids_desde_memoria_y_dentro_del_limite(self):
+        pequena = CacheClaves(max_preguntas=4)
+        modulos = [crear_modulo(f'M{i}', preguntas_d=0, preguntas_e=3) for i in range(2)]
+        ids = pequena.ids(modulos[0].id, 'E')
+        with self.assertNumQueries(0):
+            preguntas = pequena.por_ids(modulos[0].id, 'E', ids[::-1])
+        self.assertEqual([p.id for p in preguntas], list(ids[::-1]))
+        # El segundo módulo expulsa al primero, y con él su índice por id
+        pequena.ids(modulos[1].id, 'E')
+        self.assertEqual((len(pequena), len(pequena._indices)), (1, 1))
+        with self.assertNumQueries(1):
+            pequena.por_ids(modulos[0].id, 'E', ids)
+
+    def test_examen_califica_desde_cache(self):
+        modulo = crear_modulo('Uno', preguntas_d=0, preguntas_e=10)
+        ids = Pregunta.objects.filter(modulo=modulo).values_list('id', flat=True)
+        self.client.get(reverse('examen_modulo', args=[modulo.id]))
+        respuesta = self.client.post(reverse('examen_modulo', args=[modulo.id]), {f'pregunta_{pk}': 'A' for pk in ids})
+        self.assertRedirects(respuesta, reverse('progreso'))
+        progreso = Progreso.objects.get(user=self.user, modulo=modulo)
+        self.assertTrue(progreso.completado)
+        self.assertEqual(progreso.puntaje, 10)
+
+
+@override_settings(CERTIFICADOS_CACHE_DIR=CACHE_PRUEBAS)
+class CertificadoTests(BaseTests):
+
+    def setUp(self):
+        super().setUp()
+        shutil.rmtree(CACHE_PRUEBAS, ignore_errors=True)
+        self.modulo = crear_modulo('Uso seguro de internet', preguntas_d=0)
+        Progreso.objects.create(user=self.user, modulo=self.modulo, completado=True, puntaje=8)
+
+    def tearDown(self):
+        shutil.rmtree(CACHE_PRUEBAS, ignore_errors=True)
+
+    def descargar(self):
+        respuesta = self.client.get(reverse('certificado', args=[self.modulo.id]))
+        self.assertEqual(respuesta['Content-Type'], 'application/pdf')
+        return b''.join(respuesta.streaming_content)
+
+    def test_pdf_se_sirve_desde_cache(self):
+        primero = self.descargar()
+        self.assertTrue(primero.startswith(b'%PDF'))
+        with mock.patch('core.certificados.renderizar_pdf') as renderizar:
+            self.assertEqual(self.descargar(), primero)
+        renderizar.assert_not_called()
+
+    def test_cambiar_perfil_invalida(self):
+        self.descargar()
+        self.assertTrue(any(Path(CACHE_PRUEBAS).rglob('*.pdf')))
+        perfil = self.user.perfil
+        perfil.nombre = 'Beatriz'
+        with self.captureOnCommitCallbacks(execute=True):
+            perfil.save()
+        self.assertFalse(any(Path(CACHE_PRUEBAS).rglob('*.pdf')))
+        with mock.patch('core.certificados.renderizar_pdf', wraps=certificados.renderizar_pdf) as renderizar:
+            self.descargar()
+        self.assertEqual(renderizar.call_args.args[0]['nombre_completo'], 'BEATRIZ PÉREZ')
+
+    def test_modulo_no_completado_redirige(self):
+        Progreso.objects.filter(user=self.user).update(completado=False)
+        respuesta = self.client.get(reverse('certificado', args=[self.modulo.id]))
+        self.assertRedirects(respuesta, reverse('progreso'))
+
+
+class VerificacionTests(BaseTests):
+
+    def setUp(self):
+        super().setUp()
+        self.modulo = crear_modulo('Uno', preguntas_d=0, preguntas_e=10)
+
+    def aprobar(self):
+        url = reverse('examen_modulo', args=[self.modulo.id])
+        self.client.get(url)
+        self.client.post(url, {f'pregunta_{pk}': 'A' for pk in self.client.session[f'examen_{self.modulo.id}']})
+        return Certificado.objects.get(user=self.user, modulo=self.modulo)
+
+    def test_aprobar_emite_el_codigo_impreso(self):
+        certificado = self.aprobar()
+        datos = certificados.datos_certificado(self.user, self.modulo)
+        self.assertEqual(certificado.codigo, datos['codigo'])
+        self.assertRegex(certificado.codigo, rf'^CD-{self.user.id:06d}-{self.modulo.id:03d}-\d{{6}}-[0-9A-F]{{16}}$')
+        # Repetir el examen no emite otro
+        Progreso.objects.filter(user=self.user).update(completado=False)
+        self.aprobar()
+        self.assertEqual(Certificado.objects.count(), 1)
+
+    def test_verificar_publico_y_en_cache(self):
+        codigo = self.aprobar().codigo
+        self.client.logout()
+        url = reverse('verificar_certificado', args=[codigo])
+        respuesta = self.client.get(url)
+        self.assertContains(respuesta, 'Ana Pérez')
+        self.assertIn('public', respuesta['Cache-Control'])
+        with self.assertNumQueries(0):
+            respuesta = self.client.get(url.lower(), {'formato': 'json'})
+        self.assertEqual(respuesta.json()['titular'], 'Ana Pérez')
+        self.assertTrue(respuesta.json()['valido'])
+
+    def test_firma_falsa_no_consulta_la_base(self):
+        codigo = verificacion.codigo(self.user.id, self.modulo.id, self.user.date_joined)
+        falso = codigo[:-1] + ('0' if codigo[-1] != '0' else '1')
+        self.client.logout()
+        for valor in (falso, 'CD-000001-001-202401', 'cualquier-cosa'):
+            with self.assertNumQueries(0):
+                respuesta = self.client.get(reverse('verificar_certificado', args=[valor]))
+            self.assertEqual(respuesta.status_code, 404)
+        # Firma correcta pero nunca emitido (o revocado)
+        self.assertEqual(self.client.get(reverse('verificar_certificado', args=[codigo])).status_code, 404)
+
+    def test_revocar_invalida_la_cache(self):
+        certificado = self.aprobar()
+        url = reverse('verificar_certificado', args=[certificado.codigo])
+        self.assertEqual(self.client.get(url).status_code, 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            certificado.delete()
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_emitir_completados(self):
+        otro = User.objects.create_user('otro')
+        Progreso.objects.bulk_create([Progreso(user=otro, modulo=self.modulo, completado=True, puntaje=9),
+                                      Progreso(user=self.user, modulo=self.modulo, puntaje=2)])
+        self.assertEqual(verificacion.emitir_completados(), 1)
+        self.assertEqual(verificacion.emitir_completados(), 0)
+        codigo = Certificado.objects.get(user=otro).codigo
+        self.assertEqual(verificacion.verificar(codigo)['titular'], 'otro')
+
+    def test_completar_desde_el_admin_emite_y_limpia_la_cache(self):
+        codigo = verificacion.codigo(self.user.id, self.modulo.id, self.user.date_joined)
+        self.assertIsNone(verificacion.verificar(codigo))  # queda NO_EMITIDO en la caché
+        progreso = Progreso.objects.create(user=self.user, modulo=self.modulo, puntaje=5)
+        self.assertFalse(Certificado.objects.exists())
+        progreso.completado = True
+        with self.captureOnCommitCallbacks(execute=True):
+            progreso.save()
+        self.assertEqual(Certificado.objects.get().codigo, codigo)
+        self.assertEqual(verificacion.verificar(codigo)['titular'], 'Ana Pérez')
+
+
+@override_settings(CERTIFICADOS_CACHE_DIR=CACHE_PRUEBAS)
+class ColaCertificadosTests(BaseTests):
+
+    def setUp(self):
+        super().setUp()
+        shutil.rmtree(CACHE_PRUEBAS, ignore_errors=True)
+        self.modulo = crear_modulo('Uno', preguntas_d=0, preguntas_e=10)
+        url = reverse('examen_modulo', args=[self.modulo.id])
+        self.client.get(url)
+        self.client.post(url, {f'pregunta_{pk}': 'A' for pk in self.client.session[f'examen_{self.modulo.id}']})
+
+    def tearDown(self):
+        shutil.rmtree(CACHE_PRUEBAS, ignore_errors=True)
+
+    def test_aprobar_encola_y_el_worker_lo_deja_listo(self):
+        trabajo = TrabajoCertificado.objects.get(user=self.user, modulo=self.modulo)
+        self.assertEqual(trabajo.estado, TrabajoCertificado.PENDIENTE)
+        call_command('procesar_certificados', '--una-vez', stdout=StringIO())
+        trabajo.refresh_from_db()
+        self.assertEqual((trabajo.estado, trabajo.intentos), (TrabajoCertificado.LISTO, 1))
+        self.assertEqual(self.client.get(reverse('estado_certificado', args=[self.modulo.id])).json()['estado'], 'listo')
+        with mock.patch('core.certificados.renderizar_pdf') as renderizar:
+            respuesta = self.client.get(reverse('certificado', args=[self.modulo.id]))
+        renderizar.assert_not_called()
+        self.assertEqual(respuesta['Content-Type'], 'application/pdf')
+
+    def test_pendiente_responde_202_y_estado(self):
+        respuesta = self.client.get(reverse('certificado', args=[self.modulo.id]))
+        self.assertEqual(respuesta.status_code, 202)
+        self.assertContains(respuesta, 'data-estado-certificado', status_code=202)
+        self.assertIn('no-store', respuesta['Cache-Control'])
+        estado = self.client.get(reverse('estado_certificado', args=[self.modulo.id])).json()
+        self.assertEqual((estado['estado'], estado['descargar']), ('pendiente', False))
+
+    def test_sin_worker_la_descarga_lo_dibuja(self):
+        TrabajoCertificado.objects.update(creado=timezone.now() - timedelta(minutes=5))
+        respuesta = self.client.get(reverse('certificado', args=[self.modulo.id]))
+        self.assertEqual(respuesta['Content-Type'], 'application/pdf')
+
+    def test_fallos_reintentan_y_se_ven_en_metricas(self):
+        with mock.patch('core.certificados.renderizar_pdf', side_effect=RuntimeError('sin fuente')):
+            for _ in range(trabajos.MAX_INTENTOS):
+                self.assertFalse(trabajos.procesar(trabajos.tomar(10)[0]))
+        trabajo = TrabajoCertificado.objects.get()
+        self.assertEqual(trabajo.estado, TrabajoCertificado.FALLIDO)
+        self.assertEqual(trabajo.error, 'RuntimeError: sin fuente')
+        self.assertEqual(trabajos.tomar(10), [])
+        texto = trabajos.prometheus()
+        self.assertIn('anssd_cola_certificados{estado="fallido"} 1', texto)
+        self.assertIn('anssd_cola_certificados{estado="pendiente"} 0', texto)
+
+
+@override_settings(CERTIFICADOS_CACHE_DIR=CACHE_PRUEBAS)
+class CertificadosLoteTests(BaseTests):
+
+    def setUp(self):
+        super().setUp()
+        self.modulo = crear_modulo('Comunicación digital', preguntas_d=0)
+        for i in range(3):
+            user = User.objects.create_user(f'empleado{i}')
+            Perfil.objects.create(user=user, nombre=f'N{i}', apellido='X', cargo='FINANZAS' if i < 2 else 'VENTAS')
+            Progreso.objects.create(user=user, modulo=self.modulo, completado=True, puntaje=9)
+        Progreso.objects.create(user=self.user, modulo=self.modulo, completado=False)
+
+    def leer_zip(self, contenido):
+        with zipfile.ZipFile(BytesIO(contenido)) as zf:
+            return {nombre: zf.read(nombre) for nombre in zf.namelist()}
+
+    def test_comando_filtra_por_cargo_y_coincide_con_descarga(self):
+        salida = Path(tempfile.mkdtemp()) / 'lote.zip'
+        self.addCleanup(shutil.rmtree, salida.parent)
+        for workers in (1, 2):
+            call_command('generar_certificados', cargo='FINANZAS', workers=workers, lote=1, salida=str(salida), stdout=StringIO())
+            archivos = self.leer_zip(salida.read_bytes())
+            self.assertEqual(sorted(archivos), [
+                'FINANZAS/certificado_Comunicación digital_empleado0.pdf',
+                'FINANZAS/certificado_Comunicación digital_empleado1.pdf',
+            ])
+            user = User.objects.get(username='empleado0')
+            esperado = certificados.renderizar_pdf(certificados.datos_certificado(user, self.modulo))
+            self.assertEqual(archivos['FINANZAS/certificado_Comunicación digital_empleado0.pdf'], esperado)
+
+    def test_endpoint_solo_staff(self):
+        respuesta = self.client.get(reverse('certificados_lote'))
+        self.assertEqual(respuesta.status_code, 302)
+
+        self.user.is_staff = True
+        self.user.save()
+        respuesta = self.client.get(reverse('certificados_lote'), {'modulo': self.modulo.id})
+        self.assertEqual(respuesta['Content-Type'], 'application/zip')
+        self.assertEqual(len(self.leer_zip(b''.join(respuesta.streaming_content))), 3)
+
+
+class ProgresoTests(BaseTests):
+
+    def crear_progresos(self, cantidad, desde=0):
+        with self.captureOnCommitCallbacks(execute=True):
+            for i in range(desde, desde + cantidad):
+                modulo = crear_modulo(f'M{i}', preguntas_d=0)
+                Progreso.objects.create(user=self.user, modulo=modulo, completado=i % 2 == 0, puntaje=i)
+
+    def contar_consultas(self):
+        with CaptureQueriesContext(connection) as ctx:
+            respuesta = self.client.get(reverse('progreso'))
+        self.assertEqual(respuesta.status_code, 200)
+        return respuesta, len(ctx.captured_queries)
+
+    def test_resumen(self):
+        self.crear_progresos(4)
+        respuesta, _ = self.contar_consultas()
+        self.assertEqual(respuesta.context['completados'], 2)
+        self.assertEqual(respuesta.context['total'], 4)
+        self.assertEqual(respuesta.context['porcentaje_real'], 50)
+        self.assertEqual([p.modulo_nombre for p in respuesta.context['modulos_pendientes']], ['M1', 'M3'])
+
+    def test_consultas_constantes_con_mas_modulos(self):
+        # Progresos con puntajes distintos por módulo, escritos por el diagnóstico
+        with self.captureOnCommitCallbacks(execute=True):
+            crear_modulos_variados(2)
+            self.client.post(reverse('diagnostico'), respuestas_variadas())
+        _, pocos = self.contar_consultas()
+        with self.captureOnCommitCallbacks(execute=True):
+            crear_modulos_variados(10, desde=2)
+            self.client.post(reverse('diagnostico'), respuestas_variadas(semilla=2))
+        respuesta, muchos = self.contar_consultas()
+        self.assertEqual(len(respuesta.context['progresos']), 12)
+        self.assertGreater(len({p.puntaje for p in respuesta.context['progresos']}), 2)
+        self.assertEqual(pocos, muchos)
+        # sesión + usuario + progresos con su módulo
+        self.assertEqual(muchos, 3)
+
+    def test_resumen_en_cache(self):
+        self.crear_progresos(3)
+        self.contar_consultas()
+        registro.limpiar()
+        respuesta, consultas = self.contar_consultas()
+        # sesión + usuario; el resumen sale de la caché
+        self.assertEqual(consultas, 2)
+        self.assertEqual(respuesta.context['total'], 3)
+        self.assertEqual(registro.eventos['resumen_cache_hit'], 1)
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(reverse('home'))
+        self.assertEqual(len(ctx.captured_queries), 2)
+
+    def test_cambios_invalidan_resumen(self):
+        self.crear_progresos(2)
+        self.contar_consultas()
+        progreso = Progreso.objects.get(user=self.user, modulo__nombre='M1')
+        progreso.completado = True
+        with self.captureOnCommitCallbacks(execute=True):
+            progreso.save()
+        respuesta, _ = self.contar_consultas()
+        self.assertEqual(respuesta.context['completados'], 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Modulo.objects.filter(nombre='M0').update(nombre='Renombrado')
+            Modulo.objects.get(nombre='Renombrado').save()
+        respuesta, _ = self.contar_consultas()
+        self.assertEqual(respuesta.context['progresos'][0].modulo_nombre, 'Renombrado')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            guardar_progresos(self.user, {progreso.modulo_id: {'puntaje': 1}})
+        respuesta, _ = self.contar_consultas()
+        self.assertEqual(respuesta.context['progresos'][1].puntaje, 1)
+
+
+class CondicionalTests(BaseTests):
+
+    def setUp(self):
+        super().setUp()
+        shutil.rmtree(CACHE_PRUEBAS, ignore_errors=True)
+        self.modulo = crear_modulo('Uno', preguntas_e=10)
+
+    def tearDown(self):
+        shutil.rmtree(CACHE_PRUEBAS, ignore_errors=True)
+
+    def revalidar(self, url, respuesta):
+        return self.client.get(url, HTTP_IF_NONE_MATCH=respuesta['ETag'])
+
+    def test_progreso_304_sin_ejecutar_la_vista(self):
+        url = reverse('progreso')
+        primera = self.client.get(url)
+        self.assertIn('private', primera['Cache-Control'])
+        self.assertIn('Last-Modified', primera)
+        with mock.patch('core.views.resumen.obtener') as obtener:
+            self.assertEqual(self.revalidar(url, primera).status_code, 304)
+        obtener.assert_not_called()
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=primera['Last-Modified']).status_code, 304)
+
+        # Cambian los datos: página completa
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('diagnostico'), respuestas_diagnostico('A'))
+        segunda = self.revalidar(url, primera)
+        self.assertEqual(segunda.status_code, 200)
+        self.assertEqual(segunda.context['total'], 1)
+
+        # Cambia el nombre de un módulo: también
+        with self.captureOnCommitCallbacks(execute=True):
+            self.modulo.nombre = 'Renombrado'
+            self.modulo.save()
+        self.assertEqual(self.revalidar(url, segunda).status_code, 200)
+
+    def test_mensaje_del_examen_no_queda_en_un_304(self):
+        url = reverse('examen_modulo', args=[self.modulo.id])
+        self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(url, {})
+        con_mensaje = self.client.get(reverse('progreso'))
+        self.assertIsNotNone(con_mensaje.context['mensaje_resultado'])
+        sin_mensaje = self.revalidar(reverse('progreso'), con_mensaje)
+        self.assertEqual(sin_mensaje.status_code, 200)
+        self.assertIsNone(sin_mensaje.context['mensaje_resultado'])
+        self.assertEqual(self.revalidar(reverse('progreso'), sin_mensaje).status_code, 304)
+
+    def test_mensajes_pendientes_no_quedan_en_un_304(self):
+        url = reverse('perfil')
+        primera = self.client.get(url)
+        # Un mensaje de otra vista, sin cambiar los datos del usuario
+        almacen = CookieStorage(RequestFactory().get('/'))
+        self.client.cookies[almacen.cookie_name] = almacen._encode([Message(constants.INFO, 'Aviso pendiente')])
+        con_mensaje = self.revalidar(url, primera)
+        self.assertContains(con_mensaje, 'Aviso pendiente')
+        self.assertEqual(self.revalidar(url, primera).status_code, 304)
+
+    def test_perfil_y_certificado(self):
+        Progreso.objects.create(user=self.user, modulo=self.modulo, completado=True, puntaje=9)
+        perfil = self.client.get(reverse('perfil'))
+        self.assertEqual(self.revalidar(reverse('perfil'), perfil).status_code, 304)
+
+        url = reverse('certificado', args=[self.modulo.id])
+        with override_settings(CERTIFICADOS_CACHE_DIR=CACHE_PRUEBAS):
+            certificado = self.client.get(url)
+            with mock.patch('core.certificados.obtener_pdf') as obtener:
+                self.assertEqual(self.revalidar(url, certificado).status_code, 304)
+            obtener.assert_not_called()
+            self.assertIn(f'-{self.modulo.id}-', certificado['ETag'])
+
+            with self.captureOnCommitCallbacks(execute=True):
+                self.user.perfil.nombre = 'Beatriz'
+                self.user.perfil.save()
+            self.assertEqual(self.revalidar(reverse('perfil'), perfil).status_code, 200)
+            nuevo = self.revalidar(url, certificado)
+            self.assertEqual(nuevo.status_code, 200)
+            self.assertEqual(nuevo['Content-Type'], 'application/pdf')
+
+
+class EstaticosTests(BaseTests):
+
+    def setUp(self):
+        super().setUp()
+        raiz = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, raiz)
+        ajustes = override_settings(STATIC_ROOT=raiz)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+    def test_minificadores_respetan_cadenas(self):
+        css = "/* tema */\n.a  >  .b ,\n.c {\n  content: ' a  b ';\n  color : red;\n}\n@media (max-width: 10px) { .d { top: 0; } }"
+        self.assertEqual(estaticos.minificar_css(css),
+                         ".a>.b,.c{content:' a  b ';color :red}@media (max-width:10px){.d{top:0}}")
+        js = "// inicio\nconst url = 'http://x/*y*/';   /* bloque */\nconst r = /a\\/\\//g;\n\n  return a / b;"
+        self.assertEqual(estaticos.minificar_js(js), "const url = 'http://x/*y*/';\nconst r = /a\\/\\//g;\nreturn a / b;")
+
+    def test_construir_y_servir(self):
+        call_command('construir_estaticos', stdout=StringIO(), stderr=StringIO())
+        url = self.client.get(reverse('home')).content.decode()
+        hoja = re.search(r'href="(/static/core/css/styles\.[0-9a-f]{12}\.css)"', url)[1]
+
+        client = self.client_class()
+        respuesta = client.get(hoja, HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(respuesta['Content-Encoding'], 'gzip')
+        self.assertEqual(respuesta['Cache-Control'], estaticos.CACHE_INMUTABLE)
+        self.assertEqual(respuesta['Vary'], 'Accept-Encoding')
+        self.assertTrue(respuesta['Content-Type'].startswith('text/css'))
+        minificado = gzip.decompress(b''.join(respuesta.streaming_content))
+        self.assertNotIn(b'/*', minificado)
+
+        respuesta = client.get(hoja, HTTP_ACCEPT_ENCODING='gzip;q=0')
+        self.assertNotIn('Content-Encoding', respuesta)
+        self.assertEqual(b''.join(respuesta.streaming_content), minificado)
+        self.assertEqual(client.get(hoja, HTTP_IF_NONE_MATCH=respuesta['ETag']).status_code, 304)
+
+        respuesta = client.get('/static/core/css/styles.css')
+        self.assertEqual(respuesta['Cache-Control'], estaticos.CACHE_SIN_HASH)
+
+
+class ProgresoUnicoTests(BaseTests):
+
+    def test_restriccion_unica(self):
+        modulo = crear_modulo('Uno', preguntas_d=0)
+        Progreso.objects.create(user=self.user, modulo=modulo)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Progreso.objects.create(user=self.user, modulo=modulo)
+
+    def test_upsert_actualiza_solo_campos_pedidos(self):
+        modulo = crear_modulo('Uno', preguntas_d=0)
+        Progreso.objects.create(user=self.user, modulo=modulo, completado=True, puntaje=9)
+        # Savepoint, usuario bloqueado con su cargo, valores anteriores, upsert, delta del reporte y release
+        with self.assertNumQueries(6):
+            guardar_progresos(self.user, {modulo.id: {'puntaje': 2}})
+        progreso = Progreso.objects.get(user=self.user, modulo=modulo)
+        self.assertEqual((progreso.completado, progreso.puntaje), (True, 2))
+
+
+class TutorTests(BaseTests):
+
+    def test_respuestas_iniciales_migradas(self):
+        self.assertEqual(EntradaTutor.objects.count(), 36)
+
+    def test_pregunta_exacta(self):
+        respuesta = self.client.post(reverse('tutor'), {'pregunta': '¿Qué es phishing?'})
+        self.assertTrue(respuesta.context['respuesta'].startswith('Es un intento fraudulento'))
+
+    def test_texto_libre_sin_tildes(self):
+        resultados = conocimiento.indice().buscar('como creo una contrasena segura', k=3)
+        self.assertEqual(resultados[0][2], '¿Cómo crear una contraseña segura?')
+        self.assertEqual(len(resultados), 3)
+
+    def test_sin_coincidencias(self):
+        respuesta = self.client.post(reverse('tutor'), {'pregunta': 'zzzz qqqq'})
+        self.assertIn('no tengo una respuesta', respuesta.context['respuesta'])
+        self.assertEqual(respuesta.context['sugerencias'], [])
+
+    def test_editar_entrada_reconstruye_indice(self):
+        conocimiento.indice()
+        with self.captureOnCommitCallbacks(execute=True):
+            EntradaTutor.objects.create(pregunta='¿Qué es un escáner de puertos?', respuesta='Una herramienta de red.')
+        self.assertEqual(conocimiento.indice().buscar('escaner puertos')[0][3], 'Una herramienta de red.')
+
+
+class BenchmarkTests(TestCase):
+
+    def test_comandos_de_carga_no_escriben_en_otra_base_sin_yes(self):
+        for comando in ('bench_progreso', 'sembrar_datos'):
+            with self.subTest(comando), self.assertRaisesMessage(CommandError, '--yes'):
+                call_command(comando, stdout=StringIO())
+        self.assertFalse(User.objects.exists())
+        self.assertFalse(Modulo.objects.exists())
+
+    def test_sembrar_y_medir_vistas(self):
+        call_command('sembrar_datos', usuarios=5, modulos=2, preguntas=3, yes=True, stdout=StringIO())
+        self.assertEqual(User.objects.filter(username__startswith='bench_').count(), 5)
+        self.assertEqual(Perfil.objects.count(), 5)
+        self.assertEqual(Pregunta.objects.count(), 12)
+        self.assertEqual(Progreso.objects.count(), 10)
+
+        # Sembrar dos veces con la misma semilla da los mismos datos
+        antes = list(Progreso.objects.order_by('id').values_list('puntaje', flat=True))
+        call_command('sembrar_datos', usuarios=5, modulos=2, preguntas=3, limpiar=True, yes=True, stdout=StringIO())
+        self.assertEqual(list(Progreso.objects.order_by('id').values_list('puntaje', flat=True)), antes)
+
+        # Garantiza un usuario con un módulo aprobado y otro pendiente
+        user = User.objects.filter(username__startswith='bench_').first()
+        primero, segundo = Progreso.objects.filter(user=user).order_by('id')
+        Progreso.objects.filter(id=primero.id).update(completado=True)
+        Progreso.objects.filter(id=segundo.id).update(completado=False)
+
+        salida = Path(tempfile.mkdtemp()) / 'bench.json'
+        self.addCleanup(shutil.rmtree, salida.parent)
+        call_command('bench_vistas', repeticiones=2, salida=str(salida), stdout=StringIO())
+        informe = json.loads(salida.read_text(encoding='utf-8'))
+        self.assertIn('progreso', informe['vistas'])
+        self.assertEqual(informe['vistas']['progreso']['codigos'], [200])
+        call_command('bench_vistas', repeticiones=2, comparar=str(salida), tolerancia=100, stdout=StringIO())
+
+    def test_arranque_sin_reportlab(self):
+        salida = Path(tempfile.mkdtemp()) / 'arranque.json'
+        self.addCleanup(shutil.rmtree, salida.parent)
+        call_command('bench_arranque', repeticiones=1, salida=str(salida), stdout=StringIO())
+        arranque = json.loads(salida.read_text(encoding='utf-8'))['arranque']
+        self.assertEqual(arranque['estado'], '200 OK')
+        # ReportLab se carga con el primer certificado, no al importar la aplicación
+        self.assertFalse(arranque['reportlab_importado'])
+
+
+class CacheCompartidaTests(TestCase):
+
+    def test_advierte_cache_local_al_desplegar(self):
+        locmem = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+        redis = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://x'}}
+        with override_settings(CACHES=locmem):
+            self.assertEqual([a.id for a in cache_compartida(None)], ['core.W001'])
+        with override_settings(CACHES=redis):
+            self.assertEqual(cache_compartida(None), [])
+
+
+class MetricasTests(BaseTests):
+
+    def setUp(self):
+        super().setUp()
+        registro.limpiar()
+
+    def test_server_timing(self):
+        respuesta = self.client.get(reverse('progreso'))
+        cabecera = respuesta['Server-Timing']
+        self.assertRegex(cabecera, r'sql;dur=[\d.]+;desc="\d+ consultas"')
+        self.assertIn('plantilla;dur=', cabecera)
+        self.assertIn('total;dur=', cabecera)
+
+    def test_metricas_solo_staff(self):
+        self.client.get(reverse('home'))
+        self.assertEqual(self.client.get(reverse('metricas')).status_code, 403)
+        self.user.is_staff = True
+        self.user.save()
+        texto = self.client.get(reverse('metricas')).content.decode()
+        self.assertIn('# TYPE anssd_request_duration_seconds histogram', texto)
+        self.assertIn('anssd_request_duration_seconds_count{vista="home"} 1', texto)
+        self.assertIn('anssd_request_duration_seconds_bucket{vista="home",le="+Inf"} 1', texto)
+        self.assertIn('anssd_requests_total{vista="home",codigo="200"} 1', texto)
+
+    @override_settings(METRICAS_TOKEN='secreto')
+    def test_metricas_con_token(self):
+        self.client.logout()
+        self.assertEqual(self.client.get(reverse('metricas'), HTTP_AUTHORIZATION='Bearer otro').status_code, 403)
+        self.assertEqual(self.client.get(reverse('metricas'), HTTP_AUTHORIZATION='Bearer secreto').status_code, 200)
+
+
+class HojasTests(BaseTests):
+
+    def test_hoja_diagnostico_en_cache(self):
+        crear_modulo('Uno')
+        primera = self.client.get(reverse('diagnostico'))
+        self.assertContains(primera, 'Uno D0')
+        with CaptureQueriesContext(connection) as ctx:
+            segunda = self.client.get(reverse('diagnostico'))
+        # sesión + usuario: ni módulos ni preguntas
+        self.assertEqual(len(ctx.captured_queries), 2)
+        self.assertContains(segunda, 'Uno D0')
+        self.assertContains(segunda, 'csrfmiddlewaretoken')
+
+    def test_cambio_de_pregunta_invalida_hoja(self):
+        modulo = crear_modulo('Uno', preguntas_d=1, preguntas_e=1)
+        self.client.get(reverse('diagnostico'))
+        self.client.get(reverse('examen_modulo', args=[modulo.id]))
+        with self.captureOnCommitCallbacks(execute=True):
+            Pregunta.objects.filter(modulo=modulo).update(texto='Texto nuevo')
+            for pregunta in Pregunta.objects.filter(modulo=modulo):
+                pregunta.save()
+        self.assertContains(self.client.get(reverse('diagnostico')), 'Texto nuevo')
+        self.assertContains(self.client.get(reverse('examen_modulo', args=[modulo.id])), 'Texto nuevo')
+
+    def test_cambio_de_modulo_invalida_hoja(self):
+        modulo = crear_modulo('Uno')
+        self.client.get(reverse('diagnostico'))
+        modulo.nombre = 'Módulo renombrado'
+        with self.captureOnCommitCallbacks(execute=True):
+            modulo.save()
+        self.assertContains(self.client.get(reverse('diagnostico')), 'Módulo renombrado')
+
+
+class LeccionesTests(BaseTests):
+
+    def setUp(self):
+        super().setUp()
+        self.modulo = crear_modulo('Uno', preguntas_d=0)
+        for orden, titulo in enumerate(('Primera', 'Segunda'), start=1):
+            Leccion.objects.create(modulo=self.modulo, orden=orden, titulo=titulo, contenido=f'Texto de la {titulo}.')
+
+    def test_markdown_escapa_html(self):
+        html = lecciones.markdown_a_html(
+            '# Tema\n\nUn **punto** y <script>x</script>\n\n- [Video](https://ejemplo.com/?a=1&b=2)\n'
+            '- [malo](javascript:alert(1))'
+        )
+        self.assertIn('<h5>Tema</h5>', html)
+        self.assertIn('<strong>punto</strong> y &lt;script&gt;', html)
+        self.assertIn('<li><a href="https://ejemplo.com/?a=1&amp;b=2" target="_blank"', html)
+        self.assertNotIn('href="javascript', html)
+
+    def test_una_leccion_por_pagina(self):
+        url = reverse('modulo', args=[self.modulo.id])
+        primera = self.client.get(url)
+        self.assertContains(primera, 'Primera')
+        self.assertNotContains(primera, 'Segunda')
+        self.assertContains(primera, '?pagina=2')
+        self.assertContains(self.client.get(url, {'pagina': 2}), 'Segunda')
+        self.assertEqual(Progreso.objects.filter(user=self.user, modulo=self.modulo).count(), 1)
+
+    def test_modulo_desde_cache(self):
+        url = reverse('modulo', args=[self.modulo.id])
+        for _ in range(2):  # crea el Progreso y vuelve a armar el resumen
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.get(url)
+        with CaptureQueriesContext(connection) as ctx:
+            respuesta = self.client.get(url, {'pagina': 2})
+        # sesión + usuario: ni módulo, ni lecciones, ni progreso
+        self.assertEqual(len(ctx.captured_queries), 2)
+        self.assertContains(respuesta, 'Texto de la Segunda.')
+
+    def test_edicion_renderiza_nueva_version(self):
+        url = reverse('modulo', args=[self.modulo.id])
+        self.client.get(url)
+        leccion = Leccion.objects.get(titulo='Primera')
+        self.assertEqual(leccion.version, 1)
+        leccion.contenido = 'Texto *corregido*.'
+        with self.captureOnCommitCallbacks(execute=True):
+            leccion.save()
+        leccion.refresh_from_db()
+        self.assertEqual(leccion.version, 2)
+        self.assertEqual(leccion.html, '<p>Texto <em>corregido</em>.</p>')
+        self.assertContains(self.client.get(url), '<em>corregido</em>')
+
+
+class ClasificacionTests(BaseTests):
+
+    def setUp(self):
+        super().setUp()
+        self.modulo = crear_modulo('Uno', preguntas_d=0)
+        self.otros = []
+        for i, puntaje in enumerate((9, 5, 5)):
+            otro = User.objects.create_user(f'otro{i}')
+            Perfil.objects.create(user=otro, nombre=f'Otro{i}', apellido='X', cargo='VENTAS')
+            Progreso.objects.create(user=otro, modulo=self.modulo, puntaje=puntaje)
+            self.otros.append(otro)
+        Perfil.objects.filter(user=self.user).update(cargo='VENTAS')
+        self.propio = Progreso.objects.create(user=self.user, modulo=self.modulo, puntaje=1)
+
+    def test_puestos_con_empates_y_paginas(self):
+        tabla = clasificacion.Clasificacion({1: 5, 2: 7, 3: 5, 4: 1})
+        self.assertEqual(tabla.posicion(2), (1, 7))
+        self.assertEqual(tabla.posicion(3), (2, 5))
+        self.assertEqual(tabla.posicion(4), (4, 1))
+        self.assertEqual(tabla.posicion(9), (None, None))
+        self.assertEqual(tabla.pagina(2, por_pagina=2), [(2, 3, 5), (4, 4, 1)])
+        copia = pickle.loads(pickle.dumps(tabla))
+        self.assertEqual(copia.pagina(1, por_pagina=4), tabla.pagina(1, por_pagina=4))
+
+    def test_cambio_de_puntaje_sin_reconstruir(self):
+        modulo = clasificacion.consultar(clasificacion.MODULO, self.modulo.id, self.user.id)
+        self.assertEqual((modulo.puesto, modulo.participantes), (4, 4))
+        clasificacion.consultar(clasificacion.CARGO, 'VENTAS', self.user.id)
+        self.propio.puntaje = 7
+        with self.captureOnCommitCallbacks(execute=True):
+            self.propio.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            guardar_progresos(self.otros[0], {self.modulo.id: {'puntaje': 3}})
+        with CaptureQueriesContext(connection) as ctx:
+            modulo = clasificacion.consultar(clasificacion.MODULO, self.modulo.id, self.user.id)
+            cargo = clasificacion.consultar(clasificacion.CARGO, 'VENTAS', self.user.id)
+        self.assertEqual(len(ctx.captured_queries), 0)
+        self.assertEqual([(p, u) for p, u, _ in modulo.filas], [(1, self.user.id), (2, self.otros[1].id),
+                                                              (2, self.otros[2].id), (4, self.otros[0].id)])
+        self.assertEqual((cargo.puesto, cargo.puntaje), (1, 7))
+
+    def test_compactar_y_otro_proceso(self):
+        clasificacion.consultar(clasificacion.MODULO, self.modulo.id, self.user.id)
+        with mock.patch.object(clasificacion, 'COMPACTAR', 2):
+            for puntaje in (4, 8, 6):
+                self.propio.puntaje = puntaje
+                with self.captureOnCommitCallbacks(execute=True):
+                    self.propio.save()
+        # Otro proceso, sin copia local: toma la foto de la caché y aplica el registro
+        clasificacion._locales.clear()
+        tabla = clasificacion.consultar(clasificacion.MODULO, self.modulo.id, self.user.id)
+        esperada = clasificacion.construir(clasificacion.MODULO, self.modulo.id)
+        self.assertEqual(tabla.filas, esperada.pagina(1))
+        self.assertEqual(tabla.puesto, 2)
+
+    def test_foto_grande_en_trozos_bajo_el_limite_de_memcached(self):
+        azar = random.Random(3)
+        tabla = clasificacion.Clasificacion({user_id: azar.randint(0, 100) for user_id in range(1, 100_001)})
+        clave = clasificacion._clave(clasificacion.MODULO, 'grande')
+        guardados = {}
+        with mock.patch.object(cache, 'set_many', side_effect=lambda valores, _: guardados.update(valores) or []):
+            clasificacion._guardar(clave, tabla)
+        self.assertTrue(all(len(pickle.dumps(valor)) < 1024 * 1024 for valor in guardados.values()))
+        sello = guardados[clave][0]
+        with mock.patch.object(cache, 'get', guardados.get), \
+                mock.patch.object(cache, 'get_many', lambda claves: {c: guardados[c] for c in claves}):
+            copia = clasificacion._leer_foto(clave, sello)
+        self.assertEqual(copia.pagina(40), tabla.pagina(40))
+        self.assertEqual(copia.posicion(77), tabla.posicion(77))
+        # Si la caché rechaza un trozo se cuenta y el registro no queda apuntando a una foto incompleta
+        registro.limpiar()
+        with mock.patch.object(cache, 'set_many', return_value=[clasificacion._clave_trozo(clave, 0)]):
+            clasificacion._guardar(clave, tabla)
+        self.assertEqual(registro.eventos['clasificacion_foto_fallida'], 1)
+        self.assertIsNone(cache.get(clasificacion._clave_registro(clave)))
+
+    def test_armar_desde_la_base_sin_el_lock_del_proceso(self):
+        armar = clasificacion.construir
+
+        def construir(tipo, valor):
+            self.assertFalse(clasificacion._lock.locked())
+            return armar(tipo, valor)
+
+        with mock.patch.object(clasificacion, 'construir', side_effect=construir) as espia, \
+                mock.patch.object(cache, 'get', side_effect=lambda *a, **k: self.assertFalse(
+                    clasificacion._lock.locked()) or None):
+            tabla = clasificacion.consultar(clasificacion.MODULO, self.modulo.id, self.user.id)
+        espia.assert_called_once()
+        self.assertEqual(tabla.puesto, 4)
+
+    def test_candado_ocupado_reintenta_y_luego_descarta(self):
+        clasificacion.consultar(clasificacion.CARGO, 'RECURSOS HUMANOS', self.user.id)
+        clave = clasificacion._clave(clasificacion.CARGO, 'RECURSOS HUMANOS')
+        # Válida para memcached: sin espacios ni tildes
+        self.assertRegex(clave, r'^[\x21-\x7e]+$')
+        candado = f'{clave}:candado'
+        cache.add(candado, 1)
+        # El otro proceso suelta el candado durante la espera: la entrada se agrega
+        with mock.patch('time.sleep', side_effect=lambda _: cache.delete(candado)):
+            clasificacion._registrar(clasificacion.CARGO, 'RECURSOS HUMANOS', [(self.user.id, 3, True)])
+        self.assertEqual(cache.get(clasificacion._clave_registro(clave))[1], [(self.user.id, 3, True)])
+
+        cache.add(candado, 1)
+        with mock.patch.object(clasificacion, 'ESPERA_REGISTRO', 0.02):
+            clasificacion._registrar(clasificacion.CARGO, 'RECURSOS HUMANOS', [(self.user.id, 3, True)])
+        self.assertIsNone(cache.get(clasificacion._clave_registro(clave)))
+        # Quien lee no espera: la arma desde la base sin guardarla
+        with mock.patch('time.sleep', side_effect=AssertionError('esperó el candado')):
+            tabla = clasificacion.consultar(clasificacion.CARGO, 'RECURSOS HUMANOS', self.user.id)
+        self.assertEqual(tabla.participantes, 0)
+        self.assertIsNone(cache.get(clasificacion._clave_registro(clave)))
+
+    def test_vista_muestra_posicion(self):
+        respuesta = self.client.get(reverse('clasificacion'), {'modulo': self.modulo.id})
+        self.assertContains(respuesta, 'Tu posición: <strong>4</strong> de 4')
+        self.assertContains(respuesta, 'Otro0 X')
+        respuesta = self.client.get(reverse('clasificacion'), {'cargo': 'VENTAS'})
+        self.assertContains(respuesta, 'Clasificación: Ventas')
+
+
+class AnaliticaTests(BaseTests):
+
+    def setUp(self):
+        super().setUp()
+        self.modulo = crear_modulo('Uno', preguntas_d=0, preguntas_e=3)
+        self.preguntas = claves.obtener(self.modulo.id, 'E')
+
+    def test_examen_guarda_intento_y_contadores(self):
+        p1, p2, p3 = self.preguntas
+        url = reverse('examen_modulo', args=[self.modulo.id])
+        for respuestas in ({f'pregunta_{p1.id}': 'A', f'pregunta_{p2.id}': 'c'},
+                           {f'pregunta_{p1.id}': 'A', f'pregunta_{p2.id}': 'A', f'pregunta_{p3.id}': 'B'}):
+            self.client.get(url)
+            self.client.post(url, respuestas)
+        intentos = list(Intento.objects.filter(user=self.user).order_by('id'))
+        self.assertEqual([i.puntaje for i in intentos], [1, 2])
+        # Las preguntas salen en orden aleatorio: cada letra va con su id
+        self.assertEqual(sorted(analitica.desempaquetar(intentos[0])), [(p1.id, 'A'), (p2.id, 'C'), (p3.id, '-')])
+        self.assertEqual(sorted(intentos[1].respuestas), ['A', 'A', 'B'])
+        e1, e2, e3 = EstadisticaPregunta.objects.order_by('pregunta_id')
+        self.assertEqual((e1.mostrada, e1.correctas, e1.opcion_a), (2, 2, 2))
+        self.assertEqual((e2.correctas, e2.opcion_a, e2.opcion_c), (1, 1, 1))
+        self.assertEqual((e3.en_blanco, e3.opcion_b, e3.correctas), (1, 1, 0))
+        self.assertEqual((e1.suma_puntaje, e1.suma_puntaje_cuadrado, e1.suma_puntaje_correctas), (3, 5, 3))
+
+    def test_diagnostico_guarda_un_intento_por_modulo(self):
+        crear_modulo('Dos')
+        crear_modulo('Tres', preguntas_d=2)
+        self.client.post(reverse('diagnostico'), respuestas_diagnostico('A'))
+        # 'Uno' no tiene preguntas de diagnóstico y no deja intento
+        self.assertEqual(Intento.objects.filter(user=self.user, tipo='D').count(), 2)
+        self.assertEqual(EstadisticaPregunta.objects.filter(pregunta__tipo_pregunta='D').count(), 5)
+
+    def test_contadores_en_un_solo_update(self):
+        p1, p2, p3 = self.preguntas
+        otro = crear_modulo('Dos', preguntas_d=0, preguntas_e=2, correcta='B')
+        q1, q2 = claves.obtener(otro.id, 'E')
+        intentos = [
+            (self.modulo.id, self.preguntas, {f'pregunta_{p1.id}': 'A', f'pregunta_{p2.id}': 'C'}, 1),
+            (otro.id, [q1, q2], {f'pregunta_{q1.id}': 'B', f'pregunta_{q2.id}': 'D'}, 4),
+        ]
+        # Savepoint, intentos, filas de estadística que falten y un UPDATE para todas las preguntas
+        with self.assertNumQueries(5):
+            analitica.registrar_intentos(self.user, 'E', intentos)
+        estadisticas = {e.pregunta_id: e for e in EstadisticaPregunta.objects.all()}
+        self.assertEqual((estadisticas[p1.id].correctas, estadisticas[p1.id].suma_puntaje), (1, 1))
+        self.assertEqual((estadisticas[p2.id].opcion_c, estadisticas[p2.id].correctas), (1, 0))
+        self.assertEqual((estadisticas[p3.id].en_blanco, estadisticas[p3.id].mostrada), (1, 1))
+        self.assertEqual((estadisticas[q1.id].suma_puntaje_correctas, estadisticas[q1.id].suma_puntaje_cuadrado), (4, 16))
+        self.assertEqual((estadisticas[q2.id].opcion_d, estadisticas[q2.id].correctas), (1, 0))
+
+    def test_dificultad_y_discriminacion_desde_contadores(self):
+        p1, p2, p3 = self.preguntas
+        # p1 la aciertan solo los mejores; p2 solo los peores; p3 todos
+        for _ in range(15):
+            analitica.registrar_intentos(self.user, 'E', [
+                (self.modulo.id, self.preguntas, {f'pregunta_{p1.id}': 'A', f'pregunta_{p3.id}': 'A'}, 2),
+                (self.modulo.id, self.preguntas, {f'pregunta_{p2.id}': 'A', f'pregunta_{p3.id}': 'A'}, 1),
+            ])
+        with self.assertNumQueries(1):
+            filas = {fila.pregunta.id: fila for fila in analitica.reporte(self.modulo.id)}
+        self.assertAlmostEqual(filas[p1.id].dificultad, 0.5)
+        self.assertAlmostEqual(filas[p1.id].discriminacion, 1.0)
+        self.assertAlmostEqual(filas[p2.id].discriminacion, -1.0)
+        self.assertIsNone(filas[p3.id].discriminacion)
+        self.assertTrue(filas[p2.id].revisar)
+        self.assertTrue(filas[p3.id].revisar)
+        self.assertFalse(filas[p1.id].revisar)
+
+    def test_reporte_solo_staff(self):
+        self.assertEqual(self.client.get(reverse('analisis_preguntas')).status_code, 302)
+        self.user.is_staff = True
+        self.user.save()
+        self.client.get(reverse('examen_modulo', args=[self.modulo.id]))
+        self.client.post(reverse('examen_modulo', args=[self.modulo.id]), {})
+        self.assertContains(self.client.get(reverse('analisis_preguntas'), {'modulo': self.modulo.id}), 'Uno E0')
+
+
+class AltaUsuariosTests(BaseTests):
+
+    def setUp(self):
+        super().setUp()
+        self.directorio = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.directorio, ignore_errors=True)
+
+    def importar(self, texto, **opciones):
+        ruta = self.directorio / 'usuarios.csv'
+        ruta.write_text('nombre,apellido,cargo,correo,username,contrasena\n' + texto, encoding='utf-8')
+        salida, err = StringIO(), StringIO()
+        call_command('importar_usuarios', str(ruta), credenciales=str(self.directorio / 'credenciales.csv'),
+                     stdout=salida, stderr=err, **opciones)
+        return salida.getvalue(), err.getvalue()
+
+    def test_alta_en_varios_procesos(self):
+        salida, err = self.importar(
+            'Luis,Gómez,Finanzas,LUIS@anssd.test,,Clave-Larga-2024\n'
+            'Rosa,Díaz,VENTAS,rosa@anssd.test,rdiaz,\n'
+            'Sin,Correo,,,,\n'
+            'Mal,Cargo,Piloto,mal@anssd.test,,\n'
+            'Otra,Vez,VENTAS,otra@anssd.test,rdiaz,\n',
+            workers=2, lote=2,
+        )
+        self.assertIn('2 creados, 0 actualizados, 0 saltados, 3 con error', salida)
+        self.assertIn("línea 4: falta username o correo", err)
+        self.assertIn("línea 5: cargo desconocido: 'Piloto'", err)
+        self.assertIn("línea 6: 'rdiaz' está repetido en el archivo", err)
+        luis = User.objects.get(username='luis@anssd.test')
+        self.assertTrue(luis.check_password('Clave-Larga-2024'))
+        self.assertEqual((luis.perfil.cargo, luis.perfil.correo), ('FINANZAS', 'luis@anssd.test'))
+        # La contraseña generada para rdiaz queda en el archivo de credenciales
+        with open(self.directorio / 'credenciales.csv', encoding='utf-8') as archivo:
+            generadas = list(csv.DictReader(archivo))
+        self.assertEqual([g['username'] for g in generadas], ['rdiaz'])
+        self.assertTrue(User.objects.get(username='rdiaz').check_password(generadas[0]['contrasena']))
+
+    def test_credenciales_solo_para_el_dueno_y_sin_sobrescribir(self):
+        self.importar('Rosa,Díaz,VENTAS,rosa@anssd.test,rdiaz,\n', workers=1)
+        credenciales = self.directorio / 'credenciales.csv'
+        self.assertEqual(credenciales.stat().st_mode & 0o777, 0o600)
+        anterior = credenciales.read_bytes()
+        with self.assertRaisesMessage(CommandError, 'ya existe'):
+            self.importar('Luis,Gómez,VENTAS,luis@anssd.test,lgomez,\n', workers=1)
+        self.assertEqual(credenciales.read_bytes(), anterior)
+        self.assertFalse(User.objects.filter(username='lgomez').exists())
+
+    def test_contrasenas_se_escriben_al_confirmar_cada_bloque(self):
+        filas = [(1, {'nombre': 'A', 'apellido': 'B', 'username': f'u{i}'}) for i in range(3)]
+        entregadas = []
+
+        def falla_en_el_segundo(lote, resultado, *args):
+            if len(entregadas) == 1:
+                raise IntegrityError('bloque roto')
+            return guardar(lote, resultado, *args)
+
+        guardar = altas._guardar_lote
+        with mock.patch.object(altas, '_guardar_lote', falla_en_el_segundo), self.assertRaises(IntegrityError):
+            altas.importar(iter(filas), tam_lote=1, credenciales=entregadas.append)
+        # Las del bloque ya confirmado quedaron entregadas
+        self.assertEqual([[u for u, _ in lote] for lote in entregadas], [['u0']])
+        self.assertTrue(User.objects.get(username='u0').check_password(entregadas[0][0][1]))
+        # Sin dónde entregarlas no se generan
+        resultado = altas.importar(iter([(2, {'nombre': 'A', 'apellido': 'B', 'username': 'u9'})]))
+        self.assertEqual((resultado.creados, resultado.errores), (0, [(2, 'falta contrasena')]))
+
+    def test_existentes_se_saltan_o_actualizan(self):
+        modulo = crear_modulo('Uno', preguntas_d=0)
+        Progreso.objects.create(user=self.user, modulo=modulo, completado=True, puntaje=9)
+        reportes.reconstruir()
+        fila = 'Ana María,Pérez,Ventas,ana@anssd.test,estudiante,\n'
+        salida, _ = self.importar(fila, workers=1)
+        self.assertIn('0 creados, 0 actualizados, 1 saltados', salida)
+        self.assertEqual(Perfil.objects.get(user=self.user).nombre, 'Ana')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            salida, _ = self.importar(fila, workers=1, existentes='actualizar')
+        self.assertIn('0 creados, 1 actualizados', salida)
+        self.user.refresh_from_db()
+        self.assertEqual((self.user.perfil.nombre, self.user.perfil.cargo), ('Ana María', 'VENTAS'))
+        self.assertTrue(self.user.check_password('clave-segura-123'))
+        # El cambio de cargo mueve sus totales en el reporte
+        self.assertEqual(list(ResumenCargo.objects.values_list('cargo', 'usuarios')), [('VENTAS', 1)])
+        self.assertFalse((self.directorio / 'credenciales.csv').exists())
+
+
+class ReplicaTests(BaseTests):
+    """Las pruebas corren con una sola base: se simula el alias `replica` en settings."""
+
+    def setUp(self):
+        super().setUp()
+        parche = mock.patch.dict(settings.DATABASES, {replica.ALIAS: dict(settings.DATABASES['default'])})
+        parche.start()
+        self.addCleanup(parche.stop)
+
+    def test_router_solo_lecturas_de_core_en_la_vista(self):
+        router = replica.RouterReplica()
+        self.assertEqual(router.db_for_read(Progreso), 'default')
+        with replica.lecturas():
+            self.assertEqual(router.db_for_read(Progreso), 'replica')
+            self.assertEqual(router.db_for_read(Session), 'default')
+            self.assertEqual(router.db_for_read(User), 'default')
+            self.assertEqual(router.db_for_write(Progreso, instance=Progreso(user=self.user)), 'default')
+        self.assertFalse(router.allow_migrate('replica', 'core'))
+
+    def test_vista_y_streaming_leen_de_la_replica(self):
+        vistos = []
+
+        def partes():
+            for _ in range(2):
+                vistos.append(replica.activa())
+                yield 'x'
+
+        @replica.lecturas_en_replica
+        def vista(request):
+            vistos.append(replica.activa())
+            return StreamingHttpResponse(partes())
+
+        b''.join(vista(RequestFactory().get('/')).streaming_content)
+        self.assertEqual(vistos, [True, True, True])
+        self.assertFalse(replica.activa())
+
+    def test_despues_de_escribir_lee_de_la_primaria(self):
+        modulo = crear_modulo('Uno', preguntas_d=0, preguntas_e=10)
+        url = reverse('examen_modulo', args=[modulo.id])
+        self.client.get(url)
+        self.assertNotIn(replica.COOKIE, self.client.cookies)
+        self.client.post(url, {})
+        self.assertIn(replica.COOKIE, self.client.cookies)
+
+        @replica.lecturas_en_replica
+        def vista(request):
+            return HttpResponse(str(replica.activa()))
+
+        factory = RequestFactory()
+        factory.cookies[replica.COOKIE] = self.client.cookies[replica.COOKIE].value
+        self.assertEqual(vista(factory.get('/')).content, b'False')
+        factory.cookies[replica.COOKIE] = str(time.time() - 1)
+        self.assertEqual(vista(factory.get('/')).content, b'True')
+
+    def test_lo_cacheado_se_arma_desde_la_primaria(self):
+        modulo = crear_modulo('Uno', preguntas_d=0, preguntas_e=1)
+        Progreso.objects.create(user=self.user, modulo=modulo, completado=True, puntaje=100)
+        codigo = verificacion.codigo(self.user.id, modulo.id, self.user.date_joined)
+        usados = []
+        leer = replica.RouterReplica.db_for_read
+
+        def espiar(router, model, **hints):
+            usados.append(leer(router, model, **hints))
+            return usados[-1]
+
+        with mock.patch.object(replica.RouterReplica, 'db_for_read', espiar), replica.lecturas():
+            self.assertEqual(resumen.obtener(self.user).completados, 1)
+            self.assertEqual(verificacion.verificar(codigo)['modulo'], 'Uno')
+        self.assertNotIn(replica.ALIAS, usados)
+
+
+class BancoPreguntasTests(BaseTests):
+
+    def setUp(self):
+        super().setUp()
+        self.modulo = crear_modulo('Uno', preguntas_d=2, preguntas_e=1)
+        self.directorio = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.directorio, ignore_errors=True)
+
+    def test_exportar_e_importar_ida_y_vuelta(self):
+        for formato in banco.FORMATOS:
+            ruta = self.directorio / f'banco.{formato}'
+            call_command('exportar_preguntas', formato=formato, salida=str(ruta), stderr=StringIO())
+            Pregunta.objects.filter(modulo=self.modulo).update(texto='cambiado')
+            err = StringIO()
+            call_command('importar_preguntas', str(ruta), lote=2, stdout=StringIO(), stderr=err)
+            self.assertEqual(err.getvalue(), '')
+            self.assertEqual(
+                sorted(Pregunta.objects.values_list('texto', flat=True)),
+                ['Uno D0', 'Uno D1', 'Uno E0'],
+            )
+
+    def test_importar_valida_fila_por_fila(self):
+        existente = Pregunta.objects.filter(modulo=self.modulo).first()
+        ruta = self.directorio / 'nuevas.csv'
+        ruta.write_text(
+            'id,modulo,tipo_pregunta,texto,opcion_a,opcion_b,opcion_c,opcion_d,respuesta_correcta\n'
+            ',Uno,E,Nueva,a,b,c,d,b\n'
+            ',Uno,E,Sin respuesta,a,b,c,d,\n'
+            ',No existe,D,Otra,a,b,c,d,A\n'
+            '999999,Uno,D,Id inexistente,a,b,c,d,A\n'
+            f'{existente.id},Uno,D,Corregida,a,b,c,d,C\n',
+            encoding='utf-8',
+        )
+        claves.obtener(self.modulo.id, 'D')
+        with self.captureOnCommitCallbacks(execute=True):
+            resultado = banco.importar(banco.leer(ruta.open(encoding='utf-8', newline='')), tam_lote=2)
+        self.assertEqual((resultado.creadas, resultado.actualizadas, resultado.con_error), (1, 1, 3))
+        self.assertEqual([numero for numero, _ in resultado.errores], [3, 4, 5])
+        self.assertTrue(Pregunta.objects.filter(texto='Nueva', respuesta_correcta='B', tipo_pregunta='E').exists())
+        # bulk_update no envía señales: la caché de claves se invalida a mano
+        self.assertEqual(claves.obtener(self.modulo.id, 'D')[0].respuesta_correcta, 'C')
+
+    def test_jsonl_mal_formado(self):
+        lineas = ['{"modulo": "Uno", "texto": "Bien", "opcion_a": "a", "opcion_b": "b", "opcion_c": "c", '
+                  '"opcion_d": "d", "respuesta_correcta": "A"}', '{roto', '[1, 2]']
+        resultado = banco.importar(banco.leer(StringIO('\n'.join(lineas)), 'jsonl'))
+        self.assertEqual((resultado.creadas, resultado.con_error), (1, 2))
+
+    def test_admin_importa_y_exporta(self):
+        self.user.is_staff = True
+        self.user.is_superuser = True
+        self.user.save()
+        respuesta = self.client.post(reverse('admin:core_pregunta_changelist'), {
+            'action': 'exportar_csv',
+            '_selected_action': list(Pregunta.objects.values_list('id', flat=True)),
+        })
+        self.assertTrue(respuesta.streaming)
+        contenido = b''.join(respuesta.streaming_content).decode()
+        self.assertEqual(len(contenido.strip().splitlines()), 4)
+
+        archivo = BytesIO(contenido.replace('Uno D0', 'Importada').encode())
+        archivo.name = 'banco.csv'
+        respuesta = self.client.post(reverse('admin:core_pregunta_importar'),
+                                     {'archivo': archivo, 'formato': 'csv', 'lote': 100})
+        self.assertRedirects(respuesta, reverse('admin:core_pregunta_changelist'))
+        self.assertTrue(Pregunta.objects.filter(texto='Importada').exists())
+
+
+class ReportesCargoTests(BaseTests):
+
+    def setUp(self):
+        super().setUp()
+        self.m1 = crear_modulo('Uno', preguntas_e=10)
+        self.m2 = crear_modulo('Dos', correcta='B')
+
+    def resumen(self):
+        return {
+            (r.cargo, r.modulo_id): (r.usuarios, r.completados, r.suma_puntaje)
+            for r in ResumenCargo.objects.filter(usuarios__gt=0)
+        }
+
+    def assertCoincideConReconstruir(self):
+        incremental = self.resumen()
+        reportes.reconstruir()
+        self.assertEqual(incremental, self.resumen())
+        return incremental
+
+    def aprobar_examen(self, modulo):
+        url = reverse('examen_modulo', args=[modulo.id])
+        self.client.get(url)
+        ids = self.client.session[f'examen_{modulo.id}']
+        self.client.post(url, {f'pregunta_{pk}': 'A' for pk in ids})
+
+    def test_deltas_de_diagnostico_y_examen(self):
+        otro = User.objects.create_user('otro', password='clave-segura-123')
+        Perfil.objects.create(user=otro, nombre='Luis', apellido='Gómez', cargo='VENTAS')
+        self.client.post(reverse('diagnostico'), respuestas_diagnostico('A'))
+        self.client.post(reverse('diagnostico'), respuestas_diagnostico('B'))
+        self.aprobar_examen(self.m1)
+        self.client.force_login(otro)
+        self.client.post(reverse('diagnostico'), respuestas_diagnostico('A'))
+
+        resumen = self.assertCoincideConReconstruir()
+        self.assertEqual(resumen[('SELECCIONE', self.m1.id)], (1, 1, 10))
+        self.assertEqual(resumen[('SELECCIONE', self.m2.id)], (1, 0, 3))
+        self.assertEqual(resumen[('VENTAS', self.m1.id)], (1, 0, 3))
+
+    def test_deltas_distintos_en_un_solo_update(self):
+        m3 = crear_modulo('Tres', preguntas_d=0)
+        # Filas que faltan y un UPDATE para todos los módulos, aunque cada delta sea distinto
+        with self.assertNumQueries(2):
+            reportes.aplicar('VENTAS', {self.m1.id: (1, 1, 7), self.m2.id: (1, 0, 2), m3.id: (1, 0, 0)})
+        with self.assertNumQueries(1):
+            reportes.aplicar('VENTAS', {self.m1.id: (0, -1, -3), self.m2.id: (0, 1, 4), m3.id: (0, 0, 0)})
+        self.assertEqual(self.resumen(), {
+            ('VENTAS', self.m1.id): (1, 0, 4), ('VENTAS', self.m2.id): (1, 1, 6), ('VENTAS', m3.id): (1, 0, 0),
+        })
+
+    def test_cambio_de_cargo_y_bajas(self):
+        self.client.post(reverse('diagnostico'), respuestas_diagnostico('A'))
+        with self.captureOnCommitCallbacks(execute=True):
+            perfil = self.user.perfil
+            perfil.cargo = 'FINANZAS'
+            perfil.save()
+        self.assertEqual(set(c for c, _ in self.resumen()), {'FINANZAS'})
+
+        Progreso.objects.get(user=self.user, modulo=self.m2).delete()
+        perfil.delete()
+        self.assertEqual(self.assertCoincideConReconstruir(), {(reportes.SIN_PERFIL, self.m1.id): (1, 0, 3)})
+
+        # Borrar el módulo o el usuario no deja filas huérfanas ni descuadres
+        self.m1.delete()
+        self.user.delete()
+        self.assertEqual(self.assertCoincideConReconstruir(), {})
+
+    def test_vista_y_csv_solo_staff(self):
+        self.client.post(reverse('diagnostico'), respuestas_diagnostico('A'))
+        self.assertEqual(self.client.get(reverse('reporte_cargos')).status_code, 302)
+        self.assertEqual(self.client.get(reverse('reporte_cargos_csv')).status_code, 302)
+        self.user.is_staff = True
+        self.user.save()
+
+        respuesta = self.client.get(reverse('reporte_cargos'), {'cargo': 'SELECCIONE'})
+        filas = {f.modulo: f for f in respuesta.context['filas']}
+        self.assertEqual((filas['Uno'].tasa, filas['Uno'].promedio), (0.0, 3.0))
+
+        respuesta = self.client.get(reverse('reporte_cargos_csv'), {'modulo': self.m2.id})
+        self.assertTrue(respuesta.streaming)
+        lineas = b''.join(respuesta.streaming_content).decode().splitlines()
+        self.assertEqual(lineas, [','.join(reportes.COLUMNAS_DETALLE), 'estudiante,Ana,Pérez,SELECCIONE,Dos,no,0'])
+
+    def test_comando_reconstruir(self):
+        self.client.post(reverse('diagnostico'), respuestas_diagnostico('A'))
+        ResumenCargo.objects.update(usuarios=99)
+        salida = StringIO()
+        call_command('reconstruir_reportes', stdout=salida)
+        self.assertIn('2 filas', salida.getvalue())
+        self.assertEqual(set(ResumenCargo.objects.values_list('usuarios', flat=True)), {1})
+
+
+class ExamenSorteadoTests(BaseTests):
+
+    def setUp(self):
+        super().setUp()
+        self.modulo = crear_modulo('Uno', preguntas_d=0, preguntas_e=30)
+        self.url = reverse('examen_modulo', args=[self.modulo.id])
+
+    def congeladas(self):
+        return self.client.session[f'examen_{self.modulo.id}']
+
+    def test_sortea_congela_y_califica_lo_mostrado(self):
+        respuesta = self.client.get(self.url)
+        ids = self.congeladas()
+        self.assertEqual(len(set(ids)), 10)
+        self.assertEqual([p.id for p in respuesta.context['preguntas']], ids)
+        # Recargar la página no cambia el sorteo
+        self.client.get(self.url)
+        self.assertEqual(self.congeladas(), ids)
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.post(self.url, {f'pregunta_{pk}': 'A' for pk in ids})
+        self.assertFalse(any('RANDOM' in q['sql'].upper() for q in ctx.captured_queries))
+        progreso = Progreso.objects.get(user=self.user, modulo=self.modulo)
+        self.assertEqual((progreso.puntaje, progreso.completado), (10, True))
+        self.assertNotIn(f'examen_{self.modulo.id}', self.client.session)
+
+    def test_sorteos_distintos(self):
+        sorteos = set()
+        for _ in range(5):
+            self.client.get(self.url)
+            sorteos.add(tuple(self.congeladas()))
+            session = self.client.session
+            del session[f'examen_{self.modulo.id}']
+            session.save()
+        self.assertGreater(len(sorteos), 1)
+
+    def test_post_sin_examen_abierto_no_califica(self):
+        respuesta = self.client.post(self.url, {})
+        self.assertRedirects(respuesta, self.url, fetch_redirect_response=False)
+        self.assertFalse(Intento.objects.exists())
+        # Las respuestas se perdieron: el examen nuevo lo dice
+        self.assertContains(self.client.get(self.url), EXAMEN_EXPIRADO)
+
+    def test_banco_vacio_avisa_sin_decir_que_expiro(self):
+        url = reverse('examen_modulo', args=[crear_modulo('Vacío', preguntas_e=0).id])
+        respuesta = self.client.get(url)
+        self.assertEqual(list(respuesta.context['preguntas']), [])
+        self.assertContains(respuesta, EXAMEN_SIN_PREGUNTAS)
+        siguiente = self.client.post(url, {}, follow=True)
+        self.assertContains(siguiente, EXAMEN_SIN_PREGUNTAS)
+        self.assertNotContains(siguiente, EXAMEN_EXPIRADO)
+        self.assertFalse(Intento.objects.exists())
+
+    def test_consultas_constantes_con_banco_grande(self):
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as pequeno:
+            self.client.get(self.url)
+        Pregunta.objects.bulk_create([
+            Pregunta(modulo=self.modulo, texto=f'Extra {i}', opcion_a='a', opcion_b='b', opcion_c='c',
+                     opcion_d='d', respuesta_correcta='A', tipo_pregunta='E')
+            for i in range(2000)
+        ])
+        claves_banco.invalidar()
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as grande:
+            self.client.get(self.url)
+        self.assertEqual(len(grande.captured_queries), len(pequeno.captured_queries))
+
+    def test_pregunta_borrada_se_vuelve_a_sortear(self):
+        self.client.get(self.url)
+        ids = self.congeladas()
+        with self.captureOnCommitCallbacks(execute=True):
+            Pregunta.objects.get(id=ids[0]).delete()
+        respuesta = self.client.get(self.url)
+        self.assertEqual(len(respuesta.context['preguntas']), 10)
+        self.assertNotIn(ids[0], self.congeladas())
+
+
+class UrlsAsync:
+    """Las rutas de core.urls con las vistas de views_async, como bajo ASGI."""
+    urlpatterns = [
+        path(str(ruta.pattern), getattr(views_async, ruta.callback.__name__, ruta.callback), name=ruta.name)
+        for ruta in urls_core.urlpatterns
+    ]
+
+
+@override_settings(ROOT_URLCONF=UrlsAsync, CERTIFICADOS_CACHE_DIR=CACHE_PRUEBAS)
+class VistasAsyncTests(BaseTests):
+
+    def setUp(self):
+        super().setUp()
+        shutil.rmtree(CACHE_PRUEBAS, ignore_errors=True)
+        self.async_client.force_login(self.user)
+        self.uno = crear_modulo('Uno', preguntas_e=10)
+        self.dos = crear_modulo('Dos', correcta='B')
+
+    def tearDown(self):
+        shutil.rmtree(CACHE_PRUEBAS, ignore_errors=True)
+
+    async def test_diagnostico_y_progreso(self):
+        respuesta = await self.async_client.get(reverse('diagnostico'))
+        self.assertContains(respuesta, 'Uno D0')
+        self.assertContains(respuesta, 'csrfmiddlewaretoken')
+        respuesta = await self.async_client.post(reverse('diagnostico'), await sync_to_async(respuestas_diagnostico)('A'))
+        self.assertRedirects(respuesta, reverse('progreso'), fetch_redirect_response=False)
+        sesion = await sync_to_async(lambda: dict(self.async_client.session))()
+        self.assertEqual(sesion['brechas'], [self.dos.id])
+        puntajes = {m: p async for m, p in Progreso.objects.filter(user=self.user).values_list('modulo_id', 'puntaje')}
+        self.assertEqual(puntajes, {self.uno.id: 3, self.dos.id: 0})
+        respuesta = await self.async_client.get(reverse('progreso'))
+        self.assertEqual(respuesta.context['total'], 2)
+
+    async def test_examen_aprobado_y_certificado(self):
+        url = reverse('examen_modulo', args=[self.uno.id])
+        self.assertContains(await self.async_client.get(url), 'Uno E0')
+        ids = [pk async for pk in Pregunta.objects.filter(modulo=self.uno, tipo_pregunta='E').values_list('id', flat=True)]
+        await self.async_client.post(url, {f'pregunta_{pk}': 'A' for pk in ids})
+        progreso = await Progreso.objects.aget(user=self.user, modulo=self.uno)
+        self.assertTrue(progreso.completado)
+        respuesta = await self.async_client.get(reverse('progreso'))
+        self.assertEqual(respuesta.context['mensaje_resultado']['clase'], 'alert-success')
+        self.assertEqual(respuesta.context['completados'], 1)
+
+        # Recién aprobado, el certificado espera al worker de la cola
+        pendiente = await self.async_client.get(reverse('certificado', args=[self.uno.id]))
+        self.assertEqual(pendiente.status_code, 202)
+        await TrabajoCertificado.objects.aupdate(creado=timezone.now() - timedelta(minutes=5))
+
+        # Sin worker, el PDF se dibuja en el pool (aquí de hilos) y la segunda vez sale del disco
+        with ThreadPoolExecutor(1) as pool, mock.patch('core.certificados._pool_pdf', return_value=pool):
+            primero = await self.async_client.get(reverse('certificado', args=[self.uno.id]))
+        self.assertEqual(primero['Content-Type'], 'application/pdf')
+        self.assertIn('attachment', primero['Content-Disposition'])
+        self.assertTrue(primero.content.startswith(b'%PDF'))
+        with mock.patch('core.certificados.renderizar_pdf') as renderizar:
+            segundo = await self.async_client.get(reverse('certificado', args=[self.uno.id]))
+        renderizar.assert_not_called()
+        self.assertEqual(segundo.content, primero.content)
+
+    async def test_examen_vencido_o_vacio_avisa(self):
+        url = reverse('examen_modulo', args=[self.uno.id])
+        await self.async_client.post(url, {})
+        self.assertContains(await self.async_client.get(url), EXAMEN_EXPIRADO)
+        self.assertContains(await self.async_client.get(reverse('examen_modulo', args=[self.dos.id])),
+                            EXAMEN_SIN_PREGUNTAS)
+
+    async def test_certificado_304_sin_dibujar(self):
+        await Progreso.objects.acreate(user=self.user, modulo=self.uno, completado=True, puntaje=10)
+        url = reverse('certificado', args=[self.uno.id])
+        with ThreadPoolExecutor(1) as pool, mock.patch('core.certificados._pool_pdf', return_value=pool):
+            primero = await self.async_client.get(url)
+        with mock.patch('core.certificados.aobtener_pdf') as obtener:
+            respuesta = await self.async_client.get(url, headers={'If-None-Match': primero['ETag']})
+        self.assertEqual(respuesta.status_code, 304)
+        obtener.assert_not_called()
+
+    async def test_cache_sin_bloquear_el_event_loop(self):
+        sincronicas = {nombre: getattr(cache, nombre) for nombre in ('get', 'get_many', 'set', 'add', 'delete')}
+
+        def fuera_del_loop(nombre):
+            def llamada(*args, **kwargs):
+                try:
+                    asyncio.get_running_loop()
+                except RuntimeError:  # en un hilo de sync_to_async
+                    return sincronicas[nombre](*args, **kwargs)
+                raise AssertionError(f'cache.{nombre} bloqueó el event loop')
+            return llamada
+
+        with mock.patch.multiple(cache, **{nombre: fuera_del_loop(nombre) for nombre in sincronicas}):
+            # Reprobar deja un mensaje y progreso renueva el sello al mostrarlo
+            url = reverse('examen_modulo', args=[self.uno.id])
+            await self.async_client.get(url)
+            await self.async_client.post(url, {})
+            respuesta = await self.async_client.get(reverse('progreso'))
+            self.assertEqual(respuesta.context['mensaje_resultado']['clase'], 'alert-danger')
+            self.assertEqual((await self.async_client.get(reverse('home'))).status_code, 200)
+            await Progreso.objects.filter(user=self.user, modulo=self.uno).aupdate(completado=True)
+            with ThreadPoolExecutor(1) as pool, mock.patch('core.certificados._pool_pdf', return_value=pool):
+                respuesta = await self.async_client.get(reverse('certificado', args=[self.uno.id]))
+            self.assertIn('ETag', respuesta)
+
+    async def test_anonimo_redirige_al_login(self):
+        await sync_to_async(self.async_client.logout)()
+        respuesta = await self.async_client.get(reverse('progreso'))
+        self.assertEqual(respuesta.status_code, 302)
+        self.assertIn('/login/', respuesta['Location'])
+        self.assertEqual((await self.async_client.get(reverse('home'))).status_code, 200)
+
+    async def test_server_timing_cuenta_consultas_async(self):
+        respuesta = await self.async_client.get(reverse('examen_modulo', args=[self.uno.id]))
+        consultas = int(re.search(r'desc="(\d+) consultas"', respuesta['Server-Timing']).group(1))
+        self.assertGreater(consultas, 0)
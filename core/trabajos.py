@@ -0,0 +1,181 @@
+"""Cola de certificados por dibujar, guardada en la base (sin broker externo).
+
+Al aprobar un examen, guardar_examen encola el certificado en la misma
+transacción: un TrabajoCertificado por usuario y módulo. El comando
+`procesar_certificados` toma los pendientes más antiguos, los dibuja con
+certificados.obtener_pdf, que los deja en la caché en disco, y los marca
+listos; la descarga los sirve desde ese archivo.
+
+Los trabajos se toman con SELECT ... FOR UPDATE SKIP LOCKED, así pueden
+correr varios workers a la vez (SQLite no lo tiene, pero serializa las
+escrituras). Un trabajo que sigue en proceso después de
+CERTIFICADOS_COLA_VENCIMIENTO (el worker murió) vuelve a tomarse; tras
+CERTIFICADOS_COLA_MAX_INTENTOS fallos queda fallido.
+
+Mientras el trabajo espera, la vista del certificado responde una página que
+consulta `estado_certificado` hasta que está listo. Si lleva más de
+CERTIFICADOS_COLA_ESPERA sin terminar (no hay worker corriendo) la vista lo
+dibuja ella misma, como antes de la cola.
+
+El worker es otro proceso: la profundidad de la cola y las latencias se leen
+de la base al pedir /metrics.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Exists, F, Min, OuterRef, Q
+from django.utils import timezone
+
+from . import certificados
+from .models import Progreso, TrabajoCertificado
+
+ESPERA = timedelta(seconds=getattr(settings, 'CERTIFICADOS_COLA_ESPERA', 60))
+VENCIMIENTO = timedelta(seconds=getattr(settings, 'CERTIFICADOS_COLA_VENCIMIENTO', 10 * 60))
+MAX_INTENTOS = getattr(settings, 'CERTIFICADOS_COLA_MAX_INTENTOS', 3)
+TAM_LOTE = 1000
+# Latencias de /metrics: trabajos terminados en la última hora, hasta MUESTRA
+VENTANA = timedelta(hours=1)
+MUESTRA = 1000
+
+NOMBRES = {
+    TrabajoCertificado.PENDIENTE: 'pendiente',
+    TrabajoCertificado.EN_PROCESO: 'en_proceso',
+    TrabajoCertificado.LISTO: 'listo',
+    TrabajoCertificado.FALLIDO: 'fallido',
+}
+EN_COLA = (TrabajoCertificado.PENDIENTE, TrabajoCertificado.EN_PROCESO)
+CAMPOS_REINICIO = ['estado', 'intentos', 'creado', 'iniciado', 'terminado', 'error']
+
+
+def encolar(user_id, modulo_id):
+    """Deja pendiente el certificado; si ya tenía trabajo, lo reinicia."""
+    TrabajoCertificado.objects.bulk_create(
+        [TrabajoCertificado(user_id=user_id, modulo_id=modulo_id, creado=timezone.now())],
+        update_conflicts=True,
+        unique_fields=['user', 'modulo'],
+        update_fields=CAMPOS_REINICIO,
+    )
+
+
+def encolar_completados(tam_lote=TAM_LOTE):
+    """Encola los progresos aprobados que no tienen trabajo; devuelve cuántos."""
+    ahora = timezone.now()
+    pendientes = list(
+        Progreso.objects.filter(completado=True)
+        .exclude(Exists(TrabajoCertificado.objects.filter(user_id=OuterRef('user_id'), modulo_id=OuterRef('modulo_id'))))
+        .order_by('id')
+        .values_list('user_id', 'modulo_id')
+    )
+    TrabajoCertificado.objects.bulk_create(
+        (TrabajoCertificado(user_id=user_id, modulo_id=modulo_id, creado=ahora) for user_id, modulo_id in pendientes),
+        batch_size=tam_lote, ignore_conflicts=True,
+    )
+    return len(pendientes)
+
+
+def tomar(cantidad):
+    """Marca en proceso hasta `cantidad` trabajos, los más antiguos, y los devuelve."""
+    ahora = timezone.now()
+    with transaction.atomic():
+        ids = list(
+            TrabajoCertificado.objects.select_for_update(skip_locked=True)
+            .filter(Q(estado=TrabajoCertificado.PENDIENTE) |
+                    Q(estado=TrabajoCertificado.EN_PROCESO, iniciado__lt=ahora - VENCIMIENTO))
+            .order_by('creado')
+            .values_list('id', flat=True)[:cantidad]
+        )
+        TrabajoCertificado.objects.filter(id__in=ids).update(
+            estado=TrabajoCertificado.EN_PROCESO, iniciado=ahora, intentos=F('intentos') + 1,
+        )
+    return list(
+        TrabajoCertificado.objects.filter(id__in=ids).select_related('user__perfil', 'modulo').order_by('creado')
+    )
+
+
+def procesar(trabajo):
+    """Dibuja el PDF del trabajo tomado y registra el resultado. Devuelve si quedó listo."""
+    # Si lo volvieron a encolar mientras se dibujaba, `iniciado` ya no coincide y no se toca
+    tomado = TrabajoCertificado.objects.filter(pk=trabajo.pk, iniciado=trabajo.iniciado)
+    try:
+        certificados.obtener_pdf(trabajo.user, trabajo.modulo)
+    except Exception as error:
+        agotado = trabajo.intentos >= MAX_INTENTOS
+        tomado.update(
+            estado=TrabajoCertificado.FALLIDO if agotado else TrabajoCertificado.PENDIENTE,
+            error=f'{type(error).__name__}: {error}',
+        )
+        return False
+    tomado.update(estado=TrabajoCertificado.LISTO, terminado=timezone.now(), error='')
+    return True
+
+
+def _en_espera(user_id, modulo_id):
+    return TrabajoCertificado.objects.filter(
+        user_id=user_id, modulo_id=modulo_id, estado__in=EN_COLA, creado__gt=timezone.now() - ESPERA,
+    )
+
+
+def en_espera(user_id, modulo_id):
+    """True si el certificado está en la cola y conviene esperar al worker."""
+    return _en_espera(user_id, modulo_id).exists()
+
+
+async def aen_espera(user_id, modulo_id):
+    return await _en_espera(user_id, modulo_id).aexists()
+
+
+def estado(user_id, modulo_id):
+    """(nombre del estado o None si no hay trabajo, si conviene esperar al worker)."""
+    fila = (
+        TrabajoCertificado.objects.filter(user_id=user_id, modulo_id=modulo_id)
+        .values_list('estado', 'creado').first()
+    )
+    if fila is None:
+        return None, False
+    codigo, creado = fila
+    return NOMBRES[codigo], codigo in EN_COLA and creado > timezone.now() - ESPERA
+
+
+# --- MÉTRICAS ---
+
+def _cuantil(valores, q):
+    return valores[min(len(valores) - 1, int(q * len(valores)))] if valores else 0.0
+
+
+def prometheus():
+    """Líneas para /metrics: trabajos por estado, antigüedad del pendiente más viejo y latencias."""
+    ahora = timezone.now()
+    por_estado = dict(TrabajoCertificado.objects.values_list('estado').annotate(n=Count('id')).order_by())
+    mas_antiguo = (
+        TrabajoCertificado.objects.filter(estado=TrabajoCertificado.PENDIENTE).aggregate(m=Min('creado'))['m']
+    )
+    terminados = list(
+        TrabajoCertificado.objects.filter(estado=TrabajoCertificado.LISTO, terminado__gte=ahora - VENTANA)
+        .order_by('-terminado').values_list('creado', 'iniciado', 'terminado')[:MUESTRA]
+    )
+    tramos = {
+        'espera': sorted((iniciado - creado).total_seconds() for creado, iniciado, _ in terminados),
+        'dibujo': sorted((terminado - iniciado).total_seconds() for _, iniciado, terminado in terminados),
+        'total': sorted((terminado - creado).total_seconds() for creado, _, terminado in terminados),
+    }
+
+    lineas = [
+        '# HELP anssd_cola_certificados Trabajos de certificados por estado.',
+        '# TYPE anssd_cola_certificados gauge',
+    ]
+    for codigo, nombre in NOMBRES.items():
+        lineas.append(f'anssd_cola_certificados{{estado="{nombre}"}} {por_estado.get(codigo, 0)}')
+    lineas += [
+        '# HELP anssd_cola_certificados_antiguedad_seconds Espera del trabajo pendiente más antiguo.',
+        '# TYPE anssd_cola_certificados_antiguedad_seconds gauge',
+        f'anssd_cola_certificados_antiguedad_seconds {(ahora - mas_antiguo).total_seconds() if mas_antiguo else 0:.3f}',
+        '# HELP anssd_certificado_latencia_seconds Espera en la cola, dibujo y total de los trabajos de la última hora.',
+        '# TYPE anssd_certificado_latencia_seconds summary',
+    ]
+    for tramo, valores in tramos.items():
+        for q in (0.5, 0.95):
+            lineas.append(f'anssd_certificado_latencia_seconds{{tramo="{tramo}",quantile="{q}"}} {_cuantil(valores, q):.3f}')
+        lineas.append(f'anssd_certificado_latencia_seconds_sum{{tramo="{tramo}"}} {sum(valores):.3f}')
+        lineas.append(f'anssd_certificado_latencia_seconds_count{{tramo="{tramo}"}} {len(valores)}')
+    return '\n'.join(lineas) + '\n'
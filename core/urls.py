@@ -1,20 +1,31 @@
 from django.urls import path, include
 from django.contrib.auth import views as auth_views
-from . import views
+from django.conf import settings
+from . import views, views_async
 
+# Bajo ASGI (VISTAS_ASYNC) las vistas más visitadas usan su versión async
+vistas = views_async if settings.VISTAS_ASYNC else views
 
 urlpatterns = [
 
-    path('', views.home, name='home'),
+    path('', vistas.home, name='home'),
     path('register/', views.register, name='register'),
     path('perfil/', views.perfil, name='perfil'),
     path('editar_perfil/', views.editar_perfil, name='editar_perfil'),
-    path('diagnostico/', views.diagnostico, name='diagnostico'),
+    path('diagnostico/', vistas.diagnostico, name='diagnostico'),
     path('modulo/<int:modulo_id>/', views.modulo, name='modulo'),
     path('tutor/', views.tutor, name='tutor'),
-    path('progreso/', views.progreso, name='progreso'),
-    path('certificado/<int:modulo_id>/', views.generar_certificado, name='certificado'),  
+    path('progreso/', vistas.progreso, name='progreso'),
+    path('certificado/<int:modulo_id>/', vistas.generar_certificado, name='certificado'),  
+    path('certificado/<int:modulo_id>/estado/', views.estado_certificado, name='estado_certificado'),
+    path('certificados/lote/', views.certificados_lote, name='certificados_lote'),
+    path('verificar/<str:codigo>/', views.verificar_certificado, name='verificar_certificado'),
     path('login/', auth_views.LoginView.as_view(template_name='core/login.html'), name='login'),  
     path('logout/', auth_views.LogoutView.as_view(), name='logout'),  
-    path('modulo/<int:modulo_id>/examen/', views.examen_modulo, name='examen_modulo'),
+    path('modulo/<int:modulo_id>/examen/', vistas.examen_modulo, name='examen_modulo'),
+    path('clasificacion/', views.tabla_posiciones, name='clasificacion'),
+    path('analisis/preguntas/', views.analisis_preguntas, name='analisis_preguntas'),
+    path('reportes/cargos/', views.reporte_cargos, name='reporte_cargos'),
+    path('reportes/cargos/csv/', views.reporte_cargos_csv, name='reporte_cargos_csv'),
+    path('metrics', views.metricas, name='metricas'),
 ]
\ No newline at end of file
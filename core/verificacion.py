@@ -0,0 +1,127 @@
+"""Registro de certificados emitidos y verificación pública de su código.
+
+El código impreso en el PDF es `CD-{user:06d}-{modulo:03d}-{AAAAMM}-{firma}`,
+donde la firma son los primeros caracteres del HMAC-SHA256 de lo anterior con
+una clave que solo conoce el servidor (CERTIFICADOS_CLAVE_FIRMA, por defecto
+SECRET_KEY). Sin la clave no se puede fabricar un código válido; cambiarla
+invalida todos los códigos impresos.
+
+Al aprobar un examen, o al marcar un Progreso como completado por otra vía
+(admin, shell), se guarda un Certificado con su código (único e indexado).
+`verificar` comprueba primero la firma, sin tocar la base, así los códigos
+inventados o mal copiados nunca llegan a una consulta; los válidos se buscan
+por el índice y la respuesta, positiva o negativa, queda en la caché de
+Django durante CERTIFICADOS_VERIFICACION_SEGUNDOS. La búsqueda va a la
+primaria aunque la vista lea de la réplica: un certificado recién emitido que
+aún no llegó a ella quedaría en la caché como no emitido.
+"""
+import re
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Exists, OuterRef
+from django.utils.crypto import constant_time_compare, salted_hmac
+
+from .metricas import contar
+from .models import Certificado, Progreso
+
+SAL = 'core.verificacion.certificado'
+LARGO_FIRMA = 16
+FORMATO = re.compile(r'^(CD-\d{6,}-\d{3,}-\d{6})-([0-9A-F]{%d})$' % LARGO_FIRMA)
+DURACION = getattr(settings, 'CERTIFICADOS_VERIFICACION_SEGUNDOS', 5 * 60)
+TAM_LOTE = 1000
+# Marca en la caché de un código con firma válida que no está registrado
+NO_EMITIDO = {}
+
+
+def firma(base):
+    clave = getattr(settings, 'CERTIFICADOS_CLAVE_FIRMA', None) or settings.SECRET_KEY
+    return salted_hmac(SAL, base, secret=clave, algorithm='sha256').hexdigest()[:LARGO_FIRMA].upper()
+
+
+def codigo(user_id, modulo_id, fecha):
+    """Código firmado del certificado de un usuario en un módulo."""
+    base = f"CD-{user_id:06d}-{modulo_id:03d}-{fecha.strftime('%Y%m')}"
+    return f'{base}-{firma(base)}'
+
+
+def firma_valida(valor):
+    coincidencia = FORMATO.match(valor)
+    return bool(coincidencia) and constant_time_compare(firma(coincidencia[1]), coincidencia[2])
+
+
+def emitir(user, modulo_id):
+    """Registra el certificado de `user` en el módulo; si ya existe no hace nada.
+
+    bulk_create no manda señales: la respuesta guardada en la caché (un
+    NO_EMITIDO de una consulta anterior) se descarta al confirmar.
+    """
+    valor = codigo(user.id, modulo_id, user.date_joined)
+    Certificado.objects.bulk_create(
+        [Certificado(user=user, modulo_id=modulo_id, codigo=valor)], ignore_conflicts=True,
+    )
+    transaction.on_commit(lambda: invalidar(valor))
+
+
+def emitir_completados(tam_lote=TAM_LOTE):
+    """Registra los certificados de los progresos aprobados que todavía no lo tienen.
+
+    Para cargas masivas que no pasan por el examen (sembrar_datos). Devuelve
+    cuántos se crearon.
+    """
+    emitido = Certificado.objects.filter(user_id=OuterRef('user_id'),
+                                         modulo_id=OuterRef('modulo_id'))
+    pendientes = list(
+        Progreso.objects.filter(completado=True)
+        .exclude(Exists(emitido))
+        .order_by('id')
+        .values_list('user_id', 'modulo_id', 'user__date_joined')
+    )
+    codigos = [codigo(user_id, modulo_id, fecha) for user_id, modulo_id, fecha in pendientes]
+    Certificado.objects.bulk_create(
+        (Certificado(user_id=user_id, modulo_id=modulo_id, codigo=valor)
+         for (user_id, modulo_id, _), valor in zip(pendientes, codigos)),
+        batch_size=tam_lote, ignore_conflicts=True,
+    )
+    transaction.on_commit(lambda: cache.delete_many([_clave(valor) for valor in codigos]))
+    return len(pendientes)
+
+
+def _clave(valor):
+    return f'core:verificacion:{valor}'
+
+
+def verificar(valor):
+    """Datos del certificado con ese código, o None si la firma no cuadra o no fue emitido."""
+    valor = valor.strip().upper()
+    if not firma_valida(valor):
+        contar('verificacion_firma_invalida')
+        return None
+
+    datos = cache.get(_clave(valor))
+    if datos is not None:
+        contar('verificacion_cache_hit')
+        return datos or None
+
+    contar('verificacion_cache_miss')
+    datos = (
+        Certificado.objects.using(DEFAULT_DB_ALIAS).filter(codigo=valor)
+        .values('codigo', 'emitido', 'user__perfil__nombre', 'user__perfil__apellido', 'user__username',
+                'modulo__nombre')
+        .first()
+    )
+    if datos is not None:
+        nombre = f"{datos['user__perfil__nombre'] or ''} {datos['user__perfil__apellido'] or ''}".strip()
+        datos = {
+            'codigo': datos['codigo'],
+            'titular': nombre or datos['user__username'],
+            'modulo': datos['modulo__nombre'],
+            'emitido': datos['emitido'],
+        }
+    cache.set(_clave(valor), datos or NO_EMITIDO, DURACION)
+    return datos
+
+
+def invalidar(valor):
+    cache.delete(_clave(valor))
@@ -1,24 +1,37 @@
+import hmac
 
 from django.shortcuts import render, redirect, get_object_or_404
+from django.urls import reverse
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import login
 from django.contrib.auth.forms import UserCreationForm
-from .models import Perfil, Modulo, Pregunta, Progreso
+from .models import CARGO_CHOICES, Perfil, Modulo, Progreso
 from .forms import PerfilForm
-from reportlab.pdfgen import canvas
-from django.http import HttpResponse
+from .calificacion import (
+    procesar_diagnostico, contar_aciertos, obtener_progreso, guardar_examen, clave_examen, sortear_examen,
+    EXAMEN_EXPIRADO, EXAMEN_SIN_PREGUNTAS,
+)
+from .claves import claves
+from . import (
+    analitica, certificados, clasificacion, conocimiento, hojas, lecciones, replica, reportes, resumen, sellos, trabajos,
+    verificacion,
+)
+from .metricas import registro
+from django.http import FileResponse, StreamingHttpResponse, HttpResponse, JsonResponse, Http404
+from django.core.paginator import Paginator
+from django.views.decorators.cache import cache_control, never_cache
+from django.utils.cache import add_never_cache_headers
+from django.contrib.admin.views.decorators import staff_member_required
+from django.conf import settings
 from django.contrib import messages 
-from reportlab.lib.pagesizes import landscape, A4
-from reportlab.lib.units import inch
-from reportlab.lib.colors import HexColor, Color
 from django.contrib.auth.models import User 
-from math import pi, sin
 
 
+@replica.lecturas_en_replica
 def home(request):
     diagnostico_completado = False
     if request.user.is_authenticated:
-        diagnostico_completado = Progreso.objects.filter(user=request.user).exists()
+        diagnostico_completado = resumen.obtener(request.user).diagnostico_completado
     
     context = {
         'diagnostico_completado': diagnostico_completado 
@@ -53,6 +66,7 @@ def register(request):
     })
 
 @login_required
+@sellos.condicional('perfil')
 def perfil(request):
     try:
         perfil_obj = request.user.perfil
@@ -82,73 +96,58 @@ def editar_perfil(request):
     
 @login_required
 def diagnostico(request):
-    modulos = Modulo.objects.all()
-    #  FILTRO CLAVE: Solo Preguntas de Diagnóstico ('D') 
-    preguntas_por_modulo = {modulo: Pregunta.objects.filter(modulo=modulo, tipo_pregunta='D') for modulo in modulos}
-    
     if request.method == 'POST':
-        brechas = []
-        for modulo in modulos:
-            #  FILTRO CLAVE: Solo Preguntas de Diagnóstico ('D') 
-            preguntas = Pregunta.objects.filter(modulo=modulo, tipo_pregunta='D')
-            puntaje = 0
-            total_preguntas = len(preguntas)
-            for pregunta in preguntas:
-                respuesta = request.POST.get(f'pregunta_{pregunta.id}')
-                if respuesta and respuesta.upper() == pregunta.respuesta_correcta.upper():
-                    puntaje += 1
-            
-            porcentaje = (puntaje / total_preguntas) * 100 if total_preguntas > 0 else 0
-            if porcentaje < 50:  # Umbral del 50% para detectar brechas
-                brechas.append(modulo)
-            
-            progreso, _ = Progreso.objects.get_or_create(user=request.user, modulo=modulo)
-            progreso.puntaje = puntaje # Guarda el puntaje del diagnóstico
-            progreso.save()
-            
+        #  FILTRO CLAVE: Solo Preguntas de Diagnóstico ('D'); se califica en memoria
+        # y se guardan todos los Progreso de una vez
+        brechas = procesar_diagnostico(request.user, request.POST)
         request.session['brechas'] = [m.id for m in brechas]
         return redirect('progreso')
-    return render(request, 'core/diagnostico.html', {'preguntas_por_modulo': preguntas_por_modulo})
+    # La hoja de preguntas es igual para todos: sale pre-renderizada de la caché
+    return render(request, 'core/diagnostico.html', {'hoja': hojas.hoja_diagnostico()})
 
 @login_required
 def modulo(request, modulo_id):
-    modulo = get_object_or_404(Modulo, id=modulo_id)
-    # Se asegura de obtener el progreso para mostrar el estado en la plantilla
-    progreso, _ = Progreso.objects.get_or_create(user=request.user, modulo=modulo) 
-    
-    contenido = {
-        'Uso seguro de internet': 'Aprende a proteger tus datos en línea, usar contraseñas seguras y detectar phishing.',
-        'Manejo básico de herramientas ofimáticas': 'Domina herramientas como Word, Excel y PowerPoint para el trabajo diario.',
-        'Comunicación digital': 'Mejora tus habilidades en correo electrónico, videollamadas y plataformas colaborativas.'
-    }.get(modulo.nombre, 'Contenido en desarrollo...')
-    
+    # Módulo y lecciones ya renderizadas salen de la caché (ver core/lecciones.py)
+    contenido = lecciones.obtener(modulo_id)
+    if contenido is None:
+        raise Http404('No existe el módulo.')
+    # El estado del examen sale del resumen en caché; la primera visita crea el Progreso
+    progreso = next((fila for fila in resumen.obtener(request.user).progresos if fila.modulo_id == modulo_id), None)
+    if progreso is None:
+        progreso = obtener_progreso(request.user, Modulo(id=modulo_id))
+
+    # Una página de lecciones por petición en lugar de todo el módulo
+    pagina = Paginator(contenido.paginas, lecciones.POR_PAGINA).get_page(request.GET.get('pagina'))
+
     # La lógica POST para completar se elimina; ahora se hace en el examen
-    return render(request, 'core/modulo.html', {'modulo': modulo, 'contenido': contenido, 'progreso': progreso})
+    return render(request, 'core/modulo.html', {'modulo': contenido, 'pagina': pagina, 'progreso': progreso})
 
 # 3. NUEVA FUNCIÓN: examen_modulo (Lógica del examen 7/10)
 @login_required
 def examen_modulo(request, modulo_id):
     modulo = get_object_or_404(Modulo, id=modulo_id)
     
-    # FILTRO CLAVE: Solo Preguntas de Examen ('E') y limitadas a 10 
-    preguntas = Pregunta.objects.filter(modulo=modulo, tipo_pregunta='E')[:10] 
-    
-    progreso, _ = Progreso.objects.get_or_create(user=request.user, modulo=modulo)
+    progreso = obtener_progreso(request.user, modulo)
     
     if progreso.completado:
         # Si ya aprobó, redirigir a la página del módulo para evitar reintentos
         return redirect('modulo', modulo_id=modulo.id) 
 
-    if request.method == 'POST':
-        puntaje = 0
-        
-        for pregunta in preguntas:
+    # Las preguntas del intento se sortean al abrir el examen y sus ids quedan
+    # congelados en la sesión: el POST califica exactamente lo que se mostró
+    clave = clave_examen(modulo.id)
+    ids = request.session.get(clave)
 
-            respuesta_dada = request.POST.get(f'pregunta_{pregunta.id}')
-            
-            # Comprobación de la respuesta
-            if respuesta_dada and respuesta_dada.upper() == pregunta.respuesta_correcta.upper():
-                puntaje += 1
+    if request.method == 'POST':
+        if not ids:
+            # Sesión vencida o examen no abierto: se sortea uno nuevo. Un
+            # sorteo vacío ([]) lo explica el GET, que avisa del banco sin preguntas
+            if ids is None:
+                messages.error(request, EXAMEN_EXPIRADO)
+            return redirect('examen_modulo', modulo_id=modulo.id)
+        preguntas = claves.por_ids(modulo.id, 'E', ids)
+        # Comprobación de las respuestas, en memoria
+        puntaje = contar_aciertos(preguntas, request.POST)
         
         # Lógica de Aprobación: Mínimo 7 aciertos de 10
         if puntaje >= 7:
@@ -162,283 +161,244 @@ def examen_modulo(request, modulo_id):
         
         # Guardamos el puntaje del examen. (Sobreescribe el puntaje de diagnóstico)
         progreso.puntaje = puntaje
-        progreso.save()
+        # Junto con el progreso queda el intento en el historial y se suman las estadísticas de cada pregunta
+        guardar_examen(request.user, modulo.id, preguntas, request.POST, puntaje, progreso.completado)
         
-        # Guarda el resultado en la sesión para mostrarlo en la vista de progreso
+        # Guarda el resultado en la sesión para mostrarlo en la vista de progreso;
+        # el próximo intento sortea otras preguntas
         request.session['examen_resultado'] = {'mensaje': mensaje, 'clase': mensaje_clase}
+        del request.session[clave]
         return redirect('progreso')
+
+    preguntas = claves.por_ids(modulo.id, 'E', ids) if ids else ()
+    if not preguntas or len(preguntas) < len(ids):
+        # Primer acceso, o se borró alguna pregunta del sorteo anterior
+        ids = sortear_examen(modulo.id)
+        preguntas = claves.por_ids(modulo.id, 'E', ids)
+        request.session[clave] = ids
+    if not preguntas:
+        messages.error(request, EXAMEN_SIN_PREGUNTAS)
         
-    return render(request, 'core/examen_modulo.html', {'modulo': modulo, 'preguntas': preguntas, 'progreso': progreso})
+    return render(request, 'core/examen_modulo.html', {
+        'modulo': modulo,
+        'preguntas': preguntas,
+        'progreso': progreso,
+    })
 
 @login_required
 def tutor(request):
-    respuestas_predefinidas = {
-        '¿Qué es seguridad digital?': 'Es el conjunto de prácticas y herramientas para proteger información en línea, como contraseñas seguras y evitar phishing.',
-        '¿Cómo usar Excel?': 'Empieza con fórmulas básicas como =SUMA(A1:A10) para sumar celdas.',  
-        '¿Cómo redactar un correo profesional?': 'Usa un saludo formal, estructura clara (introducción, cuerpo, cierre) y revisa la ortografía.',
-        '¿Qué es phishing?': 'Es un intento fraudulento de obtener información sensible haciéndose pasar por una entidad confiable en una comunicación electrónica.',
-        '¿Cómo crear una contraseña segura?': 'Usa una combinación de letras mayúsculas, minúsculas, números y símbolos. Evita palabras comunes y usa al menos 12 caracteres.',
-        '¿Qué es una VPN?': 'Una VPN (Red Privada Virtual) cifra tu conexión a internet para proteger tu privacidad y datos en línea.',
-        '¿Cómo hacer una presentación efectiva?': 'Usa diapositivas claras, con imágenes relevantes, y practica tu discurso para mantener la atención de la audiencia.',
-        '¿Qué es el almacenamiento en la nube?': 'Es un servicio que permite guardar datos en servidores remotos accesibles desde internet, facilitando el acceso y la colaboración.',      
-        '¿Cómo evitar el spam en el correo?': 'No compartas tu correo en sitios públicos, usa filtros de spam y no respondas a correos sospechosos.',
-        '¿Qué es el software libre?': 'Es software que puede ser usado, modificado y distribuido libremente por cualquier persona.',
-        '¿Cómo hacer una copia de seguridad?': 'Usa servicios en la nube o dispositivos externos para guardar copias de tus archivos importantes regularmente.',
-        '¿Qué es la autenticación de dos factores?': 'Es un método de seguridad que requiere dos formas de verificación para acceder a una cuenta, como una contraseña y un código enviado a tu teléfono.',
-        '¿Cómo mejorar la comunicación en equipo?': 'Usa herramientas colaborativas, establece canales claros de comunicación y fomenta la retroalimentación constructiva.',    
-        '¿Qué es un firewall?': 'Es una barrera de seguridad que monitorea y controla el tráfico de red entrante y saliente basado en reglas de seguridad predefinidas.',
-        '¿Cómo organizar archivos digitales?': 'Usa carpetas con nombres claros, etiquetas y realiza limpiezas periódicas para eliminar archivos innecesarios.',
-        '¿Qué es el teletrabajo?': 'Es la modalidad de trabajo que permite realizar tareas laborales desde cualquier lugar fuera de la oficina, generalmente usando tecnología digital.',   
-        '¿Cómo usar PowerPoint?': 'Crea diapositivas con títulos claros, usa listas con viñetas y añade imágenes para hacerlas más atractivas.',
-        '¿Qué es el Big Data?': 'Es el manejo y análisis de grandes volúmenes de datos para descubrir patrones, tendencias y asociaciones.',
-        '¿Cómo proteger mi privacidad en redes sociales?': 'Ajusta la configuración de privacidad, no compartas información personal y sé selectivo con tus contactos.',
-        '¿Qué es el Internet de las Cosas (IoT)?': 'Es la interconexión de dispositivos físicos a internet, permitiendo enviar y recibir datos para mejorar la eficiencia y funcionalidad.',    
-        '¿Cómo usar Word?': 'Usa estilos para títulos, revisa la ortografía y aprovecha las plantillas para documentos comunes.',       
-        '¿Qué es la inteligencia artificial?': 'Es la simulación de procesos de inteligencia humana por parte de máquinas, especialmente sistemas informáticos.',
-        '¿Cómo hacer videollamadas efectivas?': 'Asegúrate de tener buena iluminación, un fondo adecuado y prueba tu equipo antes de la llamada.',  
-        '¿Qué es el blockchain?': 'Es una tecnología de registro distribuido que asegura la integridad y transparencia de las transacciones digitales.',
-        '¿Cómo gestionar el tiempo usando herramientas digitales?': 'Usa calendarios en línea, aplicaciones de tareas y establece recordatorios para mantenerte organizado.',   
-        '¿Qué es el machine learning?': 'Es una rama de la inteligencia artificial que permite a las máquinas aprender de los datos y mejorar su rendimiento sin ser programadas explícitamente.',      
-        '¿Cómo colaborar en documentos en línea?': 'Usa plataformas como Google Docs o Microsoft OneDrive que permiten la edición simultánea y comentarios en tiempo real.',
-        '¿Qué es la realidad aumentada?': 'Es una tecnología que superpone información digital (imágenes, sonidos) en el mundo real a través de dispositivos como smartphones o gafas especiales.',
-        '¿Cómo mantener mi computadora segura?': 'Mantén tu software actualizado, usa antivirus y evita descargar archivos de fuentes no confiables.',
-        '¿Qué es el SaaS (Software como Servicio)?': 'Es un modelo de distribución de software donde las aplicaciones se alojan en la nube y se accede a ellas a través de internet.',
-        '¿Cómo usar herramientas de gestión de proyectos?': 'Utiliza plataformas como Trello o Asana para organizar tareas, asignar responsabilidades y seguir el progreso del equipo.',
-        '¿Qué es la computación en la nube?': 'Es el uso de servidores remotos en internet para almacenar, gestionar y procesar datos, en lugar de hacerlo en un servidor local o una computadora personal.',
-        '¿Cómo hacer búsquedas efectivas en internet?': 'Usa palabras clave específicas, comillas para frases exactas y operadores como AND, OR para refinar resultados.',
-        '¿Qué es el desarrollo web?': 'Es la creación y mantenimiento de sitios web, que incluye aspectos como diseño, contenido y funcionalidad.',
-        '¿Cómo proteger mis dispositivos móviles?': 'Usa contraseñas, activa la autenticación de dos factores y evita conectarte a redes Wi-Fi públicas sin protección.',
-        '¿Qué es la ciberseguridad?': 'Es la práctica de proteger sistemas, redes y programas de ataques digitales para salvaguardar la información y la privacidad.'
-    }
+    # Las respuestas viven en EntradaTutor y se buscan en un índice en memoria
+    indice = conocimiento.indice()
     respuesta = None
+    sugerencias = []
     if request.method == 'POST':
-        pregunta = request.POST.get('pregunta')
-        respuesta = respuestas_predefinidas.get(pregunta, 'Lo siento, no tengo una respuesta para esa pregunta. Intenta con otra.')
-    return render(request, 'core/tutor.html', {'respuesta': respuesta, 'preguntas': respuestas_predefinidas.keys()})
-
+        pregunta = request.POST.get('pregunta', '')
+        resultados = indice.buscar(pregunta, k=4)
+        if resultados:
+            respuesta = resultados[0][3]
+            sugerencias = [r[2] for r in resultados[1:]]
+        else:
+            respuesta = 'Lo siento, no tengo una respuesta para esa pregunta. Intenta con otra.'
+    return render(request, 'core/tutor.html', {
+        'respuesta': respuesta,
+        'sugerencias': sugerencias,
+        'preguntas': [entrada[1] for entrada in indice.entradas],
+    })
 
 
 @login_required
+@sellos.condicional('progreso')
+@replica.lecturas_en_replica
 def progreso(request):
-    # 1. Obtener todos los progresos del usuario ordenados
-    progresos = Progreso.objects.filter(user=request.user).order_by('modulo__id')
-    
-    modulos_completados = progresos.filter(completado=True)
-    completados_count = modulos_completados.count()
-    total = progresos.count()  # Cuenta solo los módulos existentes para este usuario en Progreso
+    # Resumen del usuario (progresos, completados, pendientes y porcentaje) desde la caché;
+    # solo se consulta la base cuando cambió algún Progreso del usuario o algún Modulo
+    datos = resumen.obtener(request.user)
     
-    # 2. Calcular Porcentaje Real
-    porcentaje_real = round((completados_count / total) * 100) if total > 0 else 0
-
-    # 3. Obtener TODOS los módulos pendientes (Opción 2)
-    modulos_pendientes = progresos.filter(completado=False).order_by('modulo__id')
-    
-    # 4. Obtener y limpiar el mensaje de resultado del examen
+    # Obtener y limpiar el mensaje de resultado del examen; la página que lo
+    # muestra no debe volver como 304, así que se renueva el sello
     mensaje_resultado = request.session.pop('examen_resultado', None) 
+    if mensaje_resultado is not None:
+        sellos.tocar(request.user.id)
     
     return render(request, 'core/progreso.html', {
-        'progresos': progresos,
-        'completados': completados_count,
-        'total': total,
-        'porcentaje_real': porcentaje_real,
-        'modulos_pendientes': modulos_pendientes,  
+        'progresos': datos.progresos,
+        'completados': datos.completados,
+        'total': datos.total,
+        'porcentaje_real': datos.porcentaje,
+        'modulos_pendientes': datos.modulos_pendientes,  
         'mensaje_resultado': mensaje_resultado
     })
 
 
 @login_required
+@sellos.condicional('certificado', certificados.VERSION_PLANTILLA)
 def generar_certificado(request, modulo_id):
     # Verifica si el módulo está completado para este usuario
-    progreso = get_object_or_404(Progreso, user=request.user, modulo_id=modulo_id)
+    progreso = get_object_or_404(Progreso.objects.select_related('modulo'), user=request.user, modulo_id=modulo_id)
     if not progreso.completado:
         return redirect('progreso')
 
     # Obtener detalles del módulo
     modulo = progreso.modulo
 
-    response = HttpResponse(content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="certificado_{modulo.nombre}_{request.user.username}.pdf"'
+    # El PDF se dibuja una sola vez y luego se sirve desde la caché en disco;
+    # si el worker todavía lo está preparando se espera a que termine
+    ruta = certificados.ruta_cache(certificados.datos_certificado(request.user, modulo))
+    if not ruta.exists():
+        if trabajos.en_espera(request.user.id, modulo.id):
+            return certificado_pendiente(request, modulo)
+        ruta = certificados.obtener_pdf(request.user, modulo)
+    return FileResponse(
+        open(ruta, 'rb'),
+        as_attachment=True,
+        filename=f"certificado_{modulo.nombre}_{request.user.username}.pdf",
+        content_type='application/pdf',
+    )
 
-    p = canvas.Canvas(response, pagesize=landscape(A4))
-    width, height = landscape(A4)
 
-    # --- FONDO LIMPIO ---
-    p.setFillColor(HexColor("#FFFFFF"))
-    p.rect(0, 0, width, height, fill=1)
-    
-    # --- BORDE ELEGANTE ---
-    margin = 0.6 * inch
-    p.setStrokeColor(HexColor("#2C5F9B"))
-    p.setLineWidth(6)
-    p.rect(margin, margin, width-2*margin, height-2*margin, stroke=1, fill=0)
-
-    # --- LOGOTIPO  EN ESQUINA SUPERIOR DERECHA ---
-    logo_x = width - margin - 1.2*inch  # Posición X para el logo
-    logo_y = height - margin - 0.8*inch  # Posición Y para el logo
-    
-    #  logo 
-    p.setLineWidth(0.15*inch)
-    p.setLineCap(1)
-    segments = 100
-    w = 0.8 * inch
-    amp = 0.2 * inch
-    freq = 1
-    phase = 3 * pi / 2
-    start_x = logo_x - 0.4 * inch
-    start_color = Color(54/255, 209/255, 220/255)  # Azul
-    end_color = Color(255/255, 94/255, 98/255)  # Rosa
-    
-    for i in range(segments):
-        t1 = i / segments
-        t2 = (i + 1) / segments
-        y1 = logo_y + amp * sin(2 * pi * freq * t1 + phase)
-        x1 = start_x + w * t1
-        y2 = logo_y + amp * sin(2 * pi * freq * t2 + phase)
-        x2 = start_x + w * t2
-        fraction = (t1 + t2) / 2
-        r = start_color.red + fraction * (end_color.red - start_color.red)
-        g = start_color.green + fraction * (end_color.green - start_color.green)
-        b = start_color.blue + fraction * (end_color.blue - start_color.blue)
-        color = Color(r, g, b)
-        p.setStrokeColor(color)
-        p.line(x1, y1, x2, y2)
-    
-    # Texto ANSSD debajo del logo
-    p.setFont("Helvetica-Bold", 10)
-    p.setFillColor(HexColor("#2C5F9B"))
-    p.drawCentredString(logo_x, logo_y - 0.7*inch, "ANSSD")
+def certificado_pendiente(request, modulo):
+    # 202 sin guardar en el navegador: la página consulta estado_certificado y descarga al terminar
+    response = render(request, 'core/certificado_pendiente.html', {'modulo': modulo}, status=202)
+    add_never_cache_headers(response)
+    return response
 
-    # --- ENCABEZADO ---
-    
-    # Título principal
-    p.setFont("Helvetica-Bold", 24)
-    p.setFillColor(HexColor("#1A365D"))
-    p.drawCentredString(width/2, height-1.8*inch, "CERTIFICADO DE PARTICIPACIÓN")
-    
-    # Línea decorativa bajo el título
-    p.setStrokeColor(HexColor("#E6A23C"))
-    p.setLineWidth(2)
-    p.line(width/2-1.6*inch, height-2.0*inch, width/2+1.6*inch, height-2.0*inch)
 
-    # --- CONTENIDO PRINCIPAL ---
-    
-    # Texto de presentación
-    p.setFont("Helvetica", 13)
-    p.setFillColor(HexColor("#555555"))
-    p.drawCentredString(width/2, height-2.6*inch, "Se otorga el presente certificado a:")
+@login_required
+@never_cache
+def estado_certificado(request, modulo_id):
+    estado, esperar = trabajos.estado(request.user.id, modulo_id)
+    return JsonResponse({
+        'estado': estado or 'sin_trabajo',
+        # Listo, fallido o sin worker: la descarga lo sirve o lo dibuja en el momento
+        'descargar': not esperar,
+        'url': reverse('certificado', args=[modulo_id]),
+    })
 
-    # Nombre completo del usuario (nombre + apellido)
-    p.setFont("Helvetica-Bold", 28)
-    p.setFillColor(HexColor("#2C5F9B"))
 
-    try:
-      perfil = request.user.perfil
-      nombre_completo = f"{perfil.nombre.upper()} {perfil.apellido.upper()}"
-    except:
-      nombre_completo = request.user.get_full_name().upper() or request.user.username.upper()
+@cache_control(public=True, max_age=settings.CERTIFICADOS_VERIFICACION_SEGUNDOS)
+@replica.lecturas_en_replica
+def verificar_certificado(request, codigo):
+    # Pública: la firma se comprueba antes de consultar la base (?formato=json para integraciones)
+    certificado = verificacion.verificar(codigo)
+    estado = 200 if certificado else 404
+    if request.GET.get('formato') == 'json':
+        datos = {'valido': False, 'codigo': codigo}
+        if certificado:
+            datos.update(certificado, valido=True)
+        return JsonResponse(datos, status=estado)
+    return render(request, 'core/verificar.html', {'certificado': certificado, 'codigo': codigo}, status=estado)
+
+
+@staff_member_required
+@replica.lecturas_en_replica
+def certificados_lote(request):
+    # ZIP con los certificados aprobados, filtrando por cargo y/o módulo (?cargo=&modulo=)
+    cargo = request.GET.get('cargo') or None
+    modulo_id = request.GET.get('modulo') or None
+    if modulo_id is not None and not modulo_id.isdigit():
+        modulo_id = None
+
+    progresos = certificados.progresos_completados(cargo, modulo_id)
+    workers = getattr(settings, 'CERTIFICADOS_LOTE_WORKERS', 1)
+    archivos = certificados.pdfs_en_lotes(progresos, workers=workers)
+
+    response = StreamingHttpResponse(certificados.zip_en_streaming(archivos), content_type='application/zip')
+    response['Content-Disposition'] = f'attachment; filename="certificados_{cargo or "todos"}.zip"'
+    return response
+
+
+@staff_member_required
+@replica.lecturas_en_replica
+def analisis_preguntas(request):
+    # Dificultad y discriminación de cada pregunta desde los contadores (?modulo=&tipo=)
+    modulo_id = request.GET.get('modulo') or None
+    if modulo_id is not None:
+        modulo_id = int(modulo_id) if modulo_id.isdigit() else None
+    tipo = request.GET.get('tipo') if request.GET.get('tipo') in ('D', 'E') else None
+    return render(request, 'core/analisis_preguntas.html', {
+        'filas': analitica.reporte(modulo_id, tipo),
+        'modulos': Modulo.objects.order_by('id'),
+        'modulo_id': modulo_id,
+        'tipo': tipo,
+        'min_intentos': analitica.MIN_INTENTOS,
+    })
 
-    p.drawCentredString(width/2, height-3.3*inch, nombre_completo)
 
-    # Texto de reconocimiento
-    p.setFont("Helvetica", 12)
-    p.setFillColor(HexColor("#666666"))
-    p.drawCentredString(width/2, height-3.9*inch, "Por haber completado exitosamente el")
-    
-    # Nombre del módulo
-    p.setFont("Helvetica-Bold", 16)
-    p.setFillColor(HexColor("#1A365D"))
-    p.drawCentredString(width/2, height-4.4*inch, f"MÓDULO DE {modulo.nombre.upper()}")
-    
-    # Texto adicional
-    p.setFont("Helvetica", 11)
-    p.setFillColor(HexColor("#777777"))
-    p.drawCentredString(width/2, height-4.9*inch, "demostrando competencia y dedicación en el aprendizaje")
+def _filtros_reporte(request):
+    cargo = request.GET.get('cargo') or None
+    modulo_id = request.GET.get('modulo') or None
+    if modulo_id is not None:
+        modulo_id = int(modulo_id) if modulo_id.isdigit() else None
+    return cargo, modulo_id
+
+
+@staff_member_required
+@replica.lecturas_en_replica
+def reporte_cargos(request):
+    # Tasa de aprobación y puntaje promedio por cargo y módulo desde ResumenCargo (?cargo=)
+    cargo, _ = _filtros_reporte(request)
+    return render(request, 'core/reporte_cargos.html', {
+        'filas': reportes.filas_reporte(cargo),
+        'cargos': [c for c, _ in CARGO_CHOICES] + [reportes.SIN_PERFIL],
+        'cargo': cargo,
+        'modulos': Modulo.objects.order_by('id'),
+    })
 
-    # --- SECCIÓN INFERIOR: FIRMA Y FECHA ---
-    y_base = height - 6.0*inch
-    
-    # Línea separadora
-    p.setStrokeColor(HexColor("#CBD5E0"))
-    p.setLineWidth(0.5)
-    p.line(2*inch, y_base, width-2*inch, y_base)
 
-    # FECHA (Izquierda)
-    x_fecha = 3 * inch
-    
-    p.setFont("Helvetica-Bold", 11)
-    p.setFillColor(HexColor("#2C5F9B"))
-    p.drawCentredString(x_fecha, y_base - 0.6*inch, "Fecha de Emisión")
-    
-    p.setFont("Helvetica", 11)
-    p.setFillColor(HexColor("#1A365D"))
-    
-    # Formatear fecha en español
-    meses_es = {
-        'January': 'enero', 'February': 'febrero', 'March': 'marzo',
-        'April': 'abril', 'May': 'mayo', 'June': 'junio',
-        'July': 'julio', 'August': 'agosto', 'September': 'septiembre',
-        'October': 'octubre', 'November': 'noviembre', 'December': 'diciembre'
-    }
-    fecha_emision = request.user.date_joined
-    mes_es = meses_es.get(fecha_emision.strftime('%B'), fecha_emision.strftime('%B'))
-    fecha_formateada = f"{fecha_emision.strftime('%d')} de {mes_es} de {fecha_emision.strftime('%Y')}"
-    
-    p.drawCentredString(x_fecha, y_base - 0.9*inch, fecha_formateada)
+@staff_member_required
+@replica.lecturas_en_replica
+def reporte_cargos_csv(request):
+    # Detalle por usuario y módulo, en streaming (?cargo=&modulo=)
+    cargo, modulo_id = _filtros_reporte(request)
+    response = StreamingHttpResponse(reportes.detalle_csv(cargo, modulo_id), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="reporte_{cargo or "todos"}.csv"'
+    return response
 
-    # FIRMA (Derecha)
-    x_firma = width - 3 * inch
-    
-    # FIRMA GRÁFICA
-    p.setStrokeColor(HexColor("#2C5F9B"))
-    p.setLineWidth(1.8)
-    
-    # Dibujar firma
-    signature_points = [
-        (x_firma-1.2*inch, y_base - 0.5*inch),
-        (x_firma-0.9*inch, y_base - 0.4*inch),
-        (x_firma-0.6*inch, y_base - 0.6*inch),
-        (x_firma-0.3*inch, y_base - 0.35*inch),
-        (x_firma, y_base - 0.55*inch),
-        (x_firma+0.3*inch, y_base - 0.4*inch),
-        (x_firma+0.6*inch, y_base - 0.65*inch),
-        (x_firma+0.9*inch, y_base - 0.45*inch)
-    ]
-    
-    for i in range(len(signature_points)-1):
-        p.line(signature_points[i][0], signature_points[i][1],
-               signature_points[i+1][0], signature_points[i+1][1])
-    
-    # Línea de firma
-    p.setStrokeColor(HexColor("#2C5F9B"))
-    p.setLineWidth(1)
-    p.line(x_firma-1.0*inch, y_base - 0.7*inch, x_firma+1.0*inch, y_base - 0.7*inch)
-
-    # Información del firmante
-    p.setFont("Helvetica-Bold", 11)
-    p.setFillColor(HexColor("#2C5F9B"))
-    p.drawCentredString(x_firma, y_base - 0.9*inch, "Ing. Elena Mendoza")
-    
-    p.setFont("Helvetica-Oblique", 10)
-    p.setFillColor(HexColor("#666666"))
-    p.drawCentredString(x_firma, y_base - 1.1*inch, "Coordinadora de Formación Digital ANSSD")
 
-    # --- CÓDIGO DE VERIFICACIÓN ---
-    codigo_verificacion = f"CÓDIGO DE VERIFICACIÓN: CD-{request.user.id:06d}-{modulo.id:03d}-{request.user.date_joined.strftime('%Y%m')}"
-    
-    p.setFont("Helvetica", 8)
-    p.setFillColor(HexColor("#666666"))
-    p.drawCentredString(width/2, margin + 0.2*inch, codigo_verificacion)
+@login_required
+def tabla_posiciones(request):
+    # Clasificación de un módulo (?modulo=) o de un cargo (?cargo=), de a una página (?pagina=);
+    # el orden viene de la caché y la base solo se consulta por los nombres de la página
+    modulos = list(Modulo.objects.order_by('id').values_list('id', 'nombre'))
+    cargos = clasificacion.cargos()
+    cargo = request.GET.get('cargo')
+    modulo_id = request.GET.get('modulo', '')
+    if cargo in dict(cargos):
+        tipo, valor, titulo = clasificacion.CARGO, cargo, dict(cargos)[cargo]
+    elif modulos:
+        por_id = dict(modulos)
+        valor = int(modulo_id) if modulo_id.isdigit() and int(modulo_id) in por_id else modulos[0][0]
+        tipo, titulo, cargo = clasificacion.MODULO, por_id[valor], None
+    else:
+        raise Http404('No hay módulos')
+
+    pagina = request.GET.get('pagina', '1')
+    tabla = clasificacion.consultar(tipo, valor, request.user.id, int(pagina) if pagina.isdigit() else 1)
+    nombres = {
+        user_id: f'{nombre} {apellido}' if nombre else username
+        for user_id, username, nombre, apellido in User.objects.filter(id__in=[u for _, u, _ in tabla.filas])
+        .values_list('id', 'username', 'perfil__nombre', 'perfil__apellido')
+    }
+    return render(request, 'core/clasificacion.html', {
+        'tabla': tabla,
+        'filas': [(puesto, nombres.get(user_id, ''), puntaje, user_id == request.user.id)
+                  for puesto, user_id, puntaje in tabla.filas],
+        'titulo': titulo,
+        'tipo': tipo,
+        'valor': valor,
+        'modulos': modulos,
+        'cargos': cargos,
+        'cargo': cargo,
+    })
 
-    # --- ELEMENTOS DECORATIVOS ---
-    p.setStrokeColor(HexColor("#E6A23C"))
-    p.setLineWidth(1)
-    
-    # Pequeños adornos en esquinas (solo esquina superior izquierda ahora)
-    corner_size = 0.2 * inch
-    # Esquina superior izquierda
-    p.line(margin, height-margin-corner_size, margin, height-margin)
-    p.line(margin, height-margin, margin+corner_size, height-margin)
-
-    p.showPage()
-    p.save()
-    return response
\ No newline at end of file
+
+@replica.lecturas_en_replica
+def metricas(request):
+    # Métricas en formato Prometheus: solo staff o quien traiga el token configurado
+    token = settings.METRICAS_TOKEN
+    autorizacion = request.META.get('HTTP_AUTHORIZATION', '')
+    con_token = bool(token) and hmac.compare_digest(autorizacion, f'Bearer {token}')
+    if not (con_token or (request.user.is_authenticated and request.user.is_staff)):
+        return HttpResponse(status=403)
+    # La cola de certificados se lee de la base: su worker es otro proceso
+    return HttpResponse(registro.prometheus() + trabajos.prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
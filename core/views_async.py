@@ -0,0 +1,166 @@
+"""Versiones async de las vistas más visitadas, para servir con ASGI (uvicorn).
+
+Las lecturas usan el ORM async de Django (aget, aget_or_create, async for) y
+las cachés async, de modo que una petición que espera a la base no ocupa un
+hilo. Las escrituras van en transacciones y la sesión de Django 5.0 no tiene
+API async: ambas se hacen con sync_to_async. El dibujo de PDF, que es CPU
+pura, va a un pool de procesos acotado.
+
+core/urls.py las usa en lugar de las de views.py cuando VISTAS_ASYNC está
+activo, cosa que hace plataforma_ANSSD/asgi.py.
+"""
+import asyncio
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.contrib import messages
+from django.contrib.auth.views import redirect_to_login
+from django.http import HttpResponse
+from django.shortcuts import aget_object_or_404, redirect, render
+from django.utils.cache import add_never_cache_headers
+from django.utils.http import content_disposition_header
+
+from . import certificados, hojas, replica, resumen, sellos, trabajos
+from .calificacion import (
+    EXAMEN_EXPIRADO, EXAMEN_SIN_PREGUNTAS, aobtener_progreso, aprocesar_diagnostico, asortear_examen, clave_examen,
+    contar_aciertos, guardar_examen,
+)
+from .claves import claves
+from .models import Modulo, Progreso
+
+
+def login_requerido(vista):
+    """login_required para vistas async: resuelve el usuario sin bloquear."""
+    @wraps(vista)
+    async def envuelta(request, *args, **kwargs):
+        request.user = await request.auser()
+        if not request.user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        return await vista(request, *args, **kwargs)
+    return envuelta
+
+
+@sync_to_async
+def guardar_en_sesion(request, clave, valor):
+    request.session[clave] = valor
+
+
+@sync_to_async
+def leer_de_sesion(request, clave):
+    return request.session.get(clave)
+
+
+@sync_to_async
+def sacar_de_sesion(request, clave):
+    return request.session.pop(clave, None)
+
+
+@replica.lecturas_en_replica
+async def home(request):
+    request.user = await request.auser()
+    diagnostico_completado = False
+    if request.user.is_authenticated:
+        diagnostico_completado = (await resumen.aobtener(request.user)).diagnostico_completado
+    return render(request, 'core/home.html', {'diagnostico_completado': diagnostico_completado})
+
+
+@login_requerido
+async def diagnostico(request):
+    if request.method == 'POST':
+        brechas = await aprocesar_diagnostico(request.user, request.POST)
+        await guardar_en_sesion(request, 'brechas', [m.id for m in brechas])
+        return redirect('progreso')
+    return render(request, 'core/diagnostico.html', {'hoja': await hojas.ahoja_diagnostico()})
+
+
+@login_requerido
+async def examen_modulo(request, modulo_id):
+    modulo = await aget_object_or_404(Modulo, id=modulo_id)
+    progreso = await aobtener_progreso(request.user, modulo)
+
+    if progreso.completado:
+        return redirect('modulo', modulo_id=modulo.id)
+
+    clave = clave_examen(modulo.id)
+    ids = await leer_de_sesion(request, clave)
+
+    if request.method == 'POST':
+        if not ids:
+            if ids is None:
+                messages.error(request, EXAMEN_EXPIRADO)
+            return redirect('examen_modulo', modulo_id=modulo.id)
+        preguntas = await claves.apor_ids(modulo.id, 'E', ids)
+        puntaje = contar_aciertos(preguntas, request.POST)
+        progreso.completado = puntaje >= 7
+        if progreso.completado:
+            mensaje_clase = "alert-success"
+            mensaje = f"¡Felicidades! Has aprobado el módulo '{modulo.nombre}' con {puntaje} aciertos. ✨"
+        else:
+            mensaje_clase = "alert-danger"
+            mensaje = f"No has aprobado el módulo '{modulo.nombre}'. Obtuviste *{puntaje}* aciertos. Necesitas 7 o más para aprobar. Inténtalo de nuevo. 😔"
+
+        progreso.puntaje = puntaje
+        # Progreso, intento y estadísticas van en una transacción, que es síncrona
+        await sync_to_async(guardar_examen)(request.user, modulo.id, preguntas, request.POST, puntaje,
+                                            progreso.completado)
+        await guardar_en_sesion(request, 'examen_resultado', {'mensaje': mensaje, 'clase': mensaje_clase})
+        await sacar_de_sesion(request, clave)
+        return redirect('progreso')
+
+    preguntas = await claves.apor_ids(modulo.id, 'E', ids) if ids else ()
+    if not preguntas or len(preguntas) < len(ids):
+        ids = await asortear_examen(modulo.id)
+        preguntas = await claves.apor_ids(modulo.id, 'E', ids)
+        await guardar_en_sesion(request, clave, ids)
+    if not preguntas:
+        messages.error(request, EXAMEN_SIN_PREGUNTAS)
+
+    return render(request, 'core/examen_modulo.html', {
+        'modulo': modulo,
+        'preguntas': preguntas,
+        'progreso': progreso,
+    })
+
+
+@login_requerido
+@sellos.condicional('progreso')
+@replica.lecturas_en_replica
+async def progreso(request):
+    datos = await resumen.aobtener(request.user)
+    mensaje_resultado = await sacar_de_sesion(request, 'examen_resultado')
+    if mensaje_resultado is not None:
+        await sellos.atocar(request.user.id)
+    return render(request, 'core/progreso.html', {
+        'progresos': datos.progresos,
+        'completados': datos.completados,
+        'total': datos.total,
+        'porcentaje_real': datos.porcentaje,
+        'modulos_pendientes': datos.modulos_pendientes,
+        'mensaje_resultado': mensaje_resultado
+    })
+
+
+@login_requerido
+@sellos.condicional('certificado', certificados.VERSION_PLANTILLA)
+async def generar_certificado(request, modulo_id):
+    # El perfil viene en la misma consulta: datos_certificado no vuelve a la base
+    progreso = await aget_object_or_404(
+        Progreso.objects.select_related('modulo', 'user__perfil'), user=request.user, modulo_id=modulo_id,
+    )
+    if not progreso.completado:
+        return redirect('progreso')
+
+    modulo = progreso.modulo
+    datos = certificados.datos_certificado(progreso.user, modulo)
+    # Si el worker todavía lo está preparando se espera a que termine (ver core/trabajos.py)
+    if not await asyncio.to_thread(certificados.ruta_cache(datos).exists) and \
+            await trabajos.aen_espera(request.user.id, modulo.id):
+        response = render(request, 'core/certificado_pendiente.html', {'modulo': modulo}, status=202)
+        add_never_cache_headers(response)
+        return response
+    contenido = await certificados.aobtener_pdf(datos)
+    response = HttpResponse(contenido, content_type='application/pdf')
+    response['Content-Disposition'] = content_disposition_header(
+        True, f"certificado_{modulo.nombre}_{request.user.username}.pdf",
+    )
+    return response
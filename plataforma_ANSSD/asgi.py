@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'plataforma_ANSSD.settings')
+# Con ASGI se usan las vistas async de core/views_async.py
+os.environ.setdefault('ANSSD_ASGI', '1')
 
 application = get_asgi_application()
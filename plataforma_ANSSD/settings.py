@@ -42,12 +42,18 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Primero: mide la petición completa (SQL, plantillas, PDF) y agrega Server-Timing
+    'core.metricas.MetricasMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    # Sirve STATIC_ROOT (construir_estaticos) con gzip/brotli y caché larga
+    'core.estaticos.EstaticosMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
+    # Tras una escritura, ese navegador lee de la primaria aunque haya réplica
+    'core.replica.PrimariaTrasEscrituraMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
@@ -55,7 +61,8 @@ ROOT_URLCONF = 'plataforma_ANSSD.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates que además mide el tiempo de render para las métricas
+        'BACKEND': 'core.metricas.PlantillasDjango',
         'DIRS': [BASE_DIR / 'core/templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -75,17 +82,88 @@ WSGI_APPLICATION = 'plataforma_ANSSD.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
 
+# Todo se puede cambiar por entorno (ANSSD_DB_*). Las conexiones se reutilizan
+# durante ANSSD_DB_CONN_MAX_AGE segundos y se comprueban antes de cada petición
+# (CONN_HEALTH_CHECKS). Bajo ASGI Django no puede reutilizarlas entre
+# peticiones, así que ahí el valor por defecto es 0; conviene un pooler.
+CONN_MAX_AGE = int(os.environ.get('ANSSD_DB_CONN_MAX_AGE', 0 if os.environ.get('ANSSD_ASGI') == '1' else 60))
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql',
-        'NAME': "anssd_plataforma",
-        'USER': "postgres",
-        'PASSWORD': "1234",
-        'HOST': "localhost",
-        'PORT': "5432",
+        'NAME': os.environ.get('ANSSD_DB_NAME', 'anssd_plataforma'),
+        'USER': os.environ.get('ANSSD_DB_USER', 'postgres'),
+        'PASSWORD': os.environ.get('ANSSD_DB_PASSWORD', '1234'),
+        'HOST': os.environ.get('ANSSD_DB_HOST', 'localhost'),
+        'PORT': os.environ.get('ANSSD_DB_PORT', '5432'),
+        'CONN_MAX_AGE': CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# Réplica de solo lectura opcional para reportes y paneles (ver core/replica.py);
+# usuario, clave y nombre son los de la primaria salvo que se indiquen
+if os.environ.get('ANSSD_DB_REPLICA_HOST'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': os.environ.get('ANSSD_DB_REPLICA_NAME', DATABASES['default']['NAME']),
+        'USER': os.environ.get('ANSSD_DB_REPLICA_USER', DATABASES['default']['USER']),
+        'PASSWORD': os.environ.get('ANSSD_DB_REPLICA_PASSWORD', DATABASES['default']['PASSWORD']),
+        'HOST': os.environ['ANSSD_DB_REPLICA_HOST'],
+        'PORT': os.environ.get('ANSSD_DB_REPLICA_PORT', DATABASES['default']['PORT']),
+    }
+
+# Bases SQLite locales para pruebas de carga y benchmarks: ANSSD_SQLITE=/ruta/bench.sqlite3.
+# ANSSD_SQLITE_REPLICA hace de réplica: una copia del archivo (cp) tomada a mano
+for alias, variable in (('default', 'ANSSD_SQLITE'), ('replica', 'ANSSD_SQLITE_REPLICA')):
+    if os.environ.get(variable):
+        DATABASES[alias] = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ[variable],
+            'CONN_MAX_AGE': CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
+        }
+
+if 'replica' in DATABASES:
+    # En las pruebas la réplica es la misma base de prueba que la primaria
+    DATABASES['replica']['TEST'] = {'MIRROR': 'default'}
+
+DATABASE_ROUTERS = ['core.replica.RouterReplica']
+# Segundos que un navegador lee de la primaria después de escribir (leer lo propio)
+DATABASE_REPLICA_RETRASO = int(os.environ.get('ANSSD_DB_REPLICA_RETRASO', 10))
+
+# Caché compartida entre workers: resúmenes, sellos (ETag), versiones del banco
+# de preguntas, clasificaciones y verificación de certificados se invalidan en
+# ella. ANSSD_REDIS_URL (redis://host:6379/1) o ANSSD_MEMCACHED (host:11211);
+# sin ninguna, LocMemCache, que vale solo dentro de un proceso (desarrollo).
+if os.environ.get('ANSSD_REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['ANSSD_REDIS_URL'],
+        }
+    }
+elif os.environ.get('ANSSD_MEMCACHED'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+            'LOCATION': os.environ['ANSSD_MEMCACHED'].split(','),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        }
+    }
+
+# Vistas async en core/urls.py; plataforma_ANSSD/asgi.py lo activa con ANSSD_ASGI=1
+VISTAS_ASYNC = os.environ.get('ANSSD_ASGI') == '1'
+
+# Token para que Prometheus lea /metrics sin sesión de staff (Authorization: Bearer <token>)
+METRICAS_TOKEN = os.environ.get('ANSSD_METRICAS_TOKEN', '')
+
 LOGIN_URL = '/login/'
 LOGIN_REDIRECT_URL = '/'
 LOGOUT_REDIRECT_URL = '/'
@@ -127,6 +205,31 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 STATICFILES_DIRS = [BASE_DIR / 'core/static']
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+# Minifica, agrega el hash al nombre y precomprime (ver core/estaticos.py)
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'core.estaticos.AlmacenEstaticos'},
+}
+# Solo se minifican los estáticos propios; los de terceros ya vienen minificados
+ESTATICOS_MINIFICAR = ('core/',)
+
+# Caché en disco de los certificados PDF ya generados
+CERTIFICADOS_CACHE_DIR = BASE_DIR / 'cache' / 'certificados'
+# Procesos usados por la descarga de certificados en lote desde la web
+CERTIFICADOS_LOTE_WORKERS = 1
+# Procesos que dibujan los certificados pedidos a las vistas async
+CERTIFICADOS_ASYNC_WORKERS = 2
+# Clave del HMAC de los códigos de verificación (vacía: SECRET_KEY); cambiarla invalida los códigos impresos
+CERTIFICADOS_CLAVE_FIRMA = os.environ.get('ANSSD_CLAVE_CERTIFICADOS', '')
+# Segundos que se guarda en caché la respuesta de /verificar/<código>/
+CERTIFICADOS_VERIFICACION_SEGUNDOS = 5 * 60
+# Cola de certificados (procesar_certificados): segundos que la descarga espera
+# al worker antes de dibujar ella misma, que un trabajo puede quedar en proceso
+# antes de darlo por abandonado, e intentos antes de marcarlo fallido
+CERTIFICADOS_COLA_ESPERA = 60
+CERTIFICADOS_COLA_VENCIMIENTO = 10 * 60
+CERTIFICADOS_COLA_MAX_INTENTOS = 3
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.0/ref/settings/#default-auto-field